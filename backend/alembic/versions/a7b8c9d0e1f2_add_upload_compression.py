@@ -0,0 +1,29 @@
+"""add upload stored_bytes and compression
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'a7b8c9d0e1f2'
+down_revision: Union[str, None] = 'f6a7b8c9d0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('uploads', sa.Column('stored_bytes', sa.BigInteger(), nullable=True))
+    op.add_column(
+        'uploads',
+        sa.Column('compression', sa.String(10), nullable=False, server_default='none'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('uploads', 'compression')
+    op.drop_column('uploads', 'stored_bytes')
@@ -1,18 +1,30 @@
 """JWT token creation and verification utilities."""
 
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 
-from jose import JWTError, jwt
+from jose.exceptions import ExpiredSignatureError
 
-from app.config import settings
-from app.constants import ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+from app.constants import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    JWT_DECODE_CACHE_SIZE,
+    PLAN_TRIAL,
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    UPLOAD_TOKEN_EXPIRE_MINUTES,
+)
+from app.core.jwt_codec import get_codec
+
+# Verified token -> its claims, most recently used last
+_verified: OrderedDict[str, dict[str, str | int]] = OrderedDict()
 
 
 def create_access_token(
     user_id: uuid.UUID,
     phone: str,
     role: str,
+    organization_id: uuid.UUID | None = None,
 ) -> str:
     """Create a short-lived JWT access token.
 
@@ -20,6 +32,7 @@ def create_access_token(
         user_id: The user's UUID.
         phone: The user's phone number.
         role: The user's role (owner / admin / user).
+        organization_id: The user's organization (per-organization rate limits).
 
     Returns:
         Encoded JWT string.
@@ -30,10 +43,13 @@ def create_access_token(
         "phone": phone,
         "role": role,
         "type": "access",
+        "jti": uuid.uuid4().hex,
         "iat": now,
         "exp": now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    if organization_id is not None:
+        payload["org"] = str(organization_id)
+    return get_codec().encode(payload)
 
 
 def create_refresh_token(user_id: uuid.UUID) -> str:
@@ -49,10 +65,51 @@ def create_refresh_token(user_id: uuid.UUID) -> str:
     payload = {
         "sub": str(user_id),
         "type": "refresh",
+        "jti": uuid.uuid4().hex,
         "iat": now,
         "exp": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return get_codec().encode(payload)
+
+
+def create_upload_token(
+    user_id: uuid.UUID,
+    organization_id: uuid.UUID,
+    upload_id: uuid.UUID,
+    size_bytes: int,
+    chunk_size: int,
+    plan: str = PLAN_TRIAL,
+) -> str:
+    """Create a short-lived token that authorizes chunk PUTs of one upload.
+
+    The token carries what the chunk endpoint needs to authorize a chunk, so
+    chunks are accepted without loading the user or the upload from the
+    database. The storage location stays server-side (upload_progress).
+
+    Args:
+        user_id: The uploading user's UUID.
+        organization_id: Owning organization UUID.
+        upload_id: The upload session UUID.
+        size_bytes: File size (with chunk_size, the allowed byte ranges).
+        chunk_size: Negotiated chunk size.
+        plan: Organization plan (selects the upload bandwidth).
+
+    Returns:
+        Encoded JWT string.
+    """
+    now = datetime.now(timezone.utc)
+    payload = {
+        "sub": str(user_id),
+        "org": str(organization_id),
+        "upload_id": str(upload_id),
+        "size": size_bytes,
+        "chunk_size": chunk_size,
+        "plan": plan,
+        "type": "upload",
+        "iat": now,
+        "exp": now + timedelta(minutes=UPLOAD_TOKEN_EXPIRE_MINUTES),
+    }
+    return get_codec().encode(payload)
 
 
 def create_temp_token(phone: str) -> str:
@@ -71,27 +128,35 @@ def create_temp_token(phone: str) -> str:
         "iat": now,
         "exp": now + timedelta(minutes=15),
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return get_codec().encode(payload)
 
 
 def decode_token(token: str) -> dict[str, str | int]:
     """Decode and validate a JWT token.
 
+    Tokens verified before are served from a per-process LRU of
+    JWT_DECODE_CACHE_SIZE entries, re-checking only their expiry, so the
+    same bearer token on every request or chunk is verified once.
+
     Args:
         token: The JWT string to decode.
 
     Returns:
-        Decoded payload as a dictionary.
+        Decoded payload as a dictionary (a copy the caller may modify).
 
     Raises:
         JWTError: If the token is invalid or expired.
     """
-    try:
-        payload: dict[str, str | int] = jwt.decode(
-            token,
-            settings.JWT_SECRET,
-            algorithms=[settings.JWT_ALGORITHM],
-        )
-        return payload
-    except JWTError:
-        raise
+    payload = _verified.get(token)
+    if payload is not None:
+        if int(payload.get("exp", 0)) < time.time():
+            del _verified[token]
+            raise ExpiredSignatureError("Signature has expired.")
+        _verified.move_to_end(token)
+        return dict(payload)
+    payload = get_codec().decode(token)
+    if "exp" in payload:
+        _verified[token] = payload
+        if len(_verified) > JWT_DECODE_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return dict(payload)
@@ -18,13 +18,29 @@ class Settings(BaseSettings):
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    # Shared connection pool (app.core.redis); requests wait up to the pool timeout for a
+    # free connection. The socket timeout must exceed blocking reads (job queue: 5 s).
+    REDIS_MAX_CONNECTIONS: int = 100
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 10.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0
+    REDIS_SOCKET_KEEPALIVE: bool = True
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    REDIS_WARM_CONNECTIONS: int = 10
+    REDIS_PROTOCOL: int = 2  # 3 = RESP3
 
     # JWT
     JWT_SECRET: str = "dev-secret-change-in-production"
     JWT_ALGORITHM: str = "HS256"
+    # "native" (stdlib HMAC, HS* only) or "jose" (python-jose)
+    JWT_BACKEND: str = "native"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 30
 
+    # Rate limiting (app.core.rate_limit); the header is set by nginx, empty = peer address
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CLIENT_IP_HEADER: str = "X-Real-IP"
+
     # OTP
     OTP_LENGTH: int = 6
     OTP_TTL_SECONDS: int = 300
@@ -52,6 +68,30 @@ class Settings(BaseSettings):
     TELEGRAM_BOT_TOKEN: str = ""
     TELEGRAM_ADMIN_CHAT_ID: str = ""
 
+    # Uploads
+    UPLOAD_DIR: str = "/app/uploads"
+    # Reserve disk blocks at init (fallocate) instead of a sparse file
+    UPLOAD_PREALLOCATE: bool = False
+    # Admission control for /uploads/init
+    UPLOAD_MAX_ACTIVE_PER_ORG: int = 3
+    UPLOAD_MAX_ACTIVE_TOTAL: int = 50
+    UPLOAD_DISK_RESERVE_BYTES: int = 20 * 1024 * 1024 * 1024  # keep 20 GB free
+    # Upload bandwidth per organization by plan, bytes/s (0 = unlimited)
+    UPLOAD_RATE_TRIAL: int = 8 * 1024 * 1024
+    UPLOAD_RATE_START: int = 16 * 1024 * 1024
+    UPLOAD_RATE_BUSINESS: int = 32 * 1024 * 1024
+    UPLOAD_RATE_CORPORATION: int = 64 * 1024 * 1024
+    # Upload storage backend: "local" (UPLOAD_DIR) or "s3" (multipart upload)
+    STORAGE_BACKEND: str = "local"
+    S3_ENDPOINT_URL: str = ""
+    S3_REGION: str = "ru-central1"
+    S3_BUCKET: str = "1c24pro-uploads"
+    S3_ACCESS_KEY_ID: str = ""
+    S3_SECRET_ACCESS_KEY: str = ""
+    S3_MAX_CONNECTIONS: int = 50
+    # Processes compressing stored uploads in the processing worker (0 = all CPUs)
+    COMPRESSION_WORKERS: int = 0
+
     # Admin
     ADMIN_PHONE: str = "+79278440306"
 
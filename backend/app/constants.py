@@ -9,10 +9,67 @@ OTP_MAX_ATTEMPTS = 5
 # JWT
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 REFRESH_TOKEN_EXPIRE_DAYS = 30
+UPLOAD_TOKEN_EXPIRE_MINUTES = 60  # upload-scoped chunk token, renewed via /status
+JWT_DECODE_CACHE_SIZE = 10000  # verified tokens remembered per process (app.auth.decode_token)
+
+# Token revocation (app.services.token_revocation)
+TOKEN_REVOCATION_BLOOM_CAPACITY = 100000  # revocations per worker filter before it grows
+TOKEN_REVOCATION_BLOOM_ERROR_RATE = 0.001  # share of valid tokens that still hit Redis
+TOKEN_REVOCATION_REBUILD_SECONDS = 300  # reload the filter, dropping expired revocations
+
+# Authenticated user cache (app.services.user_cache)
+USER_CACHE_LOCAL_SIZE = 2048  # users kept in each worker's LRU
+USER_CACHE_LOCAL_TTL_SECONDS = 30  # bounds staleness if an invalidation message is lost
+USER_CACHE_TTL_SECONDS = 600  # lifetime of the Redis snapshot
+USER_CACHE_GUARD_SECONDS = 10  # no re-caching right after an invalidation (in-flight reads)
 
 # Upload
 MAX_UPLOAD_SIZE_BYTES = 50 * 1024 * 1024 * 1024  # 50 GB
 CHUNK_SIZE_BYTES = 5 * 1024 * 1024  # 5 MB
+UPLOAD_BITMAP_TTL_SECONDS = 7 * 86400  # received-chunk bitmap lives for 7 days
+UPLOAD_PROGRESS_SYNC_CHUNKS = 100  # copy chunks_received to DB every N chunks
+UPLOAD_WRITE_BUFFER_BYTES = 1024 * 1024  # coalesce body pieces into 1 MB pwrite calls
+UPLOAD_PARALLEL_CHUNKS = 4  # chunks a client may send concurrently
+UPLOAD_MAX_CHUNK_BYTES = 100 * 1024 * 1024  # stays below nginx client_max_body_size 110m
+UPLOAD_MAX_CHUNKS = 10000  # S3 multipart part limit
+UPLOAD_TARGET_CHUNKS = 500  # aim for this many chunks when throughput is unknown
+UPLOAD_TARGET_CHUNK_SECONDS = 30  # aim for chunks that take this long to send
+UPLOAD_CHUNK_ALIGN_BYTES = 1024 * 1024  # negotiated chunk sizes are whole MB
+UPLOAD_THROUGHPUT_DECAY = 0.5  # weight of older uploads in the throughput average
+UPLOAD_BANDWIDTH_BURST_SECONDS = 2  # bandwidth bucket holds this many seconds of the rate
+UPLOAD_ADMISSION_IDLE_SECONDS = 24 * 3600  # release a slot after 24 h without chunks
+UPLOAD_ADMISSION_RETRY_SECONDS = 60  # Retry-After when /uploads/init is refused
+UPLOAD_STALE_SECONDS = 7 * 86400  # unfinished uploads older than this are collected
+UPLOAD_GC_INTERVAL_SECONDS = 3600  # pause between garbage collector sweeps
+UPLOAD_GC_BATCH_SIZE = 50  # uploads claimed per transaction
+UPLOAD_GC_RESUME_SECONDS = 86400  # journaled deletions older than this were abandoned
+UPLOAD_GC_TRUNCATE_STEP_BYTES = 256 * 1024 * 1024  # shrink files 256 MB at a time
+UPLOAD_GC_THROTTLE_SECONDS = 0.05  # pause between truncate steps
+
+# Post-upload processing (app.workers.processing), stages in order
+PROCESSING_STAGE_VERIFY = "verify"
+PROCESSING_STAGE_RESTORE = "restore"
+PROCESSING_STAGE_SIZE = "size"
+PROCESSING_STAGE_COMPRESS = "compress"
+PROCESSING_MAX_ATTEMPTS = 5  # then the job goes to jobs:dead and the upload to "error"
+PROCESSING_RETRY_BASE_SECONDS = 30  # retry delay, doubled after every failed attempt
+PROCESSING_VISIBILITY_SECONDS = 300  # unacknowledged jobs idle this long are reclaimed
+PROCESSING_VERIFY_CONCURRENCY = 2  # verify reads the whole file
+PROCESSING_RESTORE_CONCURRENCY = 1
+PROCESSING_COMPRESS_CONCURRENCY = 1  # one file at a time, its frames use the whole pool
+PROCESSING_DEFAULT_CONCURRENCY = 4  # jobs per stage and worker process
+PROCESSING_POLL_SECONDS = 5  # XREADGROUP block time and delayed-job promotion interval
+PROCESSING_COMPRESS_WAIT_SECONDS = 3600  # recheck interval while the Database awaits restore
+PROCESSING_REQUEUE_SECONDS = 300  # "uploaded" this long without a verify job: queue it again
+PROCESSING_REQUEUE_INTERVAL_SECONDS = 60  # pause between sweeps for such uploads
+
+# Compression of stored uploads (app.services.compression)
+UPLOAD_COMPRESSION_NONE = "none"
+UPLOAD_COMPRESSION_ZSTD = "zstd"  # zstd seekable format
+COMPRESSION_LEVEL = 3
+COMPRESSION_FRAME_BYTES = 4 * 1024 * 1024  # independently decompressible frames
+COMPRESSION_SAMPLE_BYTES = 16 * 1024 * 1024  # compressibility is judged on the first 16 MB
+COMPRESSION_MIN_RATIO = 1.5  # compress only if the sample shrinks at least this much
 
 # Trial
 TRIAL_DAYS = 30
@@ -20,6 +77,7 @@ READONLY_DAYS = 7
 STORAGE_DAYS = 30
 
 # Plans
+PLAN_TRIAL = "trial"  # organizations without a paid subscription
 PLAN_START = "start"
 PLAN_BUSINESS = "business"
 PLAN_CORPORATION = "corporation"
@@ -51,7 +109,9 @@ UPLOAD_STATUS_PENDING = "pending"
 UPLOAD_STATUS_UPLOADING = "uploading"
 UPLOAD_STATUS_UPLOADED = "uploaded"
 UPLOAD_STATUS_PROCESSING = "processing"
+UPLOAD_STATUS_PROCESSED = "processed"  # every processing stage finished
 UPLOAD_STATUS_ERROR = "error"
+UPLOAD_STATUS_EXPIRED = "expired"  # files removed by the garbage collector
 
 # Config codes
 CONFIG_CODES = {
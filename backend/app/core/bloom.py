@@ -0,0 +1,30 @@
+"""In-memory Bloom filter for fast negative membership checks."""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Set of strings with no false negatives and a bounded false-positive rate."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        """Size the filter for `capacity` items at the given false-positive rate."""
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        """Bit positions of an item (double hashing over one 128-bit digest)."""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        """Add an item."""
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        """Whether the item may have been added (False is always exact)."""
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
@@ -0,0 +1,159 @@
+"""JWT encoding and verification backends.
+
+auth.py signs and verifies every token through get_codec(). JWT_BACKEND
+selects the implementation:
+
+- "native": HMAC (HS256/HS384/HS512) with the standard library only. It
+  produces the same compact tokens as python-jose and validates the same
+  claims (exp, nbf, aud), at a fraction of the cost of jose's generic
+  JWS machinery; other algorithms fall back to jose.
+- "jose": python-jose for everything.
+
+Both raise jose's JWTError subclasses, so callers need not care which one
+is active.
+"""
+
+import base64
+import binascii
+import calendar
+import hashlib
+import hmac
+import json
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any
+
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
+
+from app.config import settings
+
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+_TIME_CLAIMS = ("exp", "iat", "nbf")
+
+
+class JwtCodec(ABC):
+    """Signs and verifies compact JWTs with one key and algorithm."""
+
+    @abstractmethod
+    def encode(self, claims: dict[str, Any]) -> str:
+        """Sign claims; datetime values of exp/iat/nbf become epoch seconds."""
+
+    @abstractmethod
+    def decode(self, token: str) -> dict[str, Any]:
+        """Verify a token and return its claims.
+
+        Raises:
+            JWTError: If the token is malformed, forged or expired.
+        """
+
+
+class JoseCodec(JwtCodec):
+    """python-jose, for any algorithm it supports."""
+
+    def __init__(self, secret: str, algorithm: str) -> None:
+        """Use `secret` with `algorithm`."""
+        self._secret = secret
+        self._algorithm = algorithm
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        """Sign claims with jose."""
+        return jwt.encode(claims, self._secret, algorithm=self._algorithm)
+
+    def decode(self, token: str) -> dict[str, Any]:
+        """Verify a token with jose."""
+        return jwt.decode(token, self._secret, algorithms=[self._algorithm])
+
+
+def _b64encode(data: bytes) -> bytes:
+    """Base64url without padding."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    """Decode base64url with or without padding."""
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+class HmacCodec(JwtCodec):
+    """HS256/HS384/HS512 JWTs with hmac and json from the standard library."""
+
+    def __init__(self, secret: str, algorithm: str) -> None:
+        """Use `secret` with an HMAC `algorithm`."""
+        self._key = secret.encode()
+        self._algorithm = algorithm
+        self._digest = _HMAC_DIGESTS[algorithm]
+        header = {"alg": algorithm, "typ": "JWT"}
+        self._header = _b64encode(json.dumps(header, separators=(",", ":")).encode())
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        """Return the raw HMAC of header.payload."""
+        return hmac.new(self._key, signing_input, self._digest).digest()
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        """Sign claims."""
+        claims = dict(claims)
+        for name in _TIME_CLAIMS:
+            if isinstance(claims.get(name), datetime):
+                claims[name] = calendar.timegm(claims[name].utctimetuple())
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        signing_input = self._header + b"." + payload
+        return (signing_input + b"." + _b64encode(self._sign(signing_input))).decode()
+
+    def decode(self, token: str) -> dict[str, Any]:
+        """Verify the signature, then the exp, nbf and aud claims."""
+        try:
+            signing_input, signature = token.encode().rsplit(b".", 1)
+            header_segment, payload_segment = signing_input.split(b".")
+            header = json.loads(_b64decode(header_segment))
+            expected = _b64decode(signature)
+        except (ValueError, binascii.Error, UnicodeError) as exc:
+            raise JWTError("Invalid token") from exc
+        if not isinstance(header, dict) or header.get("alg") != self._algorithm:
+            raise JWTError("The specified alg value is not allowed")
+        if not hmac.compare_digest(self._sign(signing_input), expected):
+            raise JWTError("Signature verification failed.")
+        try:
+            claims = json.loads(_b64decode(payload_segment))
+        except (ValueError, binascii.Error) as exc:
+            raise JWTError("Invalid payload string") from exc
+        if not isinstance(claims, dict):
+            raise JWTError("Invalid payload string: must be a json object")
+        self._validate(claims)
+        return claims
+
+    @staticmethod
+    def _validate(claims: dict[str, Any]) -> None:
+        """Apply the claim checks jose makes by default (no leeway)."""
+        now = time.time()
+        for name in _TIME_CLAIMS:
+            if name in claims and not isinstance(claims[name], int | float):
+                raise JWTClaimsError(f"{name} claim must be a number.")
+        if "exp" in claims and claims["exp"] < now:
+            raise ExpiredSignatureError("Signature has expired.")
+        if "nbf" in claims and claims["nbf"] > now:
+            raise JWTClaimsError("The token is not yet valid (nbf)")
+        if "aud" in claims:
+            raise JWTClaimsError("Invalid audience")
+        for name in ("sub", "jti"):
+            if name in claims and not isinstance(claims[name], str):
+                raise JWTClaimsError(f"{name} claim must be a string.")
+
+
+def make_codec(backend: str, secret: str, algorithm: str) -> JwtCodec:
+    """Build a codec; the native one only handles HMAC algorithms."""
+    if backend == "native" and algorithm in _HMAC_DIGESTS:
+        return HmacCodec(secret, algorithm)
+    return JoseCodec(secret, algorithm)
+
+
+_codec: JwtCodec | None = None
+
+
+def get_codec() -> JwtCodec:
+    """Return the configured codec (lazy singleton)."""
+    global _codec  # noqa: PLW0603
+    if _codec is None:
+        _codec = make_codec(settings.JWT_BACKEND, settings.JWT_SECRET, settings.JWT_ALGORITHM)
+    return _codec
@@ -0,0 +1,159 @@
+"""Per-worker Redis pub/sub broker and Server-Sent Events helpers.
+
+Every gunicorn worker holds one Redis pub/sub connection, started in the
+app lifespan. Local listeners (SSE connections) register an asyncio.Queue
+for a channel; the worker subscribes to the channel in Redis while at
+least one local listener needs it. Anything published with publish() from
+any worker or process therefore reaches every subscriber, whichever
+worker serves it.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from fastapi import Request
+from redis.asyncio.client import PubSub
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Events kept per listener; a slow client loses the oldest ones first
+LISTENER_QUEUE_SIZE = 100
+# Idle time after which an SSE comment is sent to keep proxies from closing
+SSE_HEARTBEAT_SECONDS = 15
+_POLL_SECONDS = 1.0
+
+# Response headers of an SSE stream; X-Accel-Buffering stops nginx buffering
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+class Broker:
+    """Fans Redis pub/sub messages out to in-process listeners."""
+
+    def __init__(self) -> None:
+        """Create a stopped broker."""
+        self._pubsub: PubSub | None = None
+        self._reader: asyncio.Task[None] | None = None
+        self._listeners: dict[str, set[asyncio.Queue[dict[str, Any]]]] = {}
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        """Open the pub/sub connection and start dispatching."""
+        r = await get_redis()
+        self._pubsub = r.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.connect()
+        self._reader = asyncio.create_task(self._read(), name="pubsub-broker")
+
+    async def stop(self) -> None:
+        """Stop dispatching and close the connection."""
+        if self._reader is not None:
+            self._reader.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reader
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+    async def _read(self) -> None:
+        """Deliver every message to the queues of its channel."""
+        assert self._pubsub is not None
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=_POLL_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Pub/sub read failed, retrying")
+                await asyncio.sleep(_POLL_SECONDS)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            try:
+                data = json.loads(message["data"])
+            except ValueError:
+                logger.warning("Dropping non-JSON message on %s", message["channel"])
+                continue
+            for queue in self._listeners.get(message["channel"], ()):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(data)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue[dict[str, Any]]]:
+        """Receive the messages of a channel while the context is open."""
+        if self._pubsub is None:
+            raise RuntimeError("Broker is not started")
+        queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=LISTENER_QUEUE_SIZE)
+        async with self._lock:
+            if channel not in self._listeners:
+                self._listeners[channel] = set()
+                await self._pubsub.subscribe(channel)
+            self._listeners[channel].add(queue)
+        try:
+            yield queue
+        finally:
+            async with self._lock:
+                listeners = self._listeners.get(channel, set())
+                listeners.discard(queue)
+                if not listeners:
+                    self._listeners.pop(channel, None)
+                    if self._pubsub is not None:
+                        await self._pubsub.unsubscribe(channel)
+
+
+broker = Broker()
+
+
+async def publish(*channels: str, data: dict[str, Any]) -> None:
+    """Publish one JSON message to several channels in one round trip."""
+    r = await get_redis()
+    payload = json.dumps(data, default=str)
+    pipe = r.pipeline(transaction=False)
+    for channel in channels:
+        pipe.publish(channel, payload)
+    await pipe.execute()
+
+
+def format_sse(data: dict[str, Any]) -> str:
+    """Encode one Server-Sent Event."""
+    return f"data: {json.dumps(data, default=str)}\n\n"
+
+
+async def sse_stream(
+    request: Request,
+    channel: str,
+    snapshot: Callable[[], Awaitable[dict[str, Any] | None]] | None = None,
+    is_final: Callable[[dict[str, Any]], bool] = lambda _: False,
+) -> AsyncIterator[str]:
+    """Stream a channel as SSE, starting with the current state.
+
+    The subscription is opened before the snapshot is taken, so no event
+    between the two is lost.
+
+    Args:
+        request: The incoming request (to notice disconnects).
+        channel: Pub/sub channel to follow.
+        snapshot: Coroutine function returning the initial event, if any.
+        is_final: Ends the stream after an event it returns True for.
+    """
+    async with broker.subscribe(channel) as queue:
+        first = await snapshot() if snapshot is not None else None
+        if first is not None:
+            yield format_sse(first)
+            if is_final(first):
+                return
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+            except TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield format_sse(event)
+            if is_final(event):
+                return
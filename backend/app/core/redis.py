@@ -0,0 +1,152 @@
+"""Shared Redis connection pool with per-command latency metrics.
+
+Every Redis user in the process (OTP, caches, pub/sub broker, job queue,
+rate limiter...) shares one blocking connection pool. The app lifespan
+opens and warms it (open_redis) and closes it on shutdown (close_redis);
+workers and scripts get it lazily from get_redis().
+
+Pool size, socket timeouts and keepalive, health checks and the protocol
+(REDIS_PROTOCOL=3 for RESP3) come from the REDIS_* settings.
+
+Every command and pipeline is timed; metrics() returns this process's
+per-command counts and latency histogram.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+import redis.asyncio as aioredis
+from redis.asyncio.client import Pipeline
+
+from app.config import settings
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+@dataclass
+class CommandStats:
+    """Latency of one command in this process."""
+
+    count: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    # One counter per LATENCY_BUCKETS_MS bound, plus one for slower calls
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+
+    def observe(self, seconds: float, failed: bool) -> None:
+        """Record one call."""
+        self.count += 1
+        self.errors += failed
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        ms = seconds * 1000
+        index = next((i for i, b in enumerate(LATENCY_BUCKETS_MS) if ms <= b), -1)
+        self.buckets[index] += 1
+
+
+_stats: defaultdict[str, CommandStats] = defaultdict(CommandStats)
+
+
+def _observe(command: str, start: float, failed: bool) -> None:
+    """Record a call that started at `start` (perf_counter)."""
+    _stats[command].observe(time.perf_counter() - start, failed)
+
+
+class InstrumentedPipeline(Pipeline):
+    """Pipeline whose execute() is timed as PIPELINE or MULTI."""
+
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        """Send the queued commands and time the round trip."""
+        start, failed = time.perf_counter(), True
+        try:
+            result = await super().execute(raise_on_error)
+            failed = False
+            return result
+        finally:
+            _observe("MULTI" if self.is_transaction else "PIPELINE", start, failed)
+
+
+class InstrumentedRedis(aioredis.Redis):
+    """Redis client that times every command."""
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        """Run a command and record its latency under its name."""
+        start, failed = time.perf_counter(), True
+        try:
+            result = await super().execute_command(*args, **options)
+            failed = False
+            return result
+        finally:
+            _observe(str(args[0]).upper(), start, failed)
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> Pipeline:
+        """Return a timed pipeline."""
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+_redis: InstrumentedRedis | None = None
+
+
+async def get_redis() -> aioredis.Redis:
+    """Return the shared client (lazy singleton)."""
+    global _redis  # noqa: PLW0603
+    if _redis is None:
+        pool = aioredis.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+            socket_keepalive=settings.REDIS_SOCKET_KEEPALIVE,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+            protocol=settings.REDIS_PROTOCOL,
+            decode_responses=True,
+        )
+        _redis = InstrumentedRedis.from_pool(pool)  # closing the client closes the pool
+    return _redis
+
+
+async def open_redis(warm_connections: int | None = None) -> None:
+    """Create the pool and open `warm_connections` connections (app startup)."""
+    r = await get_redis()
+    count = settings.REDIS_WARM_CONNECTIONS if warm_connections is None else warm_connections
+    # Concurrent PINGs each take their own connection, which then stays pooled
+    await asyncio.gather(*(r.ping() for _ in range(max(1, count))))
+
+
+async def close_redis() -> None:
+    """Close the pool on shutdown."""
+    global _redis  # noqa: PLW0603
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+def metrics() -> dict[str, Any]:
+    """Per-command latency of this process and the state of its pool."""
+    pool = _redis.connection_pool if _redis is not None else None
+    return {
+        "buckets_ms": list(LATENCY_BUCKETS_MS),
+        "pool": {
+            "max_connections": settings.REDIS_MAX_CONNECTIONS,
+            "in_use": len(pool._in_use_connections) if pool else 0,
+            "idle": len(pool._available_connections) if pool else 0,
+        },
+        "commands": {
+            name: {
+                "count": s.count,
+                "errors": s.errors,
+                "mean_ms": s.total_seconds * 1000 / s.count if s.count else 0.0,
+                "max_ms": s.max_seconds * 1000,
+                "buckets": s.buckets,
+            }
+            for name, s in sorted(_stats.items())
+        },
+    }
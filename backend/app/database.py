@@ -5,6 +5,7 @@ from collections.abc import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import settings
+from app.services import user_cache  # noqa: F401  (registers its Session listeners)
 
 engine = create_async_engine(
     settings.DATABASE_URL,
@@ -3,7 +3,7 @@
 import uuid
 from collections.abc import AsyncGenerator
 
-from fastapi import Depends, Header
+from fastapi import Depends, Header, Query
 from jose import JWTError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,10 +12,16 @@ from app.auth import decode_token
 from app.database import async_session_factory
 from app.exceptions import ForbiddenError, UnauthorizedError
 from app.models import User
+from app.services import token_revocation, user_cache
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Yield a database session with automatic commit / rollback."""
+    """Yield a database session with automatic commit / rollback.
+
+    Users changed in the session are dropped from the user cache once the
+    commit has succeeded (user_cache's after_commit listener); the response
+    waits for it.
+    """
     async with async_session_factory() as session:
         try:
             yield session
@@ -23,6 +29,7 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         except Exception:
             await session.rollback()
             raise
+        await user_cache.wait_invalidated(session)
 
 
 async def get_current_user(
@@ -39,7 +46,7 @@ async def get_current_user(
         The authenticated User object.
 
     Raises:
-        UnauthorizedError: If the token is missing, invalid, or the user is not found.
+        UnauthorizedError: If the token is missing, invalid, revoked, or the user is not found.
         ForbiddenError: If the user account is disabled.
     """
     if not authorization.startswith("Bearer "):
@@ -55,6 +62,9 @@ async def get_current_user(
     if token_type != "access":
         raise UnauthorizedError("Invalid token type")
 
+    if await token_revocation.is_revoked(payload):
+        raise UnauthorizedError("Token has been revoked")
+
     user_id_str = payload.get("sub")
     if not user_id_str:
         raise UnauthorizedError("Invalid token payload")
@@ -64,10 +74,15 @@ async def get_current_user(
     except ValueError:
         raise UnauthorizedError("Invalid user ID in token")
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if user is None:
-        raise UnauthorizedError("User not found")
+    cached = await user_cache.get(user_id)
+    if cached is not None:
+        user = await db.merge(cached, load=False)
+    else:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise UnauthorizedError("User not found")
+        await user_cache.put(user)
 
     if user.is_deleted:
         raise UnauthorizedError("Аккаунт удалён")
@@ -114,3 +129,39 @@ async def require_admin(
     if current_user.role != "admin":
         raise ForbiddenError("Admin access required")
     return current_user
+
+
+async def get_stream_user(
+    access_token: str | None = Query(None),
+    authorization: str | None = Header(None, alias="Authorization"),
+) -> User:
+    """Authenticate a long-lived event stream.
+
+    EventSource cannot set headers, so the access token may come in the
+    access_token query parameter. The user is loaded in a session of its
+    own that is closed before streaming starts, instead of holding a pooled
+    connection for the lifetime of the stream.
+
+    Raises:
+        UnauthorizedError: If no valid token is given.
+        ForbiddenError: If the user account is disabled.
+    """
+    if access_token:
+        authorization = f"Bearer {access_token}"
+    if authorization is None:
+        raise UnauthorizedError("Missing access token")
+    async with async_session_factory() as db:
+        return await get_current_user(authorization, db)
+
+
+async def require_stream_admin(
+    current_user: User = Depends(get_stream_user),
+) -> User:
+    """Ensure the user of an event stream has the 'admin' role.
+
+    Raises:
+        ForbiddenError: If the user is not an admin.
+    """
+    if current_user.role != "admin":
+        raise ForbiddenError("Admin access required")
+    return current_user
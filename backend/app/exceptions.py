@@ -38,9 +38,16 @@ class UnauthorizedError(HTTPException):
 class RateLimitError(HTTPException):
     """Too many requests (429)."""
 
-    def __init__(self, detail: str = "Too many requests, please try again later") -> None:
-        """Initialize with a detail message."""
-        super().__init__(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=detail)
+    def __init__(
+        self,
+        detail: str = "Too many requests, please try again later",
+        retry_after: int | None = None,
+    ) -> None:
+        """Initialize with a detail message and an optional Retry-After (seconds)."""
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=detail, headers=headers
+        )
 
 
 class ValidationError(HTTPException):
@@ -9,7 +9,11 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.core.http_client import close_http_client
+from app.core.pubsub import broker
+from app.core.rate_limit import Limit, RateLimitMiddleware, RouteLimit
+from app.core.redis import close_redis, open_redis
 from app.routes import admin, auth, dashboard, health, inn, org, payments, subscription, upload
+from app.services import otp, token_revocation, user_cache
 
 _start_time: float = 0.0
 
@@ -19,8 +23,17 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan: startup and shutdown events."""
     global _start_time  # noqa: PLW0603
     _start_time = time.time()
+    await open_redis()
+    await otp.load_scripts()
+    await broker.start()
+    user_cache.start()
+    token_revocation.start()
     yield
+    await token_revocation.stop()
+    await user_cache.stop()
+    await broker.stop()
     await close_http_client()
+    await close_redis()
 
 
 def get_uptime() -> float:
@@ -39,6 +52,36 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Rate limits: the first rule matching method and path applies; all its limits must allow
+_api = settings.API_V1_PREFIX
+RATE_LIMITS = [
+    RouteLimit("POST", f"{_api}/inn/lookup", (Limit("ip", 10, 60, burst=5),)),  # paid DaData
+    RouteLimit("POST", f"{_api}/auth/send-code", (Limit("ip", 10, 60, burst=3),)),
+    RouteLimit("POST", f"{_api}/auth/verify-code", (Limit("ip", 30, 60, burst=10),)),
+    RouteLimit("POST", f"{_api}/auth/refresh", (Limit("ip", 30, 60, burst=10),)),
+    RouteLimit("POST", f"{_api}/payments/webhook", (Limit("ip", 120, 60, burst=30),)),
+    RouteLimit(
+        "POST",
+        f"{_api}/uploads/init",
+        (Limit("user", 10, 60, burst=3), Limit("org", 30, 3600, burst=10)),
+    ),
+    RouteLimit(
+        "PUT",
+        f"{_api}/uploads/{{upload_id}}/chunk/{{chunk_number}}",
+        (Limit("org", 1200, 60, burst=64),),
+    ),
+    RouteLimit("GET", f"{_api}/uploads/{{upload_id}}/status", (Limit("user", 120, 60, burst=20),)),
+    RouteLimit("POST", f"{_api}/uploads/{{upload_id}}/complete", (Limit("user", 30, 60, burst=5),)),
+]
+
+# Added before CORS so that CORS wraps it and 429 responses carry CORS headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        rules=RATE_LIMITS,
+        client_ip_header=settings.RATE_LIMIT_CLIENT_IP_HEADER,
+    )
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
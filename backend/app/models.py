@@ -252,6 +252,11 @@ class Upload(Base):
     chunks_received: Mapped[int] = mapped_column(Integer, default=0)
     status: Mapped[str] = mapped_column(String(20), default="pending")
     storage_path: Mapped[str] = mapped_column(String(500))
+    # SHA-256 over the per-chunk SHA-256 digests (composite, see upload_progress)
+    checksum_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Physical size of the stored file (size_bytes is the logical size)
+    stored_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    compression: Mapped[str] = mapped_column(String(10), default="none", server_default="none")
     db_name: Mapped[str | None] = mapped_column(String(60), unique=True, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
@@ -265,6 +270,9 @@ class Upload(Base):
     user: Mapped["User"] = relationship(back_populates="uploads")
     database: Mapped["Database | None"] = relationship(back_populates="upload", uselist=False)
 
+    # Garbage collector: stale / expired uploads by status and age
+    __table_args__ = (Index("ix_uploads_status_created", "status", "created_at"),)
+
 
 class Database(Base):
     """1C database instance for a client organization."""
@@ -2,10 +2,14 @@
 
 import uuid
 from datetime import datetime, timezone
+from typing import Any
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 
-from app.dependencies import require_admin
+from app.core import redis
+from app.core.pubsub import SSE_HEADERS, sse_stream
+from app.dependencies import require_admin, require_stream_admin
 from app.models import User
 from app.schemas import (
     AdminCreateDatabaseRequest,
@@ -16,6 +20,7 @@ from app.schemas import (
     DatabaseResponse,
     MessageResponse,
 )
+from app.services import upload_events
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -36,6 +41,31 @@ async def get_uploads(
     return []
 
 
+@router.get("/uploads/events")
+async def stream_upload_events(
+    request: Request,
+    current_user: User = Depends(require_stream_admin),
+) -> StreamingResponse:
+    """Stream progress events of all uploads as Server-Sent Events.
+
+    Keeps the upload queue current without polling: one event per received
+    chunk and per status change of any upload, from any worker. Pass the
+    access token as ?access_token= when using EventSource.
+
+    Args:
+        request: The incoming request (to notice disconnects).
+        current_user: The authenticated admin.
+
+    Returns:
+        A text/event-stream response with one JSON object per event.
+    """
+    return StreamingResponse(
+        sse_stream(request, upload_events.ADMIN_CHANNEL),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @router.patch("/uploads/{upload_id}", response_model=MessageResponse)
 async def update_upload(
     upload_id: uuid.UUID,
@@ -56,6 +86,22 @@ async def update_upload(
     return MessageResponse(message="Upload status updated")
 
 
+@router.get("/redis/metrics")
+async def get_redis_metrics(
+    current_user: User = Depends(require_admin),
+) -> dict[str, Any]:
+    """Redis pool state and per-command latency of the worker serving the request.
+
+    Args:
+        current_user: The authenticated admin.
+
+    Returns:
+        Pool usage and, per command, count, errors, mean / max latency and
+        histogram counts per buckets_ms bound.
+    """
+    return redis.metrics()
+
+
 @router.get("/users", response_model=list[AdminUserResponse])
 async def get_users(
     current_user: User = Depends(require_admin),
@@ -1,5 +1,6 @@
 """Authentication routes: passwordless phone + OTP flow."""
 
+import asyncio
 import logging
 import re
 import secrets
@@ -20,7 +21,6 @@ from app.dependencies import get_current_user, get_db
 from app.exceptions import (
     ConflictError,
     NotFoundError,
-    RateLimitError,
     UnauthorizedError,
     ValidationError,
 )
@@ -28,6 +28,7 @@ from app.models import Organization, User
 from app.schemas import (
     CompleteRegistrationRequest,
     CompleteRegistrationResponse,
+    LogoutRequest,
     MessageResponse,
     OTPVerifyRequest,
     OTPVerifyResponse,
@@ -38,7 +39,7 @@ from app.schemas import (
     UserStatusResponse,
 )
 from app.config import settings
-from app.services import dadata, otp, sms
+from app.services import dadata, otp, sms, token_revocation
 
 logger = logging.getLogger(__name__)
 
@@ -95,29 +96,23 @@ async def send_code(
     """Send an OTP code to the given phone number via SMS."""
     phone = body.phone
 
-    # Check cooldown (60 sec between sends)
-    if await otp.check_cooldown(phone):
-        raise RateLimitError("Подождите 60 секунд перед повторной отправкой")
-
-    # Check daily SMS limit (max 10 per day per phone)
-    if await otp.check_daily_limit(phone, max_daily=10):
-        raise RateLimitError("Превышен лимит SMS на сегодня. Попробуйте завтра.")
-
-    # Check if user exists (exclude soft-deleted)
-    result = await db.execute(
-        select(User).where(User.phone == phone, User.is_deleted.is_not(True))
+    # Check if user exists (exclude soft-deleted), while the OTP is issued:
+    # the cooldown and daily limit (max 10 per day per phone) are checked and
+    # the code stored in one Redis round trip
+    code = await otp.generate_otp()
+    user_query, issued = await asyncio.gather(
+        db.execute(select(User).where(User.phone == phone, User.is_deleted.is_not(True))),
+        otp.issue_otp(phone, code, max_daily=10),
+        return_exceptions=True,
     )
-    existing_user = result.scalar_one_or_none()
+    # Both are awaited before raising: the session must be idle on rollback
+    if isinstance(issued, BaseException):
+        raise issued
+    if isinstance(user_query, BaseException):
+        raise user_query
+    existing_user = user_query.scalar_one_or_none()
     is_new_user = existing_user is None
 
-    # Generate and store OTP
-    code = await otp.generate_otp()
-    await otp.store_otp(phone, code)
-    await otp.set_cooldown(phone)
-
-    # Increment daily SMS counter
-    await otp.increment_daily_counter(phone)
-
     # Send SMS in background — user doesn't wait for SMS.ru response
     message = f"1C24.PRO — код подтверждения: {code}. Никому не сообщайте."
     background_tasks.add_task(sms.send_sms, phone, message)
@@ -132,13 +127,7 @@ async def verify_code(body: OTPVerifyRequest, db: AsyncSession = Depends(get_db)
     phone = body.phone
     code = body.code
 
-    # Check brute-force attempts BEFORE verification (max 5 per OTP)
-    attempts = await otp.get_attempts_count(phone)
-    if attempts >= settings.OTP_MAX_ATTEMPTS:
-        await otp.delete_otp(phone)
-        raise RateLimitError("Слишком много попыток. Запросите новый код.")
-
-    # Verify OTP against Redis
+    # Verify OTP against Redis; raises 429 once the attempts (max 5 per OTP) are used up
     is_valid = await otp.verify_otp(phone, code)
     if not is_valid:
         return OTPVerifyResponse(verified=False, needs_registration=False)
@@ -151,7 +140,9 @@ async def verify_code(body: OTPVerifyRequest, db: AsyncSession = Depends(get_db)
 
     if existing_user:
         # Existing user — issue tokens
-        access_token = create_access_token(existing_user.id, existing_user.phone, existing_user.role)
+        access_token = create_access_token(
+            existing_user.id, existing_user.phone, existing_user.role, existing_user.organization_id
+        )
         refresh_token = create_refresh_token(existing_user.id)
         existing_user.last_login_at = datetime.now(timezone.utc)
         return OTPVerifyResponse(
@@ -263,7 +254,7 @@ async def complete_registration(
     await db.flush()
 
     # Generate tokens
-    access_token = create_access_token(user.id, user.phone, user.role)
+    access_token = create_access_token(user.id, user.phone, user.role, user.organization_id)
     refresh_token = create_refresh_token(user.id)
 
     logger.info("New registration: %s, org=%s", phone, org.name_short)
@@ -381,19 +372,41 @@ async def refresh(body: RefreshTokenRequest, db: AsyncSession = Depends(get_db))
     except ValueError:
         raise UnauthorizedError("Invalid token payload")
 
+    if await token_revocation.is_revoked(payload):
+        raise UnauthorizedError("Token has been revoked")
+
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if not user or user.is_deleted:
         raise UnauthorizedError("User not found")
+    if user.status == "disabled":
+        raise UnauthorizedError("User account is disabled")
 
-    access_token = create_access_token(user.id, user.phone, user.role)
+    access_token = create_access_token(user.id, user.phone, user.role, user.organization_id)
     new_refresh_token = create_refresh_token(user.id)
     return TokenResponse(access_token=access_token, refresh_token=new_refresh_token)
 
 
 @router.post("/logout", response_model=MessageResponse)
-async def logout() -> MessageResponse:
-    """Invalidate the current session (client-side token removal)."""
+async def logout(
+    body: LogoutRequest | None = None,
+    authorization: str | None = Header(None, alias="Authorization"),
+) -> MessageResponse:
+    """Revoke the session's access token and, if given, its refresh token.
+
+    Invalid or expired tokens are ignored: they grant nothing already.
+    """
+    tokens = []
+    if authorization and authorization.startswith("Bearer "):
+        tokens.append(authorization.removeprefix("Bearer "))
+    if body is not None and body.refresh_token:
+        tokens.append(body.refresh_token)
+    for token in tokens:
+        try:
+            payload = decode_token(token)
+        except JWTError:
+            continue
+        await token_revocation.revoke_token(payload)
     return MessageResponse(message="Successfully logged out")
 
 
@@ -421,6 +434,7 @@ async def delete_account(
         org.inn = f"del_{str(org.id)[:8]}"
         org.slug = f"del_{str(org.id)[:8]}"
 
+    await token_revocation.revoke_user(current_user.id)
     logger.info("Account deleted (soft): user_id=%s", current_user.id)
     return MessageResponse(message="Account deleted")
 
@@ -3,10 +3,14 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.dependencies import get_current_user, get_db
 from app.models import Database, Organization, Upload, User
+from app.routes.org import member_response
+from app.routes.subscription import current_subscription
 from app.schemas import (
+    DashboardBootstrapResponse,
     DatabaseResponse,
     MessageResponse,
     OrganizationResponse,
@@ -18,22 +22,8 @@ from app.schemas import (
 router = APIRouter(tags=["dashboard"])
 
 
-@router.get("/me", response_model=UserProfileResponse)
-async def get_me(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-) -> UserProfileResponse:
-    """Get the current user's profile and organization info from DB.
-
-    Loads the user's organization by organization_id and builds
-    the full profile response with real data.
-    """
-    # Load the organization
-    result = await db.execute(
-        select(Organization).where(Organization.id == current_user.organization_id)
-    )
-    org = result.scalar_one_or_none()
-
+def _profile_response(user: User, org: Organization | None) -> UserProfileResponse:
+    """Build the profile of a user of `org` (None if the organization is missing)."""
     org_response = OrganizationResponse(
         inn=org.inn if org else "",
         kpp=org.kpp if org else None,
@@ -48,9 +38,9 @@ async def get_me(
     )
 
     # Build display_name: "Имя Отчество", fallback to director_name, never phone
-    first = current_user.first_name
-    patr = current_user.patronymic
-    if not first and current_user.is_owner and org and org.director_name:
+    first = user.first_name
+    patr = user.patronymic
+    if not first and user.is_owner and org and org.director_name:
         parts = org.director_name.strip().split()
         first = parts[1] if len(parts) >= 2 else ""
         patr = parts[2] if len(parts) >= 3 else ""
@@ -60,21 +50,70 @@ async def get_me(
         display_name = ""
 
     return UserProfileResponse(
-        id=current_user.id,
-        phone=current_user.phone,
-        email=current_user.email,
-        first_name=current_user.first_name,
-        last_name=current_user.last_name,
-        patronymic=current_user.patronymic,
+        id=user.id,
+        phone=user.phone,
+        email=user.email,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        patronymic=user.patronymic,
         display_name=display_name,
-        role=current_user.role,
-        status=current_user.status,
-        referral_code=current_user.referral_code,
+        role=user.role,
+        status=user.status,
+        referral_code=user.referral_code,
         organization=org_response,
-        trial_started_at=current_user.trial_started_at,
-        trial_ends_at=current_user.trial_ends_at,
-        created_at=current_user.created_at,
+        trial_started_at=user.trial_started_at,
+        trial_ends_at=user.trial_ends_at,
+        created_at=user.created_at,
+    )
+
+
+def _database_response(d: Database) -> DatabaseResponse:
+    """Build the dashboard entry of a database."""
+    return DatabaseResponse(
+        id=d.id,
+        name=d.name,
+        db_name=d.db_name,
+        config_code=d.config_code,
+        config_name=d.config_name,
+        status=d.status,
+        web_url=d.web_url,
+        rdp_url=d.rdp_url,
+        size_gb=d.size_gb,
+        last_backup_at=d.last_backup_at,
+        created_at=d.created_at,
+    )
+
+
+def _upload_response(u: Upload) -> UploadStatusResponse:
+    """Build the dashboard entry of an upload."""
+    return UploadStatusResponse(
+        upload_id=u.id,
+        filename=u.filename,
+        config_code=u.config_code,
+        status=u.status,
+        chunks_expected=u.chunks_expected,
+        chunks_received=u.chunks_received,
+        size_bytes=u.size_bytes,
+        db_name=u.db_name,
+        created_at=u.created_at,
+        completed_at=u.completed_at,
+    )
+
+
+@router.get("/me", response_model=UserProfileResponse)
+async def get_me(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> UserProfileResponse:
+    """Get the current user's profile and organization info from DB.
+
+    Loads the user's organization by organization_id and builds
+    the full profile response with real data.
+    """
+    result = await db.execute(
+        select(Organization).where(Organization.id == current_user.organization_id)
     )
+    return _profile_response(current_user, result.scalar_one_or_none())
 
 
 @router.patch("/me", response_model=MessageResponse)
@@ -111,24 +150,7 @@ async def get_databases(
         .where(Database.organization_id == current_user.organization_id)
         .order_by(Database.created_at.desc())
     )
-    databases = result.scalars().all()
-
-    return [
-        DatabaseResponse(
-            id=d.id,
-            name=d.name,
-            db_name=d.db_name,
-            config_code=d.config_code,
-            config_name=d.config_name,
-            status=d.status,
-            web_url=d.web_url,
-            rdp_url=d.rdp_url,
-            size_gb=d.size_gb,
-            last_backup_at=d.last_backup_at,
-            created_at=d.created_at,
-        )
-        for d in databases
-    ]
+    return [_database_response(d) for d in result.scalars().all()]
 
 
 @router.get("/me/uploads", response_model=list[UploadStatusResponse])
@@ -142,20 +164,47 @@ async def get_uploads(
         .where(Upload.organization_id == current_user.organization_id)
         .order_by(Upload.created_at.desc())
     )
-    uploads = result.scalars().all()
-
-    return [
-        UploadStatusResponse(
-            upload_id=u.id,
-            filename=u.filename,
-            config_code=u.config_code,
-            status=u.status,
-            chunks_expected=u.chunks_expected,
-            chunks_received=u.chunks_received,
-            size_bytes=u.size_bytes,
-            db_name=u.db_name,
-            created_at=u.created_at,
-            completed_at=u.completed_at,
+    return [_upload_response(u) for u in result.scalars().all()]
+
+
+@router.get("/me/bootstrap", response_model=DashboardBootstrapResponse)
+async def get_bootstrap(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> DashboardBootstrapResponse:
+    """Get everything the dashboard shows on load in one request.
+
+    Same data as /me, /me/databases, /me/uploads, /subscription and
+    /org/members, for one token check and user lookup instead of five.
+    The organization is loaded with its members, databases and uploads in
+    one statement (select-in loading), sorted as the separate endpoints
+    sort them.
+    """
+    result = await db.execute(
+        select(Organization)
+        .where(Organization.id == current_user.organization_id)
+        .options(
+            selectinload(Organization.users),
+            selectinload(Organization.databases),
+            selectinload(Organization.uploads),
         )
-        for u in uploads
-    ]
+    )
+    org = result.scalar_one_or_none()
+    users = org.users if org else [current_user]
+    databases = org.databases if org else []
+    uploads = org.uploads if org else []
+
+    return DashboardBootstrapResponse(
+        profile=_profile_response(current_user, org),
+        databases=[
+            _database_response(d)
+            for d in sorted(databases, key=lambda d: d.created_at, reverse=True)
+        ],
+        uploads=[
+            _upload_response(u) for u in sorted(uploads, key=lambda u: u.created_at, reverse=True)
+        ],
+        subscription=current_subscription(current_user.organization_id),
+        members=[
+            member_response(u) for u in sorted(users, key=lambda u: (not u.is_owner, u.created_at))
+        ],
+    )
@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.dependencies import get_current_user, get_db, require_owner
+from app.exceptions import NotFoundError, ValidationError
 from app.models import User
 from app.schemas import (
     InviteRequest,
@@ -19,6 +20,7 @@ from app.schemas import (
     MessageResponse,
     TransferOwnershipRequest,
 )
+from app.services import token_revocation
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +42,23 @@ def _build_display_name(user: User) -> str:
     return ""
 
 
+def member_response(user: User) -> MemberResponse:
+    """Build the member list entry of a user."""
+    return MemberResponse(
+        id=user.id,
+        phone=user.phone,
+        email=user.email,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        patronymic=user.patronymic,
+        display_name=_build_display_name(user),
+        role=user.role,
+        status=user.status,
+        created_at=user.created_at,
+        last_login_at=user.last_login_at,
+    )
+
+
 @router.post("/invite", response_model=InviteResponse)
 async def invite(
     body: InviteRequest,
@@ -160,40 +179,56 @@ async def get_members(
         .where(User.organization_id == current_user.organization_id)
         .order_by(User.is_owner.desc(), User.created_at.asc())
     )
-    users = result.scalars().all()
-    return [
-        MemberResponse(
-            id=u.id,
-            phone=u.phone,
-            email=u.email,
-            first_name=u.first_name,
-            last_name=u.last_name,
-            patronymic=u.patronymic,
-            display_name=_build_display_name(u),
-            role=u.role,
-            status=u.status,
-            created_at=u.created_at,
-            last_login_at=u.last_login_at,
+    return [member_response(u) for u in result.scalars().all()]
+
+
+async def _get_member(db: AsyncSession, member_id: uuid.UUID, owner: User) -> User:
+    """Load a member of the owner's organization other than the owner.
+
+    Raises:
+        NotFoundError: If there is no such member.
+        ValidationError: If the member is the owner.
+    """
+    result = await db.execute(
+        select(User).where(
+            User.id == member_id,
+            User.organization_id == owner.organization_id,
+            User.is_deleted.isnot(True),
         )
-        for u in users
-    ]
+    )
+    member = result.scalar_one_or_none()
+    if member is None:
+        raise NotFoundError("Пользователь не найден")
+    if member.id == owner.id:
+        raise ValidationError("Нельзя изменить доступ владельца")
+    return member
 
 
 @router.post("/members/{member_id}/disable", response_model=MessageResponse)
 async def disable_member(
     member_id: uuid.UUID,
     current_user: User = Depends(require_owner),
+    db: AsyncSession = Depends(get_db),
 ) -> MessageResponse:
     """Disable a member's access to the organization.
 
+    Every token issued to the member so far is revoked at once.
+
     Args:
         member_id: The user UUID to disable.
         current_user: The authenticated owner.
+        db: Database session.
 
     Returns:
         Confirmation message.
     """
-    # TODO: set user status=disabled, invalidate JWT, send SMS
+    member = await _get_member(db, member_id, current_user)
+    member.status = "disabled"
+    member.disabled_at = datetime.now(timezone.utc)
+    member.disabled_by = current_user.id
+    await token_revocation.revoke_user(member.id)
+    logger.info("Member disabled: user_id=%s by=%s", member.id, current_user.id)
+    # TODO: send SMS
     return MessageResponse(message="Member disabled")
 
 
@@ -201,17 +236,25 @@ async def disable_member(
 async def enable_member(
     member_id: uuid.UUID,
     current_user: User = Depends(require_owner),
+    db: AsyncSession = Depends(get_db),
 ) -> MessageResponse:
     """Re-enable a previously disabled member.
 
+    The member signs in again; tokens revoked on disable stay revoked.
+
     Args:
         member_id: The user UUID to enable.
         current_user: The authenticated owner.
+        db: Database session.
 
     Returns:
         Confirmation message.
     """
-    # TODO: set user status=active, send SMS
+    member = await _get_member(db, member_id, current_user)
+    member.status = "active"
+    member.disabled_at = None
+    member.disabled_by = None
+    # TODO: send SMS
     return MessageResponse(message="Member enabled")
 
 
@@ -12,6 +12,21 @@ from app.schemas import MessageResponse, SubscriptionResponse, UpdateSubscriptio
 router = APIRouter(prefix="/subscription", tags=["subscription"])
 
 
+def current_subscription(organization_id: uuid.UUID) -> SubscriptionResponse:
+    """Build the current subscription of an organization."""
+    # TODO: fetch subscription for organization_id
+    now = datetime.now(timezone.utc)
+    return SubscriptionResponse(
+        id=uuid.uuid4(),
+        plan="trial",
+        status="trial",
+        users_limit=3,
+        current_period_start=now,
+        current_period_end=now + timedelta(days=30),
+        auto_renew=True,
+    )
+
+
 @router.get("", response_model=SubscriptionResponse)
 async def get_subscription(
     current_user: User = Depends(get_current_user),
@@ -24,17 +39,7 @@ async def get_subscription(
     Returns:
         Active subscription details.
     """
-    # TODO: fetch subscription for current_user.organization_id
-    now = datetime.now(timezone.utc)
-    return SubscriptionResponse(
-        id=uuid.uuid4(),
-        plan="trial",
-        status="trial",
-        users_limit=3,
-        current_period_start=now,
-        current_period_end=now + timedelta(days=30),
-        auto_renew=True,
-    )
+    return current_subscription(current_user.organization_id)
 
 
 @router.patch("", response_model=MessageResponse)
@@ -1,27 +1,274 @@
 """Chunked file upload routes for .dt / .bak databases."""
 
+import base64
+import hashlib
 import logging
+import math
+import time
 import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, BackgroundTasks, Depends, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, Request
+from fastapi.responses import StreamingResponse
+from jose import JWTError
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth import create_upload_token, decode_token
 from app.config import settings
-from app.dependencies import get_current_user, get_db
-from app.models import User
+from app.constants import (
+    CHUNK_SIZE_BYTES,
+    PLAN_TRIAL,
+    PROCESSING_STAGE_VERIFY,
+    UPLOAD_MAX_CHUNKS,
+    UPLOAD_PARALLEL_CHUNKS,
+    UPLOAD_PROGRESS_SYNC_CHUNKS,
+    UPLOAD_STATUS_ERROR,
+    UPLOAD_STATUS_PENDING,
+    UPLOAD_STATUS_UPLOADED,
+    UPLOAD_STATUS_UPLOADING,
+)
+from app.core.pubsub import SSE_HEADERS, sse_stream
+from app.database import async_session_factory
+from app.dependencies import get_current_user, get_db, get_stream_user
+from app.exceptions import (
+    ConflictError,
+    ForbiddenError,
+    NotFoundError,
+    UnauthorizedError,
+    ValidationError,
+)
+from app.models import Organization, Subscription, Upload, User
 from app.schemas import (
     MessageResponse,
+    UploadCompleteRequest,
     UploadInitRequest,
     UploadInitResponse,
     UploadStatusResponse,
 )
+from app.services import (
+    dedup,
+    file_format,
+    job_queue,
+    storage,
+    token_revocation,
+    upload_admission,
+    upload_bandwidth,
+    upload_events,
+    upload_progress,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/uploads", tags=["uploads"])
 
 
+async def _get_upload(
+    db: AsyncSession, upload_id: uuid.UUID, user: User, for_update: bool = False
+) -> Upload:
+    """Load an upload session belonging to the user's organization.
+
+    Raises:
+        NotFoundError: If the upload does not exist or belongs to another org.
+    """
+    query = select(Upload).where(
+        Upload.id == upload_id,
+        Upload.organization_id == user.organization_id,
+    )
+    if for_update:
+        query = query.with_for_update()
+    result = await db.execute(query)
+    upload = result.scalar_one_or_none()
+    if upload is None:
+        raise NotFoundError("Загрузка не найдена")
+    return upload
+
+
+@dataclass(frozen=True)
+class _ChunkTarget:
+    """What the chunk endpoint needs to know about an upload."""
+
+    organization_id: uuid.UUID
+    size_bytes: int
+    chunk_size: int
+    storage_path: str
+    plan: str
+
+
+async def _org_plan(db: AsyncSession, organization_id: uuid.UUID) -> str:
+    """Return the organization's subscription plan (PLAN_TRIAL without one)."""
+    result = await db.execute(
+        select(Subscription.plan).where(Subscription.organization_id == organization_id)
+    )
+    return result.scalar_one_or_none() or PLAN_TRIAL
+
+
+async def _load_storage_path(upload_id: uuid.UUID) -> str:
+    """Read the storage path of an unfinished upload from its row and re-cache it.
+
+    Raises:
+        ConflictError: If the upload no longer accepts chunks.
+    """
+    async with async_session_factory() as db:
+        storage_path = (
+            await db.execute(
+                select(Upload.storage_path).where(
+                    Upload.id == upload_id,
+                    Upload.status.in_([UPLOAD_STATUS_PENDING, UPLOAD_STATUS_UPLOADING]),
+                )
+            )
+        ).scalar_one_or_none()
+    if storage_path is None:
+        raise ConflictError("Загрузка уже завершена")
+    await upload_progress.set_storage_path(upload_id, storage_path)
+    return storage_path
+
+
+async def _chunk_target(upload_id: uuid.UUID, authorization: str) -> _ChunkTarget:
+    """Authorize a chunk PUT and describe its upload.
+
+    Upload tokens are verified in memory plus one Redis round trip that
+    reads the cached storage path and refuses uploads finished since the
+    token was issued (the revocation check is in memory unless the user's
+    tokens were revoked); the path is read from the upload row if the cache
+    expired. Access tokens fall back to loading the user and the upload row.
+
+    Raises:
+        UnauthorizedError: If the token is missing, invalid, expired or revoked.
+        ForbiddenError: If the upload token belongs to another upload.
+        ConflictError: If the upload no longer accepts chunks.
+    """
+    if not authorization.startswith("Bearer "):
+        raise UnauthorizedError("Invalid authorization header")
+    try:
+        payload = decode_token(authorization.removeprefix("Bearer "))
+    except JWTError as exc:
+        raise UnauthorizedError("Invalid or expired token") from exc
+
+    if payload.get("type") == "upload":
+        if payload.get("upload_id") != str(upload_id):
+            raise ForbiddenError("Токен выдан для другой загрузки")
+        if await token_revocation.is_revoked(payload):
+            raise UnauthorizedError("Token has been revoked")
+        storage_path, closed = await upload_progress.get_storage_path(upload_id)
+        if closed:
+            raise ConflictError("Загрузка уже завершена")
+        if storage_path is None:
+            storage_path = await _load_storage_path(upload_id)
+        return _ChunkTarget(
+            organization_id=uuid.UUID(str(payload["org"])),
+            size_bytes=int(payload["size"]),
+            chunk_size=int(payload["chunk_size"]),
+            storage_path=storage_path,
+            plan=str(payload.get("plan", PLAN_TRIAL)),
+        )
+
+    async with async_session_factory() as db:
+        user = await get_current_user(authorization, db)
+        upload = await _get_upload(db, upload_id, user)
+        plan = await _org_plan(db, upload.organization_id)
+    if upload.status not in (UPLOAD_STATUS_PENDING, UPLOAD_STATUS_UPLOADING):
+        raise ConflictError("Загрузка уже завершена")
+    return _ChunkTarget(
+        organization_id=upload.organization_id,
+        size_bytes=upload.size_bytes,
+        chunk_size=upload.chunk_size,
+        storage_path=upload.storage_path,
+        plan=plan,
+    )
+
+
+async def _update_upload(upload_id: uuid.UUID, **values: object) -> None:
+    """Update an in-progress upload row in its own short transaction.
+
+    Finished rows are left alone, so a late chunk racing /complete cannot
+    move the status back to "uploading".
+    """
+    async with async_session_factory() as db:
+        await db.execute(
+            update(Upload)
+            .where(
+                Upload.id == upload_id,
+                Upload.status.in_([UPLOAD_STATUS_PENDING, UPLOAD_STATUS_UPLOADING]),
+            )
+            .values(**values)
+        )
+        await db.commit()
+
+
+def _target_event(
+    upload_id: uuid.UUID, target: _ChunkTarget, status: str, received: int
+) -> dict[str, object]:
+    """Build a progress event from what the chunk endpoint knows."""
+    return upload_events.make_event(
+        upload_id,
+        target.organization_id,
+        status,
+        received,
+        math.ceil(target.size_bytes / target.chunk_size),
+        target.size_bytes,
+        target.chunk_size,
+    )
+
+
+def _row_event(upload: Upload, received: int) -> dict[str, object]:
+    """Build a progress event from an upload row."""
+    return upload_events.make_event(
+        upload.id,
+        upload.organization_id,
+        upload.status,
+        received,
+        upload.chunks_expected,
+        upload.size_bytes,
+        upload.chunk_size,
+    )
+
+
+async def _make_db_name(db: AsyncSession, organization_id: uuid.UUID, config_code: str) -> str:
+    """Build a unique db_name: {org_slug}_{config_code}_{n}."""
+    result = await db.execute(select(Organization.slug).where(Organization.id == organization_id))
+    slug = result.scalar_one_or_none() or "org"
+    result = await db.execute(
+        select(func.count())
+        .select_from(Upload)
+        .where(Upload.organization_id == organization_id, Upload.config_code == config_code)
+    )
+    return f"{slug}_{config_code}_{result.scalar_one() + 1}"
+
+
+def _check_chunk_digests(
+    md5: "hashlib._Hash | None",
+    sha256: "hashlib._Hash",
+    content_md5: str | None,
+    content_sha256: str | None,
+) -> None:
+    """Compare the digests computed while streaming with the client headers.
+
+    Raises:
+        ValidationError: If a provided checksum does not match.
+    """
+    if md5 is not None and base64.b64encode(md5.digest()).decode() != content_md5:
+        raise ValidationError("Контрольная сумма части не совпадает (Content-MD5)")
+    if content_sha256 is not None and sha256.hexdigest() != content_sha256.strip().lower():
+        raise ValidationError("Контрольная сумма части не совпадает (X-Content-SHA256)")
+
+
+async def _apply_dedup(upload: Upload) -> None:
+    """Copy deduplicated chunks into the upload's data file.
+
+    Raises:
+        ValidationError: If some source chunks are gone; they are unmarked
+            so the client re-sends them (see missing_ranges).
+    """
+    copies = await dedup.get_plan(upload.id)
+    failed = await storage.get_storage().copy_chunks(upload.storage_path, copies, upload.chunk_size)
+    await dedup.clear_plan(upload.id)
+    if failed:
+        await upload_progress.unmark_chunks(upload.id, failed)
+        raise ValidationError(f"Нужно повторно отправить {len(failed)} частей")
+
+
 @router.post("/init", response_model=UploadInitResponse)
 async def init_upload(
     body: UploadInitRequest,
@@ -31,41 +278,125 @@ async def init_upload(
 ) -> UploadInitResponse:
     """Initialize a new chunked upload session.
 
+    Creates the Upload record and preallocates its data file, so chunks can
+    be sent in parallel (up to parallel_chunks at once) and in any order.
+    The chunk size is negotiated from the file size and the organization's
+    recent throughput (see upload_progress.choose_chunk_size); clients must
+    use the chunk_size of the response.
+    If the client sends chunk_hashes, chunks the organization already stores
+    are marked as received and left out of missing_ranges.
     Starts the 30-day trial on the user's first upload.
-    """
-    import math
 
-    chunk_size = 5242880
+    Refused with 429 and Retry-After while the organization or the service
+    is at its concurrent upload cap, or the file does not fit in the free
+    space of the upload volume (see upload_admission).
+    """
+    if body.chunk_hashes is not None:
+        # Announced hashes cover CHUNK_SIZE_BYTES blocks, as does the dedup index
+        chunk_size = CHUNK_SIZE_BYTES
+    else:
+        throughput = await upload_progress.get_throughput(current_user.organization_id)
+        chunk_size = upload_progress.choose_chunk_size(body.size_bytes, throughput)
     chunks_expected = math.ceil(body.size_bytes / chunk_size)
+    if body.chunk_hashes is not None and chunks_expected > UPLOAD_MAX_CHUNKS:
+        # The chunk size is fixed here, so the part count is not capped by choose_chunk_size
+        raise ValidationError(
+            "Файл слишком большой для дедупликации, отправьте его без chunk_hashes"
+        )
+    if body.chunk_hashes is not None and len(body.chunk_hashes) != chunks_expected:
+        raise ValidationError(f"Ожидалось {chunks_expected} хешей частей")
     upload_id = uuid.uuid4()
-    db_name = f"test_{body.config_code}_1"
-
-    # Start trial on first database upload
-    if current_user.trial_started_at is None:
-        now = datetime.now(timezone.utc)
-        current_user.trial_started_at = now
-        current_user.trial_ends_at = now + timedelta(days=30)
-        db.add(current_user)
+    db_name = await _make_db_name(db, current_user.organization_id, body.config_code)
+
+    await upload_admission.admit(current_user.organization_id, upload_id, body.size_bytes)
+    backend = storage.get_storage()
+    storage_path: str | None = None
+    try:
+        try:
+            storage_path = await backend.create(
+                current_user.organization_id, upload_id, body.filename, body.size_bytes
+            )
+        except ValueError as exc:
+            raise ValidationError(str(exc)) from exc
+        if settings.UPLOAD_PREALLOCATE:
+            # Blocks are already allocated, free space accounts for the whole file
+            await upload_admission.touch(current_user.organization_id, upload_id, 0)
+        await upload_progress.set_storage_path(upload_id, storage_path)
+
+        upload = Upload(
+            id=upload_id,
+            organization_id=current_user.organization_id,
+            user_id=current_user.id,
+            config_code=body.config_code,
+            filename=body.filename,
+            size_bytes=body.size_bytes,
+            chunk_size=chunk_size,
+            chunks_expected=chunks_expected,
+            chunks_received=0,
+            status=UPLOAD_STATUS_PENDING,
+            storage_path=storage_path,
+            db_name=db_name,
+        )
+        db.add(upload)
+
+        # Start trial on first database upload
+        if current_user.trial_started_at is None:
+            now = datetime.now(timezone.utc)
+            current_user.trial_started_at = now
+            current_user.trial_ends_at = now + timedelta(days=30)
+            db.add(current_user)
+            logger.info("Trial started for user %s (first database uploaded)", current_user.phone)
         await db.flush()
-        logger.info("Trial started for user %s (first database uploaded)", current_user.phone)
 
-    # Notify admin via SMS (non-blocking)
-    from app.services import sms as sms_service
+        # Notify admin via SMS (non-blocking)
+        from app.services import sms as sms_service
 
-    admin_msg = (
-        f"1C24.PRO: загрузка базы!\n"
-        f"{body.filename}\n"
-        f"Конфиг: {body.config_code}\n"
-        f"Размер: {body.size_bytes // (1024 * 1024)} МБ"
-    )
-    background_tasks.add_task(sms_service.send_sms, settings.ADMIN_PHONE, admin_msg)
+        admin_msg = (
+            f"1C24.PRO: загрузка базы!\n"
+            f"{body.filename}\n"
+            f"Конфиг: {body.config_code}\n"
+            f"Размер: {body.size_bytes // (1024 * 1024)} МБ"
+        )
+        background_tasks.add_task(sms_service.send_sms, settings.ADMIN_PHONE, admin_msg)
 
-    return UploadInitResponse(
-        upload_id=upload_id,
-        chunk_size=chunk_size,
-        chunks_expected=chunks_expected,
-        db_name=db_name,
-    )
+        deduplicated = 0
+        missing_ranges = [(0, chunks_expected - 1)]
+        if body.chunk_hashes:
+            deduplicated = await dedup.plan_upload(
+                current_user.organization_id,
+                upload_id,
+                body.chunk_hashes,
+                chunk_size,
+                body.size_bytes,
+            )
+            if deduplicated:
+                missing_ranges = await upload_progress.get_missing_ranges(
+                    upload_id, chunks_expected
+                )
+
+        return UploadInitResponse(
+            upload_id=upload_id,
+            chunk_size=chunk_size,
+            chunks_expected=chunks_expected,
+            parallel_chunks=UPLOAD_PARALLEL_CHUNKS,
+            chunks_deduplicated=deduplicated,
+            missing_ranges=missing_ranges,
+            upload_token=create_upload_token(
+                current_user.id,
+                current_user.organization_id,
+                upload_id,
+                body.size_bytes,
+                chunk_size,
+                await _org_plan(db, current_user.organization_id),
+            ),
+            db_name=db_name,
+        )
+    except Exception:
+        # The upload never started: give back its slot and reservation
+        await upload_admission.release(current_user.organization_id, upload_id)
+        if storage_path is not None:
+            await backend.delete(storage_path)
+        raise
 
 
 @router.put("/{upload_id}/chunk/{chunk_number}", response_model=MessageResponse)
@@ -73,21 +404,114 @@ async def upload_chunk(
     upload_id: uuid.UUID,
     chunk_number: int,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    authorization: str = Header(..., alias="Authorization"),
+    content_md5: str | None = Header(None, alias="Content-MD5"),
+    content_sha256: str | None = Header(None, alias="X-Content-SHA256"),
 ) -> MessageResponse:
     """Upload a single chunk of a file.
 
+    Authorized with the upload_token from /init or /status, which is
+    checked in memory: no user or upload lookup per chunk (a regular access
+    token still works, at the cost of those lookups).
+
+    The body is streamed straight into the data file at offset
+    chunk_number * chunk_size, so memory usage does not depend on the chunk
+    size and chunks may arrive concurrently and out of order. The chunk is
+    hashed while it streams and checked against the optional Content-MD5
+    (base64) / X-Content-SHA256 (hex) headers. Chunk 0 is sniffed before it
+    is written: a file that is not a .dt / .bak fails the whole session, and
+    the detected format is stored in mime_type. Received chunks are tracked
+    in the Redis bitmap; a DB session is only opened on the first chunk and
+    every UPLOAD_PROGRESS_SYNC_CHUNKS chunks. Every new chunk publishes a
+    progress event (see /events). The body is read no faster than the
+    organization's plan allows (upload_bandwidth), shared by all its chunks.
+
     Args:
         upload_id: The upload session UUID.
         chunk_number: Zero-based chunk index.
         request: The raw request containing binary chunk data.
-        current_user: The authenticated user.
+        authorization: Bearer upload token (or access token).
+        content_md5: Optional base64 MD5 of the chunk.
+        content_sha256: Optional hex SHA-256 of the chunk.
 
     Returns:
         Confirmation that the chunk was received.
     """
-    # TODO: read body bytes, save to storage, update chunks_received
-    _ = await request.body()
+    target = await _chunk_target(upload_id, authorization)
+    chunks_expected = math.ceil(target.size_bytes / target.chunk_size)
+    if not 0 <= chunk_number < chunks_expected:
+        raise ValidationError("Неверный номер части")
+
+    expected_size = min(target.chunk_size, target.size_bytes - chunk_number * target.chunk_size)
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5(usedforsecurity=False) if content_md5 is not None else None
+    sniffer = file_format.HeaderSniffer() if chunk_number == 0 else None
+    stream = upload_bandwidth.throttle(request.stream(), target.organization_id, target.plan)
+    if sniffer is not None:
+        stream = sniffer.wrap(stream)
+    started = time.monotonic()
+    try:
+        written = await storage.get_storage().write_chunk(
+            target.storage_path,
+            chunk_number,
+            target.chunk_size,
+            stream,
+            expected_size,
+            hashers=[sha256] if md5 is None else [sha256, md5],
+        )
+    except file_format.UnsupportedFormatError as exc:
+        # Fail the whole session now, not after the remaining chunks
+        await _update_upload(upload_id, status=UPLOAD_STATUS_ERROR)
+        await upload_progress.clear(upload_id)
+        await upload_admission.release(target.organization_id, upload_id)
+        # Preallocated files take their full size: do not wait for STORAGE_DAYS
+        await storage.get_storage().delete(target.storage_path)
+        await upload_events.emit(_target_event(upload_id, target, UPLOAD_STATUS_ERROR, 0))
+        logger.warning("Upload %s rejected: unrecognized file header", upload_id)
+        raise ValidationError(str(exc)) from exc
+    except storage.ChunkTooLargeError as exc:
+        raise ValidationError("Размер части превышает chunk_size") from exc
+    except FileNotFoundError as exc:
+        # The upload was rejected or collected while this chunk was streaming
+        raise ConflictError("Загрузка уже завершена") from exc
+    except ValueError as exc:
+        raise ValidationError(str(exc)) from exc
+    if written != expected_size:
+        raise ValidationError(f"Ожидалось {expected_size} байт, получено {written}")
+    _check_chunk_digests(md5, sha256, content_md5, content_sha256)
+
+    is_new, received, first = await upload_progress.mark_chunk(
+        upload_id,
+        chunk_number,
+        sha256.hexdigest(),
+        target.organization_id,
+        written,
+        time.monotonic() - started,
+    )
+
+    values: dict[str, object] = {}
+    if first:
+        values["status"] = UPLOAD_STATUS_UPLOADING
+    if sniffer is not None:
+        values["mime_type"] = sniffer.mime_type
+    if is_new and received % UPLOAD_PROGRESS_SYNC_CHUNKS == 0:
+        values["chunks_received"] = received
+    if values:
+        await _update_upload(upload_id, **values)
+        if settings.UPLOAD_PREALLOCATE:
+            # Preallocated at init: no reservation left to shrink
+            await upload_admission.touch(target.organization_id, upload_id)
+        else:
+            # Deduplicated chunks count as received but are copied on completion
+            on_disk = received - await dedup.planned_count(upload_id)
+            await upload_admission.touch(
+                target.organization_id, upload_id, target.size_bytes - on_disk * target.chunk_size
+            )
+    if is_new:
+        await upload_events.emit(
+            _target_event(upload_id, target, UPLOAD_STATUS_UPLOADING, received)
+        )
+
     return MessageResponse(message=f"Chunk {chunk_number} received")
 
 
@@ -95,46 +519,162 @@ async def upload_chunk(
 async def get_status(
     upload_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> UploadStatusResponse:
     """Get the current status of an upload session.
 
     Args:
         upload_id: The upload session UUID.
         current_user: The authenticated user.
+        db: Database session.
 
     Returns:
-        Upload progress and status details.
+        Upload progress and status details, including the chunk ranges
+        still missing so the client can resume only the gaps.
     """
-    # TODO: fetch upload record from DB
-    from datetime import datetime, timezone
+    upload = await _get_upload(db, upload_id, current_user)
+
+    chunks_received = upload.chunks_received
+    missing_ranges: list[tuple[int, int]] = []
+    upload_token = None
+    if upload.status in (UPLOAD_STATUS_PENDING, UPLOAD_STATUS_UPLOADING):
+        chunks_received = await upload_progress.received_count(upload.id)
+        missing_ranges = await upload_progress.get_missing_ranges(upload.id, upload.chunks_expected)
+        upload_token = create_upload_token(
+            current_user.id,
+            upload.organization_id,
+            upload.id,
+            upload.size_bytes,
+            upload.chunk_size,
+            await _org_plan(db, upload.organization_id),
+        )
 
     return UploadStatusResponse(
-        upload_id=upload_id,
-        filename="placeholder.bak",
-        config_code="bp30",
-        status="uploading",
-        chunks_expected=100,
-        chunks_received=0,
-        size_bytes=524288000,
-        db_name="test_bp30_1",
-        created_at=datetime.now(timezone.utc),
-        completed_at=None,
+        upload_id=upload.id,
+        filename=upload.filename,
+        config_code=upload.config_code,
+        status=upload.status,
+        chunks_expected=upload.chunks_expected,
+        chunks_received=chunks_received,
+        missing_ranges=missing_ranges,
+        size_bytes=upload.size_bytes,
+        checksum_sha256=upload.checksum_sha256,
+        upload_token=upload_token,
+        db_name=upload.db_name,
+        created_at=upload.created_at,
+        completed_at=upload.completed_at,
+    )
+
+
+@router.get("/{upload_id}/events")
+async def stream_events(
+    upload_id: uuid.UUID,
+    request: Request,
+    current_user: User = Depends(get_stream_user),
+) -> StreamingResponse:
+    """Stream the progress of an upload as Server-Sent Events.
+
+    Replaces polling /status: the first event is the current state, then
+    one event per received chunk and one when the upload is finished,
+    rejected or expired, after which the stream ends. Events are published
+    through Redis pub/sub, so any worker can serve the stream. Pass the
+    access token as ?access_token= when using EventSource.
+
+    Args:
+        upload_id: The upload session UUID.
+        request: The incoming request (to notice disconnects).
+        current_user: The authenticated user.
+
+    Returns:
+        A text/event-stream response with one JSON object per event.
+    """
+    async with async_session_factory() as db:
+        await _get_upload(db, upload_id, current_user)
+
+    async def snapshot() -> dict[str, object]:
+        async with async_session_factory() as db:
+            upload = await _get_upload(db, upload_id, current_user)
+        received = upload.chunks_received
+        if upload.status in (UPLOAD_STATUS_PENDING, UPLOAD_STATUS_UPLOADING):
+            received = await upload_progress.received_count(upload.id)
+        return _row_event(upload, received)
+
+    return StreamingResponse(
+        sse_stream(request, upload_events.channel(upload_id), snapshot, upload_events.is_final),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
     )
 
 
 @router.post("/{upload_id}/complete", response_model=MessageResponse)
 async def complete_upload(
     upload_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
+    body: UploadCompleteRequest | None = None,
     current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> MessageResponse:
-    """Finalize a chunked upload: merge chunks and notify admin.
+    """Finalize a chunked upload and notify admin.
+
+    Chunks already sit in place (the data file, or S3 parts assembled by
+    finalize), so nothing is merged here.
+    The whole-file digest is derived from the per-chunk digests recorded
+    while streaming, so integrity is confirmed without re-reading the file.
+    The upload is then queued for the processing worker
+    (app.workers.processing), which creates its Database record.
 
     Args:
         upload_id: The upload session UUID.
+        background_tasks: FastAPI background tasks (admin SMS, progress event).
+        body: Optional whole-file checksum computed by the client.
         current_user: The authenticated user.
+        db: Database session.
 
     Returns:
         Confirmation that the upload is complete.
     """
-    # TODO: merge chunks, update status, send admin notification
+    upload = await _get_upload(db, upload_id, current_user, for_update=True)
+    if upload.status not in (UPLOAD_STATUS_PENDING, UPLOAD_STATUS_UPLOADING):
+        raise ConflictError("Загрузка уже завершена")
+
+    backend = storage.get_storage()
+    received = await upload_progress.received_count(upload.id)
+    if received < upload.chunks_expected:
+        raise ValidationError(f"Получено {received} из {upload.chunks_expected} частей")
+
+    await _apply_dedup(upload)
+
+    digests = await upload_progress.get_chunk_digests(upload.id, upload.chunks_expected)
+    checksum = upload_progress.composite_digest(digests) if digests is not None else None
+    if checksum is None:
+        logger.warning("Upload %s has no chunk digests, checksum not recorded", upload.id)
+    elif body is not None and body.sha256 is not None and body.sha256 != checksum:
+        raise ValidationError("Контрольная сумма файла не совпадает")
+
+    final_path = await backend.finalize(upload.storage_path, upload.filename)
+    if digests is not None:
+        await dedup.index_upload(
+            upload.organization_id, final_path, upload.chunk_size, upload.size_bytes, digests
+        )
+    await upload_progress.clear(upload.id)
+    await upload_admission.release(upload.organization_id, upload.id)
+
+    upload.status = UPLOAD_STATUS_UPLOADED
+    upload.chunks_received = upload.chunks_expected
+    upload.checksum_sha256 = checksum
+    upload.stored_bytes = upload.size_bytes
+    upload.completed_at = datetime.now(timezone.utc)
+    # The processing worker must see the committed row; if the enqueue below
+    # fails, the worker's requeue_lost() queues the upload later
+    await db.commit()
+    await job_queue.enqueue(PROCESSING_STAGE_VERIFY, upload.id, {"location": final_path})
+    background_tasks.add_task(upload_events.emit, _row_event(upload, upload.chunks_expected))
+    logger.info("Upload %s completed (%d bytes)", upload.id, upload.size_bytes)
+
+    # Notify admin via SMS (non-blocking)
+    from app.services import sms as sms_service
+
+    admin_msg = f"1C24.PRO: база загружена!\n{upload.filename}\nБаза: {upload.db_name}"
+    background_tasks.add_task(sms_service.send_sms, settings.ADMIN_PHONE, admin_msg)
+
     return MessageResponse(message="Upload completed successfully")
@@ -3,8 +3,11 @@
 import uuid
 from datetime import datetime
 from decimal import Decimal
+from typing import Annotated
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, field_validator
+
+from app.constants import UPLOAD_MAX_CHUNKS
 
 
 # ── Auth ──────────────────────────────────────────────────────────────────────
@@ -63,6 +66,12 @@ class RefreshTokenRequest(BaseModel):
     refresh_token: str
 
 
+class LogoutRequest(BaseModel):
+    """Tokens to revoke on logout besides the bearer access token."""
+
+    refresh_token: str | None = None
+
+
 class TokenResponse(BaseModel):
     """JWT token pair response."""
 
@@ -106,12 +115,29 @@ class OrganizationResponse(BaseModel):
 # ── Upload ────────────────────────────────────────────────────────────────────
 
 
+# Lowercase hex SHA-256, as hashlib's hexdigest() and the dedup index use
+Sha256Hex = Annotated[str, StringConstraints(pattern=r"^[0-9a-f]{64}$")]
+
+
 class UploadInitRequest(BaseModel):
     """Request to initialize a chunked upload session."""
 
     filename: str = Field(..., max_length=500, examples=["buh_2024.bak"])
     size_bytes: int = Field(..., gt=0, examples=[2500000000])
     config_code: str = Field(..., max_length=20, examples=["bp30"])
+    chunk_hashes: list[Sha256Hex] | None = Field(
+        None,
+        max_length=UPLOAD_MAX_CHUNKS,
+        description="Hex SHA-256 of every CHUNK_SIZE_BYTES block; known chunks are not uploaded",
+    )
+
+    @field_validator("filename")
+    @classmethod
+    def _bare_filename(cls, value: str) -> str:
+        """Accept a plain file name only: it names the stored file."""
+        if value in ("", ".", "..") or "/" in value or "\\" in value:
+            raise ValueError("Имя файла не должно содержать путь")
+        return value
 
 
 class UploadInitResponse(BaseModel):
@@ -120,6 +146,10 @@ class UploadInitResponse(BaseModel):
     upload_id: uuid.UUID
     chunk_size: int = 5242880
     chunks_expected: int
+    parallel_chunks: int = 1
+    chunks_deduplicated: int = 0
+    missing_ranges: list[tuple[int, int]] = Field(default_factory=list)
+    upload_token: str = Field(..., description="Bearer token for chunk PUTs of this upload")
     db_name: str
 
 
@@ -134,12 +164,29 @@ class UploadStatusResponse(BaseModel):
     status: str
     chunks_expected: int
     chunks_received: int
+    missing_ranges: list[tuple[int, int]] = Field(
+        default_factory=list, description="Inclusive [first, last] chunk ranges not yet received"
+    )
     size_bytes: int
+    checksum_sha256: str | None = None
+    upload_token: str | None = Field(
+        None, description="Fresh chunk token while the upload is in progress"
+    )
     db_name: str | None = None
     created_at: datetime
     completed_at: datetime | None = None
 
 
+class UploadCompleteRequest(BaseModel):
+    """Optional whole-file checksum to confirm on completion."""
+
+    sha256: str | None = Field(
+        None,
+        pattern=r"^[0-9a-f]{64}$",
+        description="SHA-256 over the concatenated binary SHA-256 digests of all chunks",
+    )
+
+
 # ── Dashboard ─────────────────────────────────────────────────────────────────
 
 
@@ -313,6 +360,19 @@ class UpdateSubscriptionRequest(BaseModel):
     auto_renew: bool | None = None
 
 
+# ── Dashboard bootstrap ───────────────────────────────────────────────────────
+
+
+class DashboardBootstrapResponse(BaseModel):
+    """Everything the dashboard shows on load, in one response."""
+
+    profile: UserProfileResponse
+    databases: list[DatabaseResponse]
+    uploads: list[UploadStatusResponse]
+    subscription: SubscriptionResponse
+    members: list[MemberResponse]
+
+
 # ── Admin ─────────────────────────────────────────────────────────────────────
 
 
@@ -326,6 +386,9 @@ class AdminUploadResponse(BaseModel):
     config_code: str
     filename: str
     size_bytes: int
+    # Physical size and compression of the stored file
+    stored_bytes: int | None = None
+    compression: str = "none"
     status: str
     db_name: str | None = None
     storage_path: str
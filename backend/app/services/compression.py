@@ -0,0 +1,186 @@
+"""zstd seekable-format compression of stored uploads.
+
+SQL Server .bak files often compress 3-5x, 1C .dt files hardly at all, so
+a file is only compressed when a sample of its first bytes compresses by
+at least COMPRESSION_MIN_RATIO (is_worth_compressing).
+
+Compressed files ({name}.zst) follow the zstd seekable format: the file is
+cut into independent frames of COMPRESSION_FRAME_BYTES, followed by a seek
+table in a skippable frame, so any byte range can be read back by
+decompressing only the frames that cover it (read_range) and any zstd
+tool with seekable support can read the file. Frames are compressed in a
+process pool, in parallel, and written in order.
+"""
+
+import asyncio
+import bisect
+import struct
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+import aiofiles
+import zstandard
+
+from app.constants import COMPRESSION_FRAME_BYTES, COMPRESSION_LEVEL, COMPRESSION_MIN_RATIO
+
+ZSTD_SUFFIX = ".zst"
+
+_SKIPPABLE_MAGIC = 0x184D2A5E
+_SEEKABLE_MAGIC = 0x8F92EAB1
+_FOOTER = struct.Struct("<IBI")  # number of frames, descriptor, seekable magic
+_ENTRY = struct.Struct("<II")  # compressed size, decompressed size
+_CHECKSUM_FLAG = 0x80
+_CHECKSUM_BYTES = 4
+# Frames compressed ahead of the writer, per pool process
+_WINDOW_PER_WORKER = 4
+
+
+def is_worth_compressing(sample: bytes, level: int = COMPRESSION_LEVEL) -> bool:
+    """Whether a sample of a file compresses by at least COMPRESSION_MIN_RATIO."""
+    if not sample:
+        return False
+    compressed = zstandard.ZstdCompressor(level=level).compress(sample)
+    return len(sample) / len(compressed) >= COMPRESSION_MIN_RATIO
+
+
+def compress_frame(path: str, offset: int, length: int, level: int) -> bytes:
+    """Compress one frame of a file (runs in a pool process)."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def seek_table(frames: list[tuple[int, int]]) -> bytes:
+    """Encode the seek table of (compressed size, decompressed size) frames."""
+    body = b"".join(_ENTRY.pack(c, d) for c, d in frames)
+    body += _FOOTER.pack(len(frames), 0, _SEEKABLE_MAGIC)
+    return struct.pack("<II", _SKIPPABLE_MAGIC, len(body)) + body
+
+
+def read_seek_table(f: BinaryIO) -> list[tuple[int, int]]:
+    """Read the (compressed size, decompressed size) of every frame.
+
+    Raises:
+        ValueError: If the file does not end with a seek table.
+    """
+    f.seek(-_FOOTER.size, 2)
+    count, descriptor, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+    if magic != _SEEKABLE_MAGIC:
+        raise ValueError("Not a zstd seekable file")
+    entry_size = _ENTRY.size + (_CHECKSUM_BYTES if descriptor & _CHECKSUM_FLAG else 0)
+    f.seek(-(_FOOTER.size + count * entry_size), 2)
+    raw = f.read(count * entry_size)
+    return [_ENTRY.unpack_from(raw, i * entry_size) for i in range(count)]
+
+
+async def compress_file(
+    src: Path, dst: Path, executor: Executor, level: int = COMPRESSION_LEVEL, workers: int = 1
+) -> int:
+    """Write src to dst in the seekable format.
+
+    Args:
+        src: Uncompressed file.
+        dst: Compressed file to create.
+        executor: Process pool that compresses the frames.
+        level: zstd compression level.
+        workers: Processes in the pool (frames in flight = 4 per process).
+
+    Returns:
+        Size of the compressed file in bytes.
+    """
+    loop = asyncio.get_running_loop()
+    size = src.stat().st_size
+    frames: list[tuple[int, int]] = []
+    pending: deque[tuple[asyncio.Future[bytes], int]] = deque()
+    written = 0
+    async with aiofiles.open(dst, "wb") as out:
+
+        async def write_next() -> None:
+            nonlocal written
+            future, length = pending.popleft()
+            data = await future
+            await out.write(data)
+            frames.append((len(data), length))
+            written += len(data)
+
+        for offset in range(0, size, COMPRESSION_FRAME_BYTES):
+            length = min(COMPRESSION_FRAME_BYTES, size - offset)
+            future = loop.run_in_executor(executor, compress_frame, str(src), offset, length, level)
+            pending.append((future, length))
+            if len(pending) >= workers * _WINDOW_PER_WORKER:
+                await write_next()
+        while pending:
+            await write_next()
+        table = seek_table(frames)
+        await out.write(table)
+        await out.flush()
+    return written + len(table)
+
+
+def iter_frames(path: Path) -> Iterator[bytes]:
+    """Yield the decompressed frames of a seekable file in order."""
+    decompressor = zstandard.ZstdDecompressor()
+    with open(path, "rb") as f:
+        frames = read_seek_table(f)
+        f.seek(0)
+        for compressed_size, _ in frames:
+            yield decompressor.decompress(f.read(compressed_size))
+
+
+async def read_file(path: Path) -> AsyncIterator[bytes]:
+    """Stream the decompressed content of a seekable file, frame by frame."""
+    frames = iter_frames(path)
+    try:
+        while (data := await asyncio.to_thread(next, frames, None)) is not None:
+            yield data
+    finally:
+        frames.close()
+
+
+@dataclass(frozen=True)
+class SeekIndex:
+    """Frame boundaries of a seekable file, for random access."""
+
+    frames: list[tuple[int, int]]
+    # Offset of every frame in the decompressed content and in the file
+    starts: list[int]
+    positions: list[int]
+
+    @classmethod
+    def load(cls, f: BinaryIO) -> "SeekIndex":
+        """Build the index from a file's seek table."""
+        frames = read_seek_table(f)
+        starts, positions = [0], [0]
+        for compressed_size, decompressed_size in frames:
+            starts.append(starts[-1] + decompressed_size)
+            positions.append(positions[-1] + compressed_size)
+        return cls(frames, starts, positions)
+
+
+def read_range(path: Path, offset: int, length: int, index: SeekIndex | None = None) -> bytes:
+    """Read decompressed bytes at `offset`, decompressing only the frames needed.
+
+    Args:
+        path: Seekable compressed file.
+        offset: Offset in the decompressed content.
+        length: Number of bytes.
+        index: The file's SeekIndex, if already loaded.
+    """
+    decompressor = zstandard.ZstdDecompressor()
+    with open(path, "rb") as f:
+        if index is None:
+            index = SeekIndex.load(f)
+        first = n = bisect.bisect_right(index.starts, offset) - 1
+        end = offset + length
+        out = bytearray()
+        while n < len(index.frames) and index.starts[n] < end:
+            f.seek(index.positions[n])
+            out += decompressor.decompress(f.read(index.frames[n][0]))
+            n += 1
+    skip = offset - index.starts[first]
+    return bytes(out[skip : skip + length])
@@ -0,0 +1,142 @@
+"""Content-addressed chunk deduplication for repeated database uploads.
+
+Every finished upload indexes its chunks by SHA-256 in dedup:{org_id}
+(hash -> "offset:length:path" of the chunk inside the retained file). When
+a client announces its chunk hashes at /uploads/init, chunks the
+organization already holds are marked as received and copied kernel-side
+from the old file on completion instead of being uploaded again.
+"""
+
+import logging
+import uuid
+
+from app.constants import CHUNK_SIZE_BYTES, STORAGE_DAYS, UPLOAD_BITMAP_TTL_SECONDS
+from app.core.redis import get_redis
+from app.services import storage, upload_progress
+
+logger = logging.getLogger(__name__)
+
+
+def _index_key(organization_id: uuid.UUID) -> str:
+    """Return the Redis key of the organization's chunk index."""
+    return f"dedup:{organization_id}"
+
+
+def _plan_key(upload_id: uuid.UUID) -> str:
+    """Return the Redis key of an upload's pending chunk copies."""
+    return f"upload_dedup:{upload_id}"
+
+
+def encode_location(path: str, offset: int, length: int) -> str:
+    """Encode where a chunk lives as "offset:length:path"."""
+    return f"{offset}:{length}:{path}"
+
+
+def decode_location(location: str) -> tuple[str, int, int]:
+    """Decode "offset:length:path" into (path, offset, length)."""
+    offset, length, path = location.split(":", 2)
+    return path, int(offset), int(length)
+
+
+async def index_upload(
+    organization_id: uuid.UUID, path: str, chunk_size: int, size_bytes: int, digests: list[str]
+) -> None:
+    """Register the chunks of a finished upload in the organization's index.
+
+    Only uploads in CHUNK_SIZE_BYTES chunks are indexed: announced hashes
+    always cover CHUNK_SIZE_BYTES blocks, so chunks of a negotiated size
+    could never match.
+
+    Args:
+        organization_id: Owning organization UUID.
+        path: Path of the finished file.
+        chunk_size: Chunk size of the upload.
+        size_bytes: File size.
+        digests: Hex SHA-256 of every chunk, in order.
+    """
+    if chunk_size != CHUNK_SIZE_BYTES:
+        return
+    mapping = {
+        digest: encode_location(path, n * chunk_size, min(chunk_size, size_bytes - n * chunk_size))
+        for n, digest in enumerate(digests)
+    }
+    if not mapping:
+        return
+    r = await get_redis()
+    pipe = r.pipeline()
+    pipe.hset(_index_key(organization_id), mapping=mapping)
+    pipe.expire(_index_key(organization_id), STORAGE_DAYS * 86400)
+    await pipe.execute()
+
+
+async def plan_upload(
+    organization_id: uuid.UUID,
+    upload_id: uuid.UUID,
+    chunk_hashes: list[str],
+    chunk_size: int,
+    size_bytes: int,
+) -> int:
+    """Find chunks the organization already stores and reserve them for copying.
+
+    Known chunks are marked as received in the upload bitmap, so they show
+    up as present in missing_ranges and the client skips them.
+
+    Args:
+        organization_id: Owning organization UUID.
+        upload_id: The new upload session UUID.
+        chunk_hashes: Hex SHA-256 of every chunk announced by the client.
+        chunk_size: Chunk size of the new upload.
+        size_bytes: Size of the new upload.
+
+    Returns:
+        Number of chunks that do not need to be uploaded.
+    """
+    r = await get_redis()
+    locations = await r.hmget(_index_key(organization_id), chunk_hashes)
+    backend = storage.get_storage()
+
+    plan: dict[str, str] = {}
+    digests: dict[int, str] = {}
+    exists: dict[str, bool] = {}
+    for n, (digest, location) in enumerate(zip(chunk_hashes, locations, strict=True)):
+        if location is None:
+            continue
+        path, _, length = decode_location(location)
+        if path not in exists:
+            exists[path] = await backend.exists(path)
+        if length != min(chunk_size, size_bytes - n * chunk_size) or not exists[path]:
+            continue
+        plan[str(n)] = location
+        digests[n] = digest
+
+    if plan:
+        pipe = r.pipeline()
+        pipe.hset(_plan_key(upload_id), mapping=plan)
+        pipe.expire(_plan_key(upload_id), UPLOAD_BITMAP_TTL_SECONDS)
+        await pipe.execute()
+        await upload_progress.mark_chunks(upload_id, digests)
+    logger.info("Upload %s: %d/%d chunks deduplicated", upload_id, len(plan), len(chunk_hashes))
+    return len(plan)
+
+
+async def get_plan(upload_id: uuid.UUID) -> dict[int, tuple[str, int, int]]:
+    """Return the pending chunk copies of an upload.
+
+    Returns:
+        Mapping of chunk number to (source path, source offset, length).
+    """
+    r = await get_redis()
+    plan = await r.hgetall(_plan_key(upload_id))
+    return {int(n): decode_location(location) for n, location in plan.items()}
+
+
+async def planned_count(upload_id: uuid.UUID) -> int:
+    """Return the number of chunks still to be copied (marked received, not on disk)."""
+    r = await get_redis()
+    return int(await r.hlen(_plan_key(upload_id)))
+
+
+async def clear_plan(upload_id: uuid.UUID) -> None:
+    """Forget the pending chunk copies once they are applied."""
+    r = await get_redis()
+    await r.delete(_plan_key(upload_id))
@@ -0,0 +1,95 @@
+"""Recognize 1C .dt dumps and SQL Server .bak backups from their first bytes.
+
+Chunk 0 is sniffed while it streams in, so a wrong file is rejected after
+a few hundred bytes instead of after the whole upload.
+
+- .dt is a 1C v8 container: a 16-byte header that starts with the
+  "no free blocks" marker 0x7FFFFFFF (FF FF FF 7F) followed by the page
+  size, then the first block header "\\r\\n{hex} {hex} {hex} \\r\\n".
+  8.3 containers for large infobases use 64-bit fields
+  (FF FF FF FF FF FF FF 7F and 16-digit block headers).
+- .bak is a Microsoft Tape Format stream: it opens with a TAPE descriptor
+  block ("TAPE"); the MTF major version is the byte at offset 93.
+"""
+
+import re
+import struct
+from collections.abc import AsyncIterator
+
+MIME_DT = "application/x-1c-dt"
+MIME_BAK = "application/x-mssql-backup"
+
+# Enough for the .dt block header and the MTF TAPE block fields used here
+SNIFF_BYTES = 512
+
+_DT_MARKER_32 = b"\xff\xff\xff\x7f"
+_DT_MARKER_64 = b"\xff\xff\xff\xff\xff\xff\xff\x7f"
+_DT_BLOCK_HEADER = re.compile(rb"\r\n([0-9a-fA-F]{8}|[0-9a-fA-F]{16})( [0-9a-fA-F]{8,16}){2} \r\n")
+_MTF_TAPE = b"TAPE"
+_MTF_MAJOR_VERSION_OFFSET = 93
+
+
+class UnsupportedFormatError(ValueError):
+    """Raised when chunk 0 is neither a 1C .dt dump nor a SQL Server .bak."""
+
+
+def detect(header: bytes) -> str | None:
+    """Return the MIME type (with format parameters) of a file header, if known.
+
+    Args:
+        header: The first bytes of the file (SNIFF_BYTES or the whole file).
+
+    Returns:
+        E.g. "application/x-1c-dt; container=32; page=512" or
+        "application/x-mssql-backup; mtf=1", or None if not recognized.
+    """
+    if header.startswith(_DT_MARKER_64):
+        if _DT_BLOCK_HEADER.match(header, 16) or _DT_BLOCK_HEADER.match(header, 24):
+            return f"{MIME_DT}; container=64"
+    elif header.startswith(_DT_MARKER_32) and len(header) >= 16:
+        (page,) = struct.unpack_from("<I", header, 4)
+        if page >= 512 and page & (page - 1) == 0 and _DT_BLOCK_HEADER.match(header, 16):
+            return f"{MIME_DT}; container=32; page={page}"
+    elif header.startswith(_MTF_TAPE) and len(header) > _MTF_MAJOR_VERSION_OFFSET:
+        version = header[_MTF_MAJOR_VERSION_OFFSET]
+        if version >= 1:
+            return f"{MIME_BAK}; mtf={version}"
+    return None
+
+
+class HeaderSniffer:
+    """Wraps a chunk body stream and checks its header before passing it on.
+
+    Nothing is yielded until SNIFF_BYTES (or the whole body) has been seen,
+    so a rejected chunk never reaches storage. The result is in mime_type.
+    """
+
+    def __init__(self) -> None:
+        """Start with nothing detected."""
+        self.mime_type: str | None = None
+
+    async def wrap(self, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Yield the body unchanged once its header is recognized.
+
+        Raises:
+            UnsupportedFormatError: If the header is not a .dt or .bak header.
+        """
+        head = bytearray()
+        async for data in stream:
+            if self.mime_type is None:
+                head += data
+                if len(head) < SNIFF_BYTES:
+                    continue
+                self._check(bytes(head))
+                yield bytes(head)
+            else:
+                yield data
+        if self.mime_type is None:
+            self._check(bytes(head))
+            yield bytes(head)
+
+    def _check(self, header: bytes) -> None:
+        """Detect the format or reject the header."""
+        self.mime_type = detect(header)
+        if self.mime_type is None:
+            raise UnsupportedFormatError("Файл не похож на выгрузку 1С (.dt) или бэкап SQL (.bak)")
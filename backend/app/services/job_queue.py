@@ -0,0 +1,226 @@
+"""Durable job queue on Redis Streams for post-upload processing.
+
+Every stage has a stream jobs:{stage} read through the consumer group
+"processing". A delivered job stays in the group's pending list until it is
+acknowledged, so a worker that dies mid-job loses nothing: once the entry
+has been idle for the stage's visibility timeout another consumer claims
+it (XAUTOCLAIM). Long jobs reset their idle time with heartbeat().
+
+Handing a job to the next stage is one MULTI (XADD next, XACK + XDEL
+current). Failed jobs wait in jobs:{stage}:delayed (sorted set scored by
+due time) until promote_due() moves them back; jobs out of attempts are
+kept in jobs:dead for inspection.
+"""
+
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from redis.commands.core import AsyncScript
+from redis.exceptions import ResponseError
+
+from app.core.redis import get_redis
+
+GROUP = "processing"
+DEAD_KEY = "jobs:dead"
+_DEAD_MAXLEN = 10000
+
+# KEYS: delayed, stream; ARGV: now, max jobs
+# Moves due jobs back to their stream; one script so no job is promoted twice.
+_PROMOTE_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, member in ipairs(due) do
+  local job = cjson.decode(member)
+  redis.call('XADD', KEYS[2], '*',
+    'upload_id', job.upload_id, 'attempt', job.attempt, 'data', job.data)
+  redis.call('ZREM', KEYS[1], member)
+end
+return #due
+"""
+
+_promote_script: AsyncScript | None = None
+
+
+@dataclass(frozen=True)
+class Job:
+    """One delivery of a stage job."""
+
+    stage: str
+    entry_id: str
+    upload_id: uuid.UUID
+    attempt: int
+    data: dict[str, str] = field(default_factory=dict)
+
+
+def _stream(stage: str) -> str:
+    """Return the Redis stream of a stage."""
+    return f"jobs:{stage}"
+
+
+def _delayed_key(stage: str) -> str:
+    """Return the sorted set of a stage's jobs waiting for a retry."""
+    return f"jobs:{stage}:delayed"
+
+
+def _fields(upload_id: uuid.UUID, attempt: int, data: dict[str, str]) -> dict[str, str]:
+    """Encode a job as stream entry fields."""
+    return {"upload_id": str(upload_id), "attempt": str(attempt), "data": json.dumps(data)}
+
+
+def _job(stage: str, entry_id: str, fields: dict[str, str], redelivered: int = 0) -> Job:
+    """Decode a stream entry; redelivered counts deliveries that never finished."""
+    return Job(
+        stage=stage,
+        entry_id=entry_id,
+        upload_id=uuid.UUID(fields["upload_id"]),
+        attempt=int(fields["attempt"]) + redelivered,
+        data=json.loads(fields["data"]),
+    )
+
+
+async def ensure_groups(stages: list[str]) -> None:
+    """Create the stage streams and their consumer group if missing."""
+    r = await get_redis()
+    for stage in stages:
+        try:
+            await r.xgroup_create(_stream(stage), GROUP, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+
+async def enqueue(stage: str, upload_id: uuid.UUID, data: dict[str, str] | None = None) -> str:
+    """Add a job for an upload to a stage and return its entry id."""
+    r = await get_redis()
+    return str(await r.xadd(_stream(stage), _fields(upload_id, 0, data or {})))
+
+
+async def fetch(
+    stage: str, consumer: str, count: int, visibility_seconds: int, block_seconds: float
+) -> list[Job]:
+    """Take up to `count` jobs: abandoned ones first, then new ones.
+
+    A reclaimed job counts every unfinished delivery as a failed attempt,
+    so a job that keeps killing its worker still runs out of attempts.
+
+    Args:
+        stage: Stage name.
+        consumer: Unique name of the calling worker.
+        count: Maximum number of jobs.
+        visibility_seconds: Idle time after which a delivered job is reclaimed.
+        block_seconds: How long to wait for new jobs if there are none.
+    """
+    r = await get_redis()
+    stream = _stream(stage)
+    response = await r.xautoclaim(
+        stream, GROUP, consumer, visibility_seconds * 1000, "0-0", count=count
+    )
+    jobs = []
+    for entry_id, fields in response[1]:
+        if not fields:  # deleted while pending
+            continue
+        pending = await r.xpending_range(stream, GROUP, entry_id, entry_id, 1)
+        redelivered = pending[0]["times_delivered"] - 1 if pending else 0
+        jobs.append(_job(stage, entry_id, fields, redelivered))
+    if len(jobs) < count:
+        response = await r.xreadgroup(
+            GROUP,
+            consumer,
+            {stream: ">"},
+            count=count - len(jobs),
+            block=int(block_seconds * 1000) if not jobs else None,
+        )
+        for _, entries in response or []:
+            jobs += [_job(stage, entry_id, fields) for entry_id, fields in entries]
+    return jobs
+
+
+async def queued_uploads(stage: str) -> set[uuid.UUID]:
+    """Return the uploads with a job in a stage: waiting, running or delayed.
+
+    Both are read in one MULTI, so a job moving between the stream and the
+    delayed set is never missed.
+    """
+    r = await get_redis()
+    pipe = r.pipeline(transaction=True)
+    pipe.xrange(_stream(stage))
+    pipe.zrange(_delayed_key(stage), 0, -1)
+    entries, delayed = await pipe.execute()
+    uploads = {uuid.UUID(fields["upload_id"]) for _, fields in entries if fields}
+    return uploads | {uuid.UUID(json.loads(member)["upload_id"]) for member in delayed}
+
+
+async def heartbeat(job: Job, consumer: str) -> None:
+    """Reset the idle time of a running job so it is not reclaimed."""
+    r = await get_redis()
+    await r.xclaim(_stream(job.stage), GROUP, consumer, 0, [job.entry_id], justid=True)
+
+
+async def complete(
+    job: Job, next_stage: str | None = None, data: dict[str, str] | None = None
+) -> None:
+    """Acknowledge a job, handing it (with `data`, if given) to `next_stage` atomically."""
+    r = await get_redis()
+    stream = _stream(job.stage)
+    pipe = r.pipeline(transaction=True)
+    if next_stage is not None:
+        pipe.xadd(
+            _stream(next_stage), _fields(job.upload_id, 0, job.data if data is None else data)
+        )
+    pipe.xack(stream, GROUP, job.entry_id)
+    pipe.xdel(stream, job.entry_id)
+    await pipe.execute()
+
+
+async def retry(job: Job, delay_seconds: float) -> None:
+    """Acknowledge a failed job and schedule its next attempt."""
+    await _schedule(job, job.attempt + 1, delay_seconds)
+
+
+async def postpone(job: Job, delay_seconds: float) -> None:
+    """Acknowledge a job that cannot run yet and schedule it again (no attempt used)."""
+    await _schedule(job, job.attempt, delay_seconds)
+
+
+async def _schedule(job: Job, attempt: int, delay_seconds: float) -> None:
+    """Move a job to its stage's delayed set, due in `delay_seconds`."""
+    r = await get_redis()
+    stream = _stream(job.stage)
+    member = json.dumps(
+        {
+            "id": job.entry_id,
+            "upload_id": str(job.upload_id),
+            "attempt": str(attempt),
+            "data": json.dumps(job.data),
+        }
+    )
+    pipe = r.pipeline(transaction=True)
+    pipe.zadd(_delayed_key(job.stage), {member: time.time() + delay_seconds})
+    pipe.xack(stream, GROUP, job.entry_id)
+    pipe.xdel(stream, job.entry_id)
+    await pipe.execute()
+
+
+async def bury(job: Job, error: str) -> None:
+    """Acknowledge a job that will not be retried and keep it in jobs:dead."""
+    r = await get_redis()
+    stream = _stream(job.stage)
+    fields = _fields(job.upload_id, job.attempt, job.data) | {"stage": job.stage, "error": error}
+    pipe = r.pipeline(transaction=True)
+    pipe.xadd(DEAD_KEY, fields, maxlen=_DEAD_MAXLEN, approximate=True)
+    pipe.xack(stream, GROUP, job.entry_id)
+    pipe.xdel(stream, job.entry_id)
+    await pipe.execute()
+
+
+async def promote_due(stage: str, limit: int = 100) -> int:
+    """Move a stage's jobs whose retry is due back to its stream."""
+    global _promote_script  # noqa: PLW0603
+    if _promote_script is None:
+        r = await get_redis()
+        _promote_script = r.register_script(_PROMOTE_LUA)
+    promoted = await _promote_script(
+        keys=[_delayed_key(stage), _stream(stage)], args=[time.time(), limit]
+    )
+    return int(promoted)
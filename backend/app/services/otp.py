@@ -4,22 +4,76 @@ import hashlib
 import logging
 import secrets
 
-import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
 
 from app.config import settings
-from app.constants import OTP_LENGTH, OTP_MAX_ATTEMPTS, OTP_TTL_SECONDS
+from app.constants import OTP_LENGTH, OTP_TTL_SECONDS
+from app.core.redis import get_redis
+from app.exceptions import RateLimitError
 
 logger = logging.getLogger(__name__)
 
-_redis: aioredis.Redis | None = None
-
-
-async def _get_redis() -> aioredis.Redis:
-    """Return a shared async Redis connection (lazy singleton)."""
-    global _redis  # noqa: PLW0603
-    if _redis is None:
-        _redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
-    return _redis
+# KEYS: otp, attempts; ARGV: code hash, max attempts
+# Returns 1 if the code matches (both keys deleted), 0 if it does not or
+# there is no code (attempts incremented), -1 if the attempts are used up
+# (both keys deleted). Atomic, so parallel guesses cannot exceed the limit.
+_VERIFY_LUA = """
+local stored = redis.call('GET', KEYS[1])
+if not stored then return 0 end
+local attempts = tonumber(redis.call('GET', KEYS[2]) or '0')
+if attempts >= tonumber(ARGV[2]) then
+  redis.call('DEL', KEYS[1], KEYS[2])
+  return -1
+end
+if stored ~= ARGV[1] then
+  if redis.call('INCR', KEYS[2]) == 1 then
+    local ttl = redis.call('PTTL', KEYS[1])
+    if ttl > 0 then redis.call('PEXPIRE', KEYS[2], ttl) end
+  end
+  return 0
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+return 1
+"""
+
+# KEYS: otp, attempts, cooldown, daily counter
+# ARGV: code hash, OTP TTL, cooldown seconds, max sends per day
+# Returns 0 when the code was stored, 1 during the cooldown, 2 when the
+# daily limit is reached. Atomic, so parallel sends cannot skip the limits.
+_ISSUE_LUA = """
+if redis.call('EXISTS', KEYS[3]) == 1 then return 1 end
+if tonumber(redis.call('GET', KEYS[4]) or '0') >= tonumber(ARGV[4]) then return 2 end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('SET', KEYS[2], 0, 'EX', ARGV[2])
+redis.call('SET', KEYS[3], 1, 'EX', ARGV[3])
+redis.call('INCR', KEYS[4])
+redis.call('EXPIRE', KEYS[4], 86400)
+return 0
+"""
+
+_ISSUE_REFUSALS = {
+    1: "Подождите 60 секунд перед повторной отправкой",
+    2: "Превышен лимит SMS на сегодня. Попробуйте завтра.",
+}
+
+_verify_script: AsyncScript | None = None
+_issue_script: AsyncScript | None = None
+
+
+async def load_scripts() -> None:
+    """Register the OTP Lua scripts and load them into Redis (app startup).
+
+    Calls then cost one EVALSHA each; without this they are registered on
+    first use.
+    """
+    global _verify_script, _issue_script  # noqa: PLW0603
+    r = await get_redis()
+    _verify_script = r.register_script(_VERIFY_LUA)
+    _issue_script = r.register_script(_ISSUE_LUA)
+    pipe = r.pipeline(transaction=False)
+    pipe.script_load(_VERIFY_LUA)
+    pipe.script_load(_ISSUE_LUA)
+    await pipe.execute()
 
 
 async def generate_otp() -> str:
@@ -44,147 +98,71 @@ def hash_otp(code: str) -> str:
     return hashlib.sha256(code.encode()).hexdigest()
 
 
-async def store_otp(phone: str, code: str) -> bool:
-    """Store an OTP code hash in Redis with TTL.
+async def issue_otp(phone: str, code: str, max_daily: int = 10) -> None:
+    """Store a new OTP code for a phone, enforcing the send limits, in one round trip.
 
-    Also resets the attempts counter for this phone.
+    The code hash is stored with OTP_TTL_SECONDS and its attempts counter
+    reset; the cooldown (OTP_COOLDOWN_SECONDS) is set and the 24 h send
+    counter incremented.
 
     Args:
-        phone: The target phone number (used in Redis key).
+        phone: The target phone number (used in Redis keys).
         code: The plaintext OTP code.
+        max_daily: Maximum SMS allowed per 24h (default 10).
 
-    Returns:
-        True if stored successfully.
+    Raises:
+        RateLimitError: During the cooldown or once the daily limit is reached.
     """
-    r = await _get_redis()
-    code_hash = hash_otp(code)
-    pipe = r.pipeline()
-    pipe.setex(f"otp:{phone}", OTP_TTL_SECONDS, code_hash)
-    pipe.setex(f"otp_attempts:{phone}", OTP_TTL_SECONDS, 0)
-    await pipe.execute()
+    if _issue_script is None:
+        await load_scripts()
+    assert _issue_script is not None
+    result = int(
+        await _issue_script(
+            keys=[
+                f"otp:{phone}",
+                f"otp_attempts:{phone}",
+                f"otp_cooldown:{phone}",
+                f"sms_daily:{phone}",
+            ],
+            args=[hash_otp(code), OTP_TTL_SECONDS, settings.OTP_COOLDOWN_SECONDS, max_daily],
+        )
+    )
+    if result:
+        raise RateLimitError(_ISSUE_REFUSALS[result])
     logger.info("Stored OTP for %s (TTL: %d seconds)", phone, OTP_TTL_SECONDS)
-    return True
 
 
 async def verify_otp(phone: str, code: str) -> bool:
-    """Verify an OTP code against the stored hash in Redis.
+    """Verify an OTP code against the stored hash in Redis, in one round trip.
 
-    Checks that the number of failed attempts has not exceeded MAX.
-    On failure the attempts counter is incremented.
-    On success both the OTP and attempts keys are deleted.
+    A wrong code increments the attempts counter. The right code deletes
+    the OTP and its counter. Once OTP_MAX_ATTEMPTS wrong codes were tried
+    the OTP is deleted, and a new one has to be requested.
 
     Args:
         phone: The target phone number (Redis key).
         code: The OTP code to verify.
 
     Returns:
-        True if the code matches, has not expired, and attempts < MAX.
-    """
-    r = await _get_redis()
-    stored_hash = await r.get(f"otp:{phone}")
-    if stored_hash is None:
-        logger.warning("OTP not found or expired for %s", phone)
-        return False
+        True if the code matches and has not expired.
 
-    # Check attempts
-    attempts_raw = await r.get(f"otp_attempts:{phone}")
-    attempts = int(attempts_raw) if attempts_raw is not None else 0
-    if attempts >= OTP_MAX_ATTEMPTS:
+    Raises:
+        RateLimitError: If the attempts for this OTP are used up.
+    """
+    if _verify_script is None:
+        await load_scripts()
+    assert _verify_script is not None
+    result = int(
+        await _verify_script(
+            keys=[f"otp:{phone}", f"otp_attempts:{phone}"],
+            args=[hash_otp(code), settings.OTP_MAX_ATTEMPTS],
+        )
+    )
+    if result < 0:
         logger.warning("OTP max attempts exceeded for %s", phone)
+        raise RateLimitError("Слишком много попыток. Запросите новый код.")
+    if result == 0:
+        logger.info("OTP not found, expired or mismatched for %s", phone)
         return False
-
-    # Compare hashes
-    if hash_otp(code) != stored_hash:
-        await r.incr(f"otp_attempts:{phone}")
-        logger.info("OTP mismatch for %s (attempt %d)", phone, attempts + 1)
-        return False
-
-    # Success — clean up
-    pipe = r.pipeline()
-    pipe.delete(f"otp:{phone}")
-    pipe.delete(f"otp_attempts:{phone}")
-    await pipe.execute()
     logger.info("OTP verified successfully for %s", phone)
     return True
-
-
-async def check_cooldown(phone: str) -> bool:
-    """Check whether a cooldown is active for the given phone.
-
-    Args:
-        phone: The phone number to check.
-
-    Returns:
-        True if a cooldown key exists (i.e. must wait).
-    """
-    r = await _get_redis()
-    return await r.exists(f"otp_cooldown:{phone}") == 1
-
-
-async def set_cooldown(phone: str) -> None:
-    """Set a cooldown key preventing repeated OTP sends.
-
-    The key expires after OTP_COOLDOWN_SECONDS (default 60 s).
-
-    Args:
-        phone: The phone number to set cooldown for.
-    """
-    r = await _get_redis()
-    await r.setex(f"otp_cooldown:{phone}", settings.OTP_COOLDOWN_SECONDS, 1)
-
-
-async def delete_otp(phone: str) -> None:
-    """Delete stored OTP and attempts counter for a phone number.
-
-    Args:
-        phone: The phone number whose OTP should be deleted.
-    """
-    r = await _get_redis()
-    pipe = r.pipeline()
-    pipe.delete(f"otp:{phone}")
-    pipe.delete(f"otp_attempts:{phone}")
-    await pipe.execute()
-
-
-async def check_daily_limit(phone: str, max_daily: int = 10) -> bool:
-    """Check whether the phone has exceeded the daily SMS limit.
-
-    Args:
-        phone: The phone number to check.
-        max_daily: Maximum SMS allowed per 24h (default 10).
-
-    Returns:
-        True if the limit is exceeded (must block).
-    """
-    r = await _get_redis()
-    daily_key = f"sms_daily:{phone}"
-    count = await r.get(daily_key)
-    return count is not None and int(count) >= max_daily
-
-
-async def increment_daily_counter(phone: str) -> None:
-    """Increment the daily SMS counter for a phone number.
-
-    Sets 24h TTL on the counter key.
-
-    Args:
-        phone: The phone number to increment counter for.
-    """
-    r = await _get_redis()
-    daily_key = f"sms_daily:{phone}"
-    await r.incr(daily_key)
-    await r.expire(daily_key, 86400)
-
-
-async def get_attempts_count(phone: str) -> int:
-    """Get the current OTP verification attempts count.
-
-    Args:
-        phone: The phone number to check.
-
-    Returns:
-        Number of failed attempts.
-    """
-    r = await _get_redis()
-    attempts_raw = await r.get(f"otp_attempts:{phone}")
-    return int(attempts_raw) if attempts_raw is not None else 0
@@ -0,0 +1,218 @@
+"""S3-compatible storage backend (S3, MinIO, Yandex Object Storage).
+
+Every upload session is one S3 multipart upload and every chunk is one
+part (part number = chunk_number + 1), so the API node only ever holds the
+chunk in flight and the object is assembled by the storage service.
+storage_path is "s3://{bucket}/{key}?uploadId={multipart upload id}".
+"""
+
+import asyncio
+import logging
+import tempfile
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from pathlib import PurePosixPath
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from app.config import settings
+from app.constants import UPLOAD_WRITE_BUFFER_BYTES
+from app.services.storage import ChunkTooLargeError, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+# S3 limit on parts per multipart upload
+S3_MAX_PARTS = 10000
+
+
+def _parse(location: str) -> tuple[str, str, str | None]:
+    """Split "s3://bucket/key[?uploadId=...]" into (bucket, key, upload id)."""
+    parts = urlsplit(location)
+    upload_ids = parse_qs(parts.query).get("uploadId")
+    return parts.netloc, parts.path.lstrip("/"), upload_ids[0] if upload_ids else None
+
+
+def _spool_all(spool: Any, data: bytes | bytearray, hashers: Sequence[Any]) -> None:
+    """Feed a buffer to the hashers and append it to the spool.
+
+    Runs in a worker thread: hashlib releases the GIL for large buffers and
+    the spool writes to disk once it rolls over.
+    """
+    for hasher in hashers:
+        hasher.update(data)
+    spool.write(data)
+
+
+class S3Storage(StorageBackend):
+    """Multipart-upload backend; boto3 calls run in worker threads."""
+
+    def __init__(self, client: Any = None, bucket: str | None = None) -> None:
+        """Create the backend with a boto3 S3 client built from settings."""
+        if client is None:
+            import boto3
+            from botocore.config import Config
+
+            client = boto3.client(
+                "s3",
+                endpoint_url=settings.S3_ENDPOINT_URL or None,
+                region_name=settings.S3_REGION,
+                aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+                aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+                config=Config(max_pool_connections=settings.S3_MAX_CONNECTIONS),
+            )
+        self._client = client
+        self._bucket = bucket or settings.S3_BUCKET
+
+    async def create(
+        self, organization_id: uuid.UUID, upload_id: uuid.UUID, filename: str, size_bytes: int
+    ) -> str:
+        """Start a multipart upload for {org_id}/{upload_id}/{filename}."""
+        key = f"{organization_id}/{upload_id}/{PurePosixPath(filename).name or 'data'}"
+        response = await asyncio.to_thread(
+            self._client.create_multipart_upload, Bucket=self._bucket, Key=key
+        )
+        return f"s3://{self._bucket}/{key}?uploadId={response['UploadId']}"
+
+    async def write_chunk(
+        self,
+        storage_path: str,
+        chunk_number: int,
+        chunk_size: int,
+        stream: AsyncIterator[bytes],
+        max_bytes: int,
+        hashers: Sequence[Any] = (),
+    ) -> int:
+        """Spool the chunk (memory up to 1 MB, then disk) and send it as one part.
+
+        Body pieces are coalesced into UPLOAD_WRITE_BUFFER_BYTES buffers that
+        are hashed and spooled in a worker thread, as LocalStorage does.
+        """
+        bucket, key, mpu_id = _parse(storage_path)
+        if chunk_number + 1 > S3_MAX_PARTS:
+            raise ValueError(f"S3 allows at most {S3_MAX_PARTS} parts")
+        written = 0
+        buffer = bytearray()
+        with tempfile.SpooledTemporaryFile(max_size=UPLOAD_WRITE_BUFFER_BYTES) as spool:
+            async for data in stream:
+                if written + len(buffer) + len(data) > max_bytes:
+                    raise ChunkTooLargeError(f"Chunk exceeds {max_bytes} bytes")
+                buffer += data
+                if len(buffer) >= UPLOAD_WRITE_BUFFER_BYTES:
+                    await asyncio.to_thread(_spool_all, spool, buffer, hashers)
+                    written += len(buffer)
+                    buffer = bytearray()
+            if buffer:
+                await asyncio.to_thread(_spool_all, spool, buffer, hashers)
+                written += len(buffer)
+            spool.seek(0)
+            await asyncio.to_thread(
+                self._client.upload_part,
+                Bucket=bucket,
+                Key=key,
+                UploadId=mpu_id,
+                PartNumber=chunk_number + 1,
+                Body=spool,
+                ContentLength=written,
+            )
+        return written
+
+    def _copy_part(self, storage_path: str, n: int, src: tuple[str, int, int]) -> None:
+        """Server-side copy of a byte range of a stored object into part n + 1."""
+        bucket, key, mpu_id = _parse(storage_path)
+        src_bucket, src_key, _ = _parse(src[0])
+        self._client.upload_part_copy(
+            Bucket=bucket,
+            Key=key,
+            UploadId=mpu_id,
+            PartNumber=n + 1,
+            CopySource={"Bucket": src_bucket, "Key": src_key},
+            CopySourceRange=f"bytes={src[1]}-{src[1] + src[2] - 1}",
+        )
+
+    async def copy_chunks(
+        self, storage_path: str, copies: dict[int, tuple[str, int, int]], chunk_size: int
+    ) -> list[int]:
+        """Fill deduplicated parts with UploadPartCopy (no data through the API)."""
+        failed: list[int] = []
+        for n, src in sorted(copies.items()):
+            try:
+                await asyncio.to_thread(self._copy_part, storage_path, n, src)
+            except Exception as exc:
+                logger.warning("Cannot copy part %d from %s: %s", n, src[0], exc)
+                failed.append(n)
+        return failed
+
+    async def exists(self, location: str) -> bool:
+        """HEAD the finished object."""
+        bucket, key, _ = _parse(location)
+        try:
+            await asyncio.to_thread(self._client.head_object, Bucket=bucket, Key=key)
+        except Exception:
+            return False
+        return True
+
+    def _delete(self, storage_path: str) -> int:
+        """Abort the multipart upload (if open) and delete the object (if completed)."""
+        bucket, key, mpu_id = _parse(storage_path)
+        reclaimed = 0
+        if mpu_id:
+            try:
+                reclaimed = sum(p["Size"] for p in self._list_parts(bucket, key, mpu_id))
+                self._client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=mpu_id)
+            except self._client.exceptions.NoSuchUpload:
+                pass
+        try:
+            reclaimed += self._client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        except Exception:
+            return reclaimed
+        self._client.delete_object(Bucket=bucket, Key=key)
+        return reclaimed
+
+    async def delete(self, storage_path: str) -> int:
+        """Free the parts or the finished object of an upload."""
+        return await asyncio.to_thread(self._delete, storage_path)
+
+    async def read(self, location: str) -> AsyncIterator[bytes]:
+        """GET the finished object and stream its body."""
+        bucket, key, _ = _parse(location)
+        response = await asyncio.to_thread(self._client.get_object, Bucket=bucket, Key=key)
+        body = response["Body"]
+        try:
+            while data := await asyncio.to_thread(body.read, UPLOAD_WRITE_BUFFER_BYTES):
+                yield data
+        finally:
+            body.close()
+
+    def _list_parts(self, bucket: str, key: str, mpu_id: str | None) -> list[dict[str, Any]]:
+        """Return all uploaded parts (ListParts is paginated by 1000)."""
+        paginator = self._client.get_paginator("list_parts")
+        parts: list[dict[str, Any]] = []
+        for page in paginator.paginate(Bucket=bucket, Key=key, UploadId=mpu_id):
+            parts += [
+                {"PartNumber": p["PartNumber"], "ETag": p["ETag"], "Size": p["Size"]}
+                for p in page.get("Parts", [])
+            ]
+        return parts
+
+    async def finalize(self, storage_path: str, filename: str) -> str:
+        """Complete the multipart upload; S3 assembles the object."""
+        bucket, key, mpu_id = _parse(storage_path)
+        parts = await asyncio.to_thread(self._list_parts, bucket, key, mpu_id)
+        await asyncio.to_thread(
+            self._client.complete_multipart_upload,
+            Bucket=bucket,
+            Key=key,
+            UploadId=mpu_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": p["PartNumber"], "ETag": p["ETag"]}
+                    for p in sorted(parts, key=lambda p: p["PartNumber"])
+                ]
+            },
+        )
+        return self.location(storage_path, filename)
+
+    def location(self, storage_path: str, filename: str) -> str:
+        """Return the object without the multipart upload id."""
+        bucket, key, _ = _parse(storage_path)
+        return f"s3://{bucket}/{key}"
@@ -0,0 +1,475 @@
+"""Storage for chunked uploads: backend interface and local-disk backend.
+
+Routes talk to a StorageBackend from get_storage(); STORAGE_BACKEND selects
+"local" (this module) or "s3" (app.services.s3_storage).
+
+Local layout (TZ 2.5): {UPLOAD_DIR}/{org_id}/{upload_id}/. The whole file is
+preallocated as one sparse data file at init, and every chunk is written at
+its own offset (chunk_number * chunk_size) with os.pwrite, so chunks may
+arrive in parallel and in any order.
+"""
+
+import asyncio
+import errno
+import fcntl
+import logging
+import os
+import shutil
+import struct
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Sequence
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any
+
+import aiofiles
+import aiofiles.os
+
+from app.config import settings
+from app.constants import (
+    UPLOAD_GC_THROTTLE_SECONDS,
+    UPLOAD_GC_TRUNCATE_STEP_BYTES,
+    UPLOAD_WRITE_BUFFER_BYTES,
+)
+from app.services import compression
+
+logger = logging.getLogger(__name__)
+
+DATA_FILENAME = "data.partial"
+
+# linux/fs.h: _IOW(0x94, 13, struct file_clone_range)
+_FICLONERANGE = 0x4020940D
+# copy_file_range() errors that mean "not supported here", not a real I/O error
+_COPY_UNSUPPORTED = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP)
+
+
+class ChunkTooLargeError(ValueError):
+    """Raised when a streamed chunk exceeds the negotiated chunk size."""
+
+
+def upload_dir(organization_id: uuid.UUID, upload_id: uuid.UUID) -> Path:
+    """Build the storage directory for an upload session.
+
+    Args:
+        organization_id: Owning organization UUID.
+        upload_id: Upload session UUID.
+
+    Returns:
+        Path of the upload directory.
+    """
+    return Path(settings.UPLOAD_DIR) / str(organization_id) / str(upload_id)
+
+
+def data_path(storage_path: str) -> Path:
+    """Return the path of the (partial) data file of an upload."""
+    return Path(storage_path) / DATA_FILENAME
+
+
+def _allocate(path: Path, size_bytes: int) -> None:
+    """Create the data file with its final size (sparse unless preallocating)."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o640)
+    try:
+        if settings.UPLOAD_PREALLOCATE:
+            os.posix_fallocate(fd, 0, size_bytes)
+        else:
+            os.ftruncate(fd, size_bytes)
+    finally:
+        os.close(fd)
+
+
+async def create_upload_file(path: Path, size_bytes: int) -> None:
+    """Create the upload directory and its data file of size_bytes.
+
+    Args:
+        path: Upload directory.
+        size_bytes: Final file size.
+    """
+    await aiofiles.os.makedirs(path, exist_ok=True)
+    await asyncio.to_thread(_allocate, path / DATA_FILENAME, size_bytes)
+
+
+def _pwrite_all(fd: int, data: bytes | bytearray, offset: int, hashers: Sequence[Any]) -> None:
+    """Write the whole buffer at offset and feed it to the hashers.
+
+    Runs in a worker thread: os.pwrite may write partially, and hashlib
+    releases the GIL for large buffers, so hashing stays off the event loop.
+    """
+    for hasher in hashers:
+        hasher.update(data)
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+async def write_chunk(
+    storage_path: str,
+    offset: int,
+    stream: AsyncIterator[bytes],
+    max_bytes: int,
+    hashers: Sequence[Any] = (),
+) -> int:
+    """Stream a chunk into the data file at the given offset.
+
+    Body pieces are coalesced into UPLOAD_WRITE_BUFFER_BYTES buffers and
+    written with os.pwrite in a worker thread, so memory stays bounded and
+    concurrent chunks of one upload never share a file position.
+
+    Args:
+        storage_path: Upload directory.
+        offset: Byte offset of the chunk in the file.
+        stream: Async iterator over the request body.
+        max_bytes: Maximum allowed chunk size.
+        hashers: hashlib objects updated with every byte written.
+
+    Returns:
+        Number of bytes written.
+
+    Raises:
+        ChunkTooLargeError: If the stream is longer than max_bytes.
+    """
+    fd = await asyncio.to_thread(os.open, data_path(storage_path), os.O_WRONLY)
+    written = 0
+    buffer = bytearray()
+    try:
+        async for data in stream:
+            if written + len(buffer) + len(data) > max_bytes:
+                raise ChunkTooLargeError(f"Chunk exceeds {max_bytes} bytes")
+            buffer += data
+            if len(buffer) >= UPLOAD_WRITE_BUFFER_BYTES:
+                await asyncio.to_thread(_pwrite_all, fd, buffer, offset + written, hashers)
+                written += len(buffer)
+                buffer = bytearray()
+        if buffer:
+            await asyncio.to_thread(_pwrite_all, fd, buffer, offset + written, hashers)
+            written += len(buffer)
+    finally:
+        os.close(fd)
+    return written
+
+
+def _reflink(src_fd: int, src_offset: int, dst_fd: int, dst_offset: int, count: int) -> bool:
+    """Share extents between files (XFS, Btrfs); False if unsupported."""
+    arg = struct.pack("qQQQ", src_fd, src_offset, count, dst_offset)
+    try:
+        fcntl.ioctl(dst_fd, _FICLONERANGE, arg)
+    except OSError:
+        return False
+    return True
+
+
+def _copy_range(src_fd: int, src_offset: int, dst_fd: int, dst_offset: int, count: int) -> None:
+    """Copy a byte range between files inside the kernel.
+
+    Uses copy_file_range() and falls back to sendfile(); the data never
+    passes through Python buffers.
+    """
+    while count > 0:
+        try:
+            n = os.copy_file_range(src_fd, dst_fd, count, src_offset, dst_offset)
+        except OSError as exc:
+            if exc.errno not in _COPY_UNSUPPORTED:
+                raise
+            os.lseek(dst_fd, dst_offset, os.SEEK_SET)
+            n = os.sendfile(dst_fd, src_fd, src_offset, count)
+        if n == 0:
+            raise OSError(errno.EIO, "Unexpected end of source file")
+        count -= n
+        src_offset += n
+        dst_offset += n
+
+
+def _copy_chunks(
+    storage_path: str, copies: dict[int, tuple[str, int, int]], chunk_size: int
+) -> list[int]:
+    """Copy chunks from other files into the data file (reflink or in-kernel).
+
+    Sources compressed meanwhile ({path}.zst) are read through their seek table.
+
+    Returns:
+        Chunk numbers that could not be copied (source file gone).
+    """
+    failed: list[int] = []
+    sources: dict[str, int] = {}
+    indexes: dict[Path, compression.SeekIndex] = {}
+    dst_fd = os.open(data_path(storage_path), os.O_WRONLY)
+    try:
+        for n, (src_path, src_offset, length) in sorted(copies.items()):
+            try:
+                if src_path not in sources:
+                    sources[src_path] = os.open(src_path, os.O_RDONLY)
+                src_fd = sources[src_path]
+                if not _reflink(src_fd, src_offset, dst_fd, n * chunk_size, length):
+                    _copy_range(src_fd, src_offset, dst_fd, n * chunk_size, length)
+            except FileNotFoundError:
+                # The source may have been compressed since it was indexed
+                compressed = Path(src_path + compression.ZSTD_SUFFIX)
+                try:
+                    if compressed not in indexes:
+                        with open(compressed, "rb") as f:
+                            indexes[compressed] = compression.SeekIndex.load(f)
+                    data = compression.read_range(
+                        compressed, src_offset, length, indexes[compressed]
+                    )
+                    _pwrite_all(dst_fd, data, n * chunk_size, ())
+                except OSError as exc:
+                    logger.warning("Cannot copy chunk %d from %s: %s", n, src_path, exc)
+                    failed.append(n)
+            except OSError as exc:
+                logger.warning("Cannot copy chunk %d from %s: %s", n, src_path, exc)
+                failed.append(n)
+        os.fsync(dst_fd)
+    finally:
+        os.close(dst_fd)
+        for fd in sources.values():
+            os.close(fd)
+    return failed
+
+
+async def copy_chunks(
+    storage_path: str, copies: dict[int, tuple[str, int, int]], chunk_size: int
+) -> list[int]:
+    """Fill deduplicated chunks of an upload from previously stored files.
+
+    Args:
+        storage_path: Upload directory.
+        copies: Mapping of chunk number to (source path, source offset, length).
+        chunk_size: Chunk size of the upload.
+
+    Returns:
+        Chunk numbers that could not be copied and must be re-sent.
+    """
+    if not copies:
+        return []
+    return await asyncio.to_thread(_copy_chunks, storage_path, copies, chunk_size)
+
+
+def final_path(storage_path: str, filename: str) -> Path:
+    """Return the path of the finished file: {storage_path}/{filename}."""
+    return Path(storage_path) / (Path(filename).name or DATA_FILENAME)
+
+
+async def finalize(storage_path: str, filename: str) -> Path:
+    """Give the data file of an upload its final name.
+
+    Args:
+        storage_path: Upload directory.
+        filename: Original client file name (validated at init as a bare name).
+
+    Returns:
+        Path of the finished file: {storage_path}/{filename}.
+    """
+    final = final_path(storage_path, filename)
+    await aiofiles.os.replace(data_path(storage_path), final)
+    return final
+
+
+def _truncate_step(path: Path, step: int) -> tuple[int, int]:
+    """Cut up to `step` bytes off the end of a file.
+
+    Returns:
+        Tuple of (bytes left in the file, bytes of disk freed).
+    """
+    st = path.stat()
+    new_size = max(0, st.st_size - step)
+    os.truncate(path, new_size)
+    return new_size, max(0, st.st_blocks - path.stat().st_blocks) * 512
+
+
+async def delete_upload(storage_path: str) -> int:
+    """Delete an upload directory without an I/O burst.
+
+    Large files are shrunk from the end UPLOAD_GC_TRUNCATE_STEP_BYTES at a
+    time with a pause in between, so freeing a 40 GB extent map does not
+    stall the disk for the API workers; the empty files are then unlinked.
+
+    Args:
+        storage_path: Upload directory.
+
+    Returns:
+        Bytes of disk space reclaimed (allocated blocks, not apparent size).
+    """
+    root = Path(storage_path)
+    if not await aiofiles.os.path.isdir(root):
+        return 0
+    files = await asyncio.to_thread(lambda: [p for p in root.rglob("*") if p.is_file()])
+    reclaimed = 0
+    for path in files:
+        left = 1
+        while left:
+            left, freed = await asyncio.to_thread(
+                _truncate_step, path, UPLOAD_GC_TRUNCATE_STEP_BYTES
+            )
+            reclaimed += freed
+            await asyncio.sleep(UPLOAD_GC_THROTTLE_SECONDS)
+        await aiofiles.os.remove(path)
+    await asyncio.to_thread(shutil.rmtree, root, ignore_errors=True)
+    return reclaimed
+
+
+async def _stored_path(location: str) -> str:
+    """Return the location, or its .zst form if the file has been compressed."""
+    compressed = location + compression.ZSTD_SUFFIX
+    if not await aiofiles.os.path.exists(location) and await aiofiles.os.path.exists(compressed):
+        return compressed
+    return location
+
+
+class StorageBackend(ABC):
+    """Where the chunks of an upload session are stored."""
+
+    @abstractmethod
+    async def create(
+        self, organization_id: uuid.UUID, upload_id: uuid.UUID, filename: str, size_bytes: int
+    ) -> str:
+        """Prepare storage for a new upload and return its storage_path."""
+
+    @abstractmethod
+    async def write_chunk(
+        self,
+        storage_path: str,
+        chunk_number: int,
+        chunk_size: int,
+        stream: AsyncIterator[bytes],
+        max_bytes: int,
+        hashers: Sequence[Any] = (),
+    ) -> int:
+        """Stream one chunk into storage and return the number of bytes written."""
+
+    @abstractmethod
+    async def copy_chunks(
+        self, storage_path: str, copies: dict[int, tuple[str, int, int]], chunk_size: int
+    ) -> list[int]:
+        """Copy deduplicated chunks from stored files; return chunks that failed."""
+
+    @abstractmethod
+    async def exists(self, location: str) -> bool:
+        """Return whether a finished file still exists."""
+
+    @abstractmethod
+    async def finalize(self, storage_path: str, filename: str) -> str:
+        """Complete the upload and return the location of the finished file."""
+
+    @abstractmethod
+    def location(self, storage_path: str, filename: str) -> str:
+        """Return the location finalize() gives the finished file."""
+
+    @abstractmethod
+    async def delete(self, storage_path: str) -> int:
+        """Delete everything stored for an upload and return the bytes reclaimed."""
+
+    @abstractmethod
+    def read(self, location: str) -> AsyncIterator[bytes]:
+        """Stream the (uncompressed) content of a finished file in pieces."""
+
+    async def compress(
+        self, location: str, executor: Executor, workers: int
+    ) -> tuple[str, int] | None:
+        """Replace a finished file with its compressed form.
+
+        Returns:
+            (new location, stored bytes), or None if the backend keeps files
+            as they are.
+        """
+        return None
+
+    async def free_bytes(self) -> int | None:
+        """Return free space for new uploads, or None if storage is unbounded."""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Local filesystem backend (one preallocated data file per upload)."""
+
+    async def create(
+        self, organization_id: uuid.UUID, upload_id: uuid.UUID, filename: str, size_bytes: int
+    ) -> str:
+        """Create {UPLOAD_DIR}/{org_id}/{upload_id}/ with its data file."""
+        path = upload_dir(organization_id, upload_id)
+        await create_upload_file(path, size_bytes)
+        return str(path)
+
+    async def write_chunk(
+        self,
+        storage_path: str,
+        chunk_number: int,
+        chunk_size: int,
+        stream: AsyncIterator[bytes],
+        max_bytes: int,
+        hashers: Sequence[Any] = (),
+    ) -> int:
+        """pwrite the chunk at chunk_number * chunk_size."""
+        return await write_chunk(
+            storage_path, chunk_number * chunk_size, stream, max_bytes, hashers
+        )
+
+    async def copy_chunks(
+        self, storage_path: str, copies: dict[int, tuple[str, int, int]], chunk_size: int
+    ) -> list[int]:
+        """Copy chunks kernel-side from older files."""
+        return await copy_chunks(storage_path, copies, chunk_size)
+
+    async def exists(self, location: str) -> bool:
+        """Check the finished file (or its compressed form) on disk."""
+        return await aiofiles.os.path.exists(await _stored_path(location))
+
+    async def finalize(self, storage_path: str, filename: str) -> str:
+        """Rename the data file."""
+        return str(await finalize(storage_path, filename))
+
+    def location(self, storage_path: str, filename: str) -> str:
+        """Return {storage_path}/{filename}."""
+        return str(final_path(storage_path, filename))
+
+    async def delete(self, storage_path: str) -> int:
+        """Remove the upload directory with throttled truncation."""
+        return await delete_upload(storage_path)
+
+    async def read(self, location: str) -> AsyncIterator[bytes]:
+        """Read the finished file from disk, decompressing .zst files."""
+        location = await _stored_path(location)
+        if location.endswith(compression.ZSTD_SUFFIX):
+            async for data in compression.read_file(Path(location)):
+                yield data
+            return
+        async with aiofiles.open(location, "rb") as f:
+            while data := await f.read(UPLOAD_WRITE_BUFFER_BYTES):
+                yield data
+
+    async def compress(
+        self, location: str, executor: Executor, workers: int
+    ) -> tuple[str, int] | None:
+        """Write {location}.zst in the seekable format and remove the original."""
+        target = Path(location + compression.ZSTD_SUFFIX)
+        partial = target.with_name(target.name + ".partial")
+        stored = await compression.compress_file(Path(location), partial, executor, workers=workers)
+        await aiofiles.os.replace(partial, target)
+        await aiofiles.os.remove(location)
+        return str(target), stored
+
+    async def free_bytes(self) -> int | None:
+        """Return the bytes available to unprivileged users on the UPLOAD_DIR volume."""
+        try:
+            st = await asyncio.to_thread(os.statvfs, settings.UPLOAD_DIR)
+        except FileNotFoundError:
+            logger.warning("UPLOAD_DIR %s does not exist, free space unknown", settings.UPLOAD_DIR)
+            return None
+        return st.f_bavail * st.f_frsize
+
+
+_backend: StorageBackend | None = None
+
+
+def get_storage() -> StorageBackend:
+    """Return the configured storage backend (lazy singleton)."""
+    global _backend  # noqa: PLW0603
+    if _backend is None:
+        if settings.STORAGE_BACKEND == "s3":
+            from app.services.s3_storage import S3Storage
+
+            _backend = S3Storage()
+        else:
+            _backend = LocalStorage()
+    return _backend
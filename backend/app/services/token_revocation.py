@@ -0,0 +1,151 @@
+"""Revocation of JWTs before they expire.
+
+Two kinds of revocation are stored in Redis, each as a key revoked:{member}
+that expires with the last token it can affect:
+
+- jti:{jti}: one token (logout);
+- user:{user_id}: every token of a user issued at or before the stored
+  timestamp (disabled member, deleted account).
+
+Members are also indexed in the sorted set "revoked" (scored by expiry),
+from which every worker loads a Bloom filter at startup and every
+TOKEN_REVOCATION_REBUILD_SECONDS; new revocations reach the filters
+through the token_revocations channel. A token whose jti and user are
+both absent from the filter, which is nearly every token, is accepted
+without a network round trip; only filter hits are confirmed in Redis.
+Until a worker's filter is loaded, every check goes to Redis.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+import uuid
+
+from app.constants import (
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    TOKEN_REVOCATION_BLOOM_CAPACITY,
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+    TOKEN_REVOCATION_REBUILD_SECONDS,
+)
+from app.core.bloom import BloomFilter
+from app.core.pubsub import broker, publish
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "token_revocations"
+INDEX_KEY = "revoked"
+
+_filter: BloomFilter | None = None
+_listener: asyncio.Task[None] | None = None
+
+
+def _key(member: str) -> str:
+    """Return the Redis key of a revocation."""
+    return f"revoked:{member}"
+
+
+def _members(payload: dict[str, str | int]) -> list[str]:
+    """Revocation members that can apply to a token."""
+    members = []
+    if payload.get("jti"):
+        members.append(f"jti:{payload['jti']}")
+    if payload.get("sub"):
+        members.append(f"user:{payload['sub']}")
+    return members
+
+
+async def _revoke(member: str, value: int, ttl_seconds: int) -> None:
+    """Store a revocation and announce it to every worker."""
+    if ttl_seconds <= 0:
+        return
+    now = time.time()
+    r = await get_redis()
+    pipe = r.pipeline(transaction=True)
+    pipe.set(_key(member), value, ex=ttl_seconds)
+    pipe.zadd(INDEX_KEY, {member: now + ttl_seconds})
+    pipe.zremrangebyscore(INDEX_KEY, "-inf", now)
+    await pipe.execute()
+    if _filter is not None:
+        _filter.add(member)
+    await publish(CHANNEL, data={"member": member})
+
+
+async def revoke_token(payload: dict[str, str | int]) -> None:
+    """Revoke one token (by its jti) until it expires."""
+    if not payload.get("jti"):
+        return
+    ttl = int(payload["exp"]) - int(time.time())
+    await _revoke(f"jti:{payload['jti']}", 1, ttl)
+
+
+async def revoke_user(user_id: uuid.UUID) -> None:
+    """Revoke every token issued to a user so far, refresh tokens included."""
+    await _revoke(f"user:{user_id}", int(time.time()), REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+
+
+async def is_revoked(payload: dict[str, str | int]) -> bool:
+    """Whether a decoded, otherwise valid token has been revoked."""
+    members = _members(payload)
+    if _filter is not None:
+        members = [member for member in members if member in _filter]
+    if not members:
+        return False
+    r = await get_redis()
+    values = await r.mget([_key(member) for member in members])
+    for member, value in zip(members, values, strict=True):
+        if value is None:
+            continue
+        if member.startswith("jti:") or int(payload.get("iat", 0)) <= int(value):
+            return True
+    return False
+
+
+async def _load() -> BloomFilter:
+    """Build a filter from every revocation that has not expired."""
+    r = await get_redis()
+    members = await r.zrangebyscore(INDEX_KEY, time.time(), "+inf")
+    bloom = BloomFilter(
+        max(TOKEN_REVOCATION_BLOOM_CAPACITY, 2 * len(members)), TOKEN_REVOCATION_BLOOM_ERROR_RATE
+    )
+    for member in members:
+        bloom.add(member)
+    return bloom
+
+
+async def _follow() -> None:
+    """Keep this worker's filter current: new revocations and periodic reloads."""
+    global _filter  # noqa: PLW0603
+    async with broker.subscribe(CHANNEL) as queue:
+        while True:
+            try:
+                _filter = await _load()
+            except Exception:
+                logger.exception("Loading token revocations failed, checking Redis meanwhile")
+                _filter = None
+            deadline = time.monotonic() + TOKEN_REVOCATION_REBUILD_SECONDS
+            while (timeout := deadline - time.monotonic()) > 0:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout)
+                except TimeoutError:
+                    break
+                if _filter is not None:
+                    _filter.add(message["member"])
+
+
+def start() -> None:
+    """Start loading and following revocations (after the broker is started)."""
+    global _listener  # noqa: PLW0603
+    _listener = asyncio.create_task(_follow(), name="token-revocations")
+
+
+async def stop() -> None:
+    """Stop following revocations; checks go to Redis again."""
+    global _filter, _listener  # noqa: PLW0603
+    if _listener is not None:
+        _listener.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _listener
+        _listener = None
+    _filter = None
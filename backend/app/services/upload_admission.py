@@ -0,0 +1,157 @@
+"""Admission control for new uploads: disk-space reservations and concurrency caps.
+
+Every active upload holds a slot in upload_admission:active (global) and
+upload_admission:org:{org_id} (sorted sets scored by expiry time) and a
+byte reservation in upload_admission:bytes. /uploads/init admits a new
+upload only if the organization and the whole service are below their
+concurrency caps and the reservations still fit in the free space of the
+storage volume. The check and the reservation are one Lua script, so
+parallel inits cannot over-commit the disk.
+
+A reservation is the part of the file not yet on disk: chunk uploads
+shrink it as they progress (free space already accounts for what was
+written) and keep the slot alive; slots of abandoned uploads expire after
+UPLOAD_ADMISSION_IDLE_SECONDS. Preallocated files hold no reservation once
+created, their chunks only keep the slot alive.
+"""
+
+import logging
+import time
+import uuid
+
+from redis.commands.core import AsyncScript
+
+from app.config import settings
+from app.constants import UPLOAD_ADMISSION_IDLE_SECONDS, UPLOAD_ADMISSION_RETRY_SECONDS
+from app.core.redis import get_redis
+from app.exceptions import RateLimitError
+from app.services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+_ACTIVE_KEY = "upload_admission:active"
+_BYTES_KEY = "upload_admission:bytes"
+
+# KEYS: active, org active, bytes
+# ARGV: upload_id, size, now, expires_at, max per org, max total, capacity (-1 = unbounded)
+# Returns 0 when admitted, otherwise the reason (see _REFUSALS).
+_ADMIT_LUA = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+if #expired > 0 then
+  redis.call('ZREM', KEYS[1], unpack(expired))
+  redis.call('HDEL', KEYS[3], unpack(expired))
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[3])
+if redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[5]) then return 1 end
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[6]) then return 2 end
+local capacity = tonumber(ARGV[7])
+if capacity >= 0 then
+  local reserved = 0
+  for _, v in ipairs(redis.call('HVALS', KEYS[3])) do reserved = reserved + tonumber(v) end
+  if reserved + tonumber(ARGV[2]) > capacity then return 3 end
+end
+redis.call('ZADD', KEYS[1], ARGV[4], ARGV[1])
+redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+return 0
+"""
+
+# KEYS: active, org active, bytes; ARGV: upload_id, remaining bytes (-1 = keep), expires_at
+# Only refreshes slots that are still held (a released upload stays released).
+_TOUCH_LUA = """
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then return 0 end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+redis.call('ZADD', KEYS[2], 'XX', ARGV[3], ARGV[1])
+if tonumber(ARGV[2]) >= 0 then redis.call('HSET', KEYS[3], ARGV[1], ARGV[2]) end
+return 1
+"""
+
+_REFUSALS = {
+    1: "Слишком много одновременных загрузок у организации, дождитесь завершения текущих",
+    2: "Сервис загружен, повторите попытку позже",
+    3: "Недостаточно места в хранилище, повторите попытку позже",
+}
+
+_admit_script: AsyncScript | None = None
+_touch_script: AsyncScript | None = None
+
+
+def _org_key(organization_id: uuid.UUID) -> str:
+    """Return the Redis key of the organization's active uploads."""
+    return f"upload_admission:org:{organization_id}"
+
+
+async def _scripts() -> tuple[AsyncScript, AsyncScript]:
+    """Register the Lua scripts once (EVALSHA afterwards)."""
+    global _admit_script, _touch_script  # noqa: PLW0603
+    if _admit_script is None or _touch_script is None:
+        r = await get_redis()
+        _admit_script = r.register_script(_ADMIT_LUA)
+        _touch_script = r.register_script(_TOUCH_LUA)
+    return _admit_script, _touch_script
+
+
+async def admit(organization_id: uuid.UUID, upload_id: uuid.UUID, size_bytes: int) -> None:
+    """Reserve a slot and disk space for a new upload.
+
+    Args:
+        organization_id: Owning organization UUID.
+        upload_id: The new upload session UUID.
+        size_bytes: Announced file size.
+
+    Raises:
+        RateLimitError: 429 with Retry-After if the upload cannot start now.
+    """
+    free = await get_storage().free_bytes()
+    capacity = -1 if free is None else max(0, free - settings.UPLOAD_DISK_RESERVE_BYTES)
+    now = int(time.time())
+    admit_script, _ = await _scripts()
+    result = await admit_script(
+        keys=[_ACTIVE_KEY, _org_key(organization_id), _BYTES_KEY],
+        args=[
+            str(upload_id),
+            size_bytes,
+            now,
+            now + UPLOAD_ADMISSION_IDLE_SECONDS,
+            settings.UPLOAD_MAX_ACTIVE_PER_ORG,
+            settings.UPLOAD_MAX_ACTIVE_TOTAL,
+            capacity,
+        ],
+    )
+    if int(result):
+        logger.warning(
+            "Upload of %d bytes for org %s refused (reason %s)", size_bytes, organization_id, result
+        )
+        raise RateLimitError(_REFUSALS[int(result)], retry_after=UPLOAD_ADMISSION_RETRY_SECONDS)
+
+
+async def touch(
+    organization_id: uuid.UUID, upload_id: uuid.UUID, remaining_bytes: int | None = None
+) -> None:
+    """Keep an active upload's slot alive and optionally shrink its reservation.
+
+    Args:
+        organization_id: Owning organization UUID.
+        upload_id: The upload session UUID.
+        remaining_bytes: Bytes of the file not yet written to storage, or
+            None to keep the current reservation.
+    """
+    _, touch_script = await _scripts()
+    await touch_script(
+        keys=[_ACTIVE_KEY, _org_key(organization_id), _BYTES_KEY],
+        args=[
+            str(upload_id),
+            -1 if remaining_bytes is None else max(0, remaining_bytes),
+            int(time.time()) + UPLOAD_ADMISSION_IDLE_SECONDS,
+        ],
+    )
+
+
+async def release(organization_id: uuid.UUID, upload_id: uuid.UUID) -> None:
+    """Free the slot and reservation of a finished or abandoned upload."""
+    r = await get_redis()
+    pipe = r.pipeline()
+    pipe.zrem(_ACTIVE_KEY, str(upload_id))
+    pipe.zrem(_org_key(organization_id), str(upload_id))
+    pipe.hdel(_BYTES_KEY, str(upload_id))
+    await pipe.execute()
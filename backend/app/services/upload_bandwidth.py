@@ -0,0 +1,102 @@
+"""Per-organization upload bandwidth shaping (token bucket in Redis).
+
+Every organization has one bucket, upload_bandwidth:{org_id}, shared by all
+of its concurrent chunk PUTs on every worker. It refills at the rate of the
+organization's plan (UPLOAD_RATE_* settings) and holds at most
+UPLOAD_BANDWIDTH_BURST_SECONDS of it. The chunk body is drawn from the
+bucket every UPLOAD_WRITE_BUFFER_BYTES; when the bucket is in debt the
+request stops reading for the time needed to pay it back, and TCP flow
+control slows the client down. One large upload therefore cannot take more
+than its plan's share of the uplink, however many chunks it sends at once.
+
+The bucket uses the Redis server clock, so workers on different hosts
+agree on refill times.
+"""
+
+import asyncio
+import uuid
+from collections.abc import AsyncIterator
+
+from redis.commands.core import AsyncScript
+
+from app.config import settings
+from app.constants import (
+    PLAN_BUSINESS,
+    PLAN_CORPORATION,
+    PLAN_START,
+    UPLOAD_BANDWIDTH_BURST_SECONDS,
+    UPLOAD_WRITE_BUFFER_BYTES,
+)
+from app.core.redis import get_redis
+
+# KEYS: bucket; ARGV: bytes taken, rate (bytes/s), burst (bytes)
+# Takes the bytes even if that leaves the bucket in debt and returns the
+# seconds until the debt is paid (0 when there was enough).
+_TAKE_LUA = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1e6
+local rate = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate) - tonumber(ARGV[1])
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+if tokens >= 0 then return '0' end
+return tostring(-tokens / rate)
+"""
+
+_take_script: AsyncScript | None = None
+
+
+def _key(organization_id: uuid.UUID) -> str:
+    """Return the Redis key of the organization's bandwidth bucket."""
+    return f"upload_bandwidth:{organization_id}"
+
+
+def plan_rate(plan: str) -> int:
+    """Return the upload rate of a plan in bytes per second (0 = unlimited)."""
+    rates = {
+        PLAN_START: settings.UPLOAD_RATE_START,
+        PLAN_BUSINESS: settings.UPLOAD_RATE_BUSINESS,
+        PLAN_CORPORATION: settings.UPLOAD_RATE_CORPORATION,
+    }
+    return rates.get(plan, settings.UPLOAD_RATE_TRIAL)
+
+
+async def take(organization_id: uuid.UUID, nbytes: int, rate: int) -> float:
+    """Draw bytes from the organization's bucket.
+
+    Returns:
+        Seconds to wait before sending more (0 if the bucket had enough).
+    """
+    global _take_script  # noqa: PLW0603
+    if _take_script is None:
+        r = await get_redis()
+        _take_script = r.register_script(_TAKE_LUA)
+    burst = rate * UPLOAD_BANDWIDTH_BURST_SECONDS
+    wait = await _take_script(keys=[_key(organization_id)], args=[nbytes, rate, burst])
+    return float(wait)
+
+
+async def throttle(
+    stream: AsyncIterator[bytes], organization_id: uuid.UUID, plan: str
+) -> AsyncIterator[bytes]:
+    """Yield a chunk body no faster than the organization's plan allows."""
+    rate = plan_rate(plan)
+    if rate <= 0:
+        async for data in stream:
+            yield data
+        return
+    pending = 0
+    async for data in stream:
+        yield data
+        pending += len(data)
+        if pending >= UPLOAD_WRITE_BUFFER_BYTES:
+            wait = await take(organization_id, pending, rate)
+            pending = 0
+            if wait > 0:
+                await asyncio.sleep(wait)
+    if pending:
+        await take(organization_id, pending, rate)
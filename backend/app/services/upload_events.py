@@ -0,0 +1,59 @@
+"""Upload progress events, pushed to SSE subscribers through Redis pub/sub.
+
+Every event goes to upload_events:{upload_id} (the uploader's dashboard)
+and upload_events:admin (the admin upload queue) in one round trip. The
+payload mirrors the progress fields of UploadStatusResponse.
+"""
+
+import uuid
+from typing import Any
+
+from app.constants import (
+    UPLOAD_STATUS_ERROR,
+    UPLOAD_STATUS_EXPIRED,
+    UPLOAD_STATUS_PROCESSED,
+    UPLOAD_STATUS_UPLOADED,
+)
+from app.core.pubsub import publish
+
+ADMIN_CHANNEL = "upload_events:admin"
+
+# Statuses after which an upload's stream ends
+FINAL_STATUSES = frozenset(
+    {UPLOAD_STATUS_UPLOADED, UPLOAD_STATUS_PROCESSED, UPLOAD_STATUS_ERROR, UPLOAD_STATUS_EXPIRED}
+)
+
+
+def channel(upload_id: uuid.UUID) -> str:
+    """Return the pub/sub channel of one upload."""
+    return f"upload_events:{upload_id}"
+
+
+def make_event(
+    upload_id: uuid.UUID,
+    organization_id: uuid.UUID,
+    status: str,
+    chunks_received: int,
+    chunks_expected: int,
+    size_bytes: int,
+    chunk_size: int,
+) -> dict[str, Any]:
+    """Build the event payload; bytes_received is derived from the chunk count."""
+    return {
+        "upload_id": str(upload_id),
+        "organization_id": str(organization_id),
+        "status": status,
+        "chunks_received": chunks_received,
+        "chunks_expected": chunks_expected,
+        "bytes_received": min(chunks_received * chunk_size, size_bytes),
+    }
+
+
+def is_final(event: dict[str, Any]) -> bool:
+    """Whether no more events follow for this upload."""
+    return event.get("status") in FINAL_STATUSES
+
+
+async def emit(event: dict[str, Any]) -> None:
+    """Publish an event to the upload's channel and the admin channel."""
+    await publish(channel(uuid.UUID(event["upload_id"])), ADMIN_CHANNEL, data=event)
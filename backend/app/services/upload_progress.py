@@ -0,0 +1,314 @@
+"""Received-chunk bitmap for resumable uploads (Redis SETBIT / BITCOUNT).
+
+Bit N of upload_chunks:{upload_id} is set once chunk N is stored, so a client
+can resume only the gaps without a DB row update on every chunk. The SHA-256
+of every chunk is kept in upload_sha256:{upload_id}, which gives the
+whole-file digest on completion without reading the file again.
+
+Per-connection throughput of an organization's chunks is accumulated in
+upload_throughput:{org_id} and used to negotiate the chunk size of its
+next upload.
+"""
+
+import hashlib
+import math
+import uuid
+
+from app.constants import (
+    CHUNK_SIZE_BYTES,
+    UPLOAD_BITMAP_TTL_SECONDS,
+    UPLOAD_CHUNK_ALIGN_BYTES,
+    UPLOAD_MAX_CHUNK_BYTES,
+    UPLOAD_MAX_CHUNKS,
+    UPLOAD_TARGET_CHUNK_SECONDS,
+    UPLOAD_TARGET_CHUNKS,
+    UPLOAD_THROUGHPUT_DECAY,
+    UPLOAD_TOKEN_EXPIRE_MINUTES,
+)
+from app.core.redis import get_redis
+
+_WORD_BITS = 32
+
+
+def _key(upload_id: uuid.UUID) -> str:
+    """Return the Redis key of the upload's chunk bitmap."""
+    return f"upload_chunks:{upload_id}"
+
+
+def _digests_key(upload_id: uuid.UUID) -> str:
+    """Return the Redis key of the upload's per-chunk SHA-256 digests."""
+    return f"upload_sha256:{upload_id}"
+
+
+def _started_key(upload_id: uuid.UUID) -> str:
+    """Return the Redis key set by the first chunk the client sends."""
+    return f"upload_started:{upload_id}"
+
+
+def _closed_key(upload_id: uuid.UUID) -> str:
+    """Return the Redis key that refuses chunks of a finished upload."""
+    return f"upload_closed:{upload_id}"
+
+
+def _path_key(upload_id: uuid.UUID) -> str:
+    """Return the Redis key caching the upload's storage location."""
+    return f"upload_path:{upload_id}"
+
+
+def _throughput_key(organization_id: uuid.UUID) -> str:
+    """Return the Redis key of the organization's chunk throughput totals."""
+    return f"upload_throughput:{organization_id}"
+
+
+async def mark_chunk(
+    upload_id: uuid.UUID,
+    chunk_number: int,
+    sha256: str,
+    organization_id: uuid.UUID,
+    size: int,
+    seconds: float,
+) -> tuple[bool, int, bool]:
+    """Mark a chunk as received, remember its digest and throughput (one round trip).
+
+    Args:
+        upload_id: The upload session UUID.
+        chunk_number: Zero-based chunk index.
+        sha256: Hex SHA-256 of the chunk.
+        organization_id: Owning organization UUID.
+        size: Chunk size in bytes.
+        seconds: Time it took to receive the chunk.
+
+    Returns:
+        Tuple of (whether the chunk is new, total chunks received, whether
+        this is the first chunk sent by the client).
+    """
+    r = await get_redis()
+    key = _key(upload_id)
+    digests_key = _digests_key(upload_id)
+    throughput_key = _throughput_key(organization_id)
+    pipe = r.pipeline()
+    pipe.set(_started_key(upload_id), 1, nx=True, ex=UPLOAD_BITMAP_TTL_SECONDS)
+    pipe.hset(digests_key, str(chunk_number), sha256)
+    pipe.expire(digests_key, UPLOAD_BITMAP_TTL_SECONDS)
+    pipe.setbit(key, chunk_number, 1)
+    pipe.bitcount(key)
+    pipe.expire(key, UPLOAD_BITMAP_TTL_SECONDS)
+    pipe.hincrbyfloat(throughput_key, "bytes", size)
+    pipe.hincrbyfloat(throughput_key, "seconds", seconds)
+    pipe.expire(throughput_key, UPLOAD_BITMAP_TTL_SECONDS)
+    first, _, _, previous, count, *_ = await pipe.execute()
+    return previous == 0, int(count), bool(first)
+
+
+async def get_throughput(organization_id: uuid.UUID) -> float | None:
+    """Return the organization's recent bytes per second per connection.
+
+    Totals are decayed by UPLOAD_THROUGHPUT_DECAY on every read (one read
+    per new upload), so each upload weighs as much as all older ones
+    together: an exponentially weighted average without per-chunk writes.
+
+    Returns:
+        Bytes per second, or None if nothing was measured yet.
+    """
+    r = await get_redis()
+    key = _throughput_key(organization_id)
+    size, seconds = await r.hmget(key, ["bytes", "seconds"])
+    if not size or not seconds or float(seconds) <= 0:
+        return None
+    await r.hset(
+        key,
+        mapping={
+            "bytes": float(size) * UPLOAD_THROUGHPUT_DECAY,
+            "seconds": float(seconds) * UPLOAD_THROUGHPUT_DECAY,
+        },
+    )
+    return float(size) / float(seconds)
+
+
+def choose_chunk_size(size_bytes: int, throughput: float | None) -> int:
+    """Negotiate the chunk size of a new upload.
+
+    Aims for UPLOAD_TARGET_CHUNKS chunks, but no bigger than what the client
+    sends in UPLOAD_TARGET_CHUNK_SECONDS (a failed chunk is re-sent whole),
+    within [CHUNK_SIZE_BYTES, UPLOAD_MAX_CHUNK_BYTES], and always few enough
+    chunks for UPLOAD_MAX_CHUNKS.
+
+    Args:
+        size_bytes: File size.
+        throughput: Recent bytes per second per connection, if known.
+
+    Returns:
+        Chunk size in bytes, a multiple of UPLOAD_CHUNK_ALIGN_BYTES.
+    """
+    target = size_bytes / UPLOAD_TARGET_CHUNKS
+    if throughput is not None:
+        target = min(target, throughput * UPLOAD_TARGET_CHUNK_SECONDS)
+    target = max(target, size_bytes / UPLOAD_MAX_CHUNKS)
+    chunk = math.ceil(target / UPLOAD_CHUNK_ALIGN_BYTES) * UPLOAD_CHUNK_ALIGN_BYTES
+    return min(max(chunk, CHUNK_SIZE_BYTES), UPLOAD_MAX_CHUNK_BYTES)
+
+
+async def mark_chunks(upload_id: uuid.UUID, digests: dict[int, str]) -> None:
+    """Mark several chunks as received at once (used for deduplicated chunks).
+
+    Args:
+        upload_id: The upload session UUID.
+        digests: Mapping of chunk number to hex SHA-256.
+    """
+    if not digests:
+        return
+    r = await get_redis()
+    key = _key(upload_id)
+    digests_key = _digests_key(upload_id)
+    pipe = r.pipeline()
+    pipe.hset(digests_key, mapping={str(n): d for n, d in digests.items()})
+    pipe.expire(digests_key, UPLOAD_BITMAP_TTL_SECONDS)
+    for n in digests:
+        pipe.setbit(key, n, 1)
+    pipe.expire(key, UPLOAD_BITMAP_TTL_SECONDS)
+    await pipe.execute()
+
+
+async def unmark_chunks(upload_id: uuid.UUID, chunk_numbers: list[int]) -> None:
+    """Clear chunks so that the client re-sends them."""
+    if not chunk_numbers:
+        return
+    r = await get_redis()
+    pipe = r.pipeline()
+    for n in chunk_numbers:
+        pipe.setbit(_key(upload_id), n, 0)
+    pipe.hdel(_digests_key(upload_id), *[str(n) for n in chunk_numbers])
+    await pipe.execute()
+
+
+async def received_count(upload_id: uuid.UUID) -> int:
+    """Return the number of chunks received so far."""
+    r = await get_redis()
+    return int(await r.bitcount(_key(upload_id)))
+
+
+async def idle_seconds(upload_ids: list[uuid.UUID]) -> list[int | None]:
+    """Return how long ago each upload last received a chunk (one round trip).
+
+    Every chunk resets the bitmap TTL, so the idle time is
+    UPLOAD_BITMAP_TTL_SECONDS minus the TTL left.
+
+    Returns:
+        Seconds per upload, in order; None if it has no bitmap (no chunk
+        received yet, or the bitmap expired).
+    """
+    if not upload_ids:
+        return []
+    r = await get_redis()
+    pipe = r.pipeline()
+    for upload_id in upload_ids:
+        pipe.ttl(_key(upload_id))
+    ttls = await pipe.execute()
+    return [UPLOAD_BITMAP_TTL_SECONDS - int(ttl) if ttl >= 0 else None for ttl in ttls]
+
+
+async def get_missing_ranges(upload_id: uuid.UUID, chunks_expected: int) -> list[tuple[int, int]]:
+    """Return the chunk ranges that have not been received yet.
+
+    The bitmap is read in 32-bit words with a single BITFIELD call.
+
+    Args:
+        upload_id: The upload session UUID.
+        chunks_expected: Total number of chunks in the upload.
+
+    Returns:
+        List of inclusive (first, last) chunk ranges.
+    """
+    r = await get_redis()
+    op = r.bitfield(_key(upload_id))
+    for i in range(math.ceil(chunks_expected / _WORD_BITS)):
+        op.get(f"u{_WORD_BITS}", f"#{i}")
+    words = await op.execute() if chunks_expected else []
+    return ranges_from_words(words, chunks_expected)
+
+
+def ranges_from_words(words: list[int], chunks_expected: int) -> list[tuple[int, int]]:
+    """Convert bitmap words (MSB first, like SETBIT offsets) into missing ranges.
+
+    Args:
+        words: Unsigned 32-bit words of the bitmap.
+        chunks_expected: Total number of chunks.
+
+    Returns:
+        List of inclusive (first, last) ranges of unset bits.
+    """
+    ranges: list[tuple[int, int]] = []
+    start: int | None = None
+    for n in range(chunks_expected):
+        word = words[n // _WORD_BITS] if n // _WORD_BITS < len(words) else 0
+        received = (word >> (_WORD_BITS - 1 - n % _WORD_BITS)) & 1
+        if not received and start is None:
+            start = n
+        elif received and start is not None:
+            ranges.append((start, n - 1))
+            start = None
+    if start is not None:
+        ranges.append((start, chunks_expected - 1))
+    return ranges
+
+
+async def get_chunk_digests(upload_id: uuid.UUID, chunks_expected: int) -> list[str] | None:
+    """Return the per-chunk SHA-256 digests in chunk order.
+
+    Returns:
+        List of hex digests, or None if a chunk digest is missing.
+    """
+    r = await get_redis()
+    fields = [str(n) for n in range(chunks_expected)]
+    digests = await r.hmget(_digests_key(upload_id), fields) if fields else []
+    if any(d is None for d in digests):
+        return None
+    return list(digests)
+
+
+def composite_digest(chunk_digests: list[str]) -> str:
+    """Whole-file digest: SHA-256 over the concatenated binary chunk SHA-256s.
+
+    Same construction as S3 composite checksums; clients compute it from
+    the chunks they send, in chunk order.
+    """
+    h = hashlib.sha256()
+    for digest in chunk_digests:
+        h.update(bytes.fromhex(digest))
+    return h.hexdigest()
+
+
+async def set_storage_path(upload_id: uuid.UUID, storage_path: str) -> None:
+    """Cache where the upload's chunks go, so chunk PUTs need no DB lookup."""
+    r = await get_redis()
+    await r.set(_path_key(upload_id), storage_path, ex=UPLOAD_BITMAP_TTL_SECONDS)
+
+
+async def get_storage_path(upload_id: uuid.UUID) -> tuple[str | None, bool]:
+    """Return the cached storage path and whether the upload is closed (one round trip).
+
+    Returns:
+        Tuple of (storage path, or None if not cached; whether the upload
+        no longer accepts chunks).
+    """
+    r = await get_redis()
+    pipe = r.pipeline(transaction=False)
+    pipe.get(_path_key(upload_id))
+    pipe.exists(_closed_key(upload_id))
+    storage_path, closed = await pipe.execute()
+    return storage_path, bool(closed)
+
+
+async def clear(upload_id: uuid.UUID) -> None:
+    """Delete the bitmap, chunk digests and cached path once the upload is finished.
+
+    Also refuses further chunks for as long as an upload token may live,
+    since token holders are not checked against the upload row.
+    """
+    r = await get_redis()
+    pipe = r.pipeline()
+    pipe.delete(
+        _key(upload_id), _digests_key(upload_id), _started_key(upload_id), _path_key(upload_id)
+    )
+    pipe.set(_closed_key(upload_id), 1, ex=UPLOAD_TOKEN_EXPIRE_MINUTES * 60)
+    await pipe.execute()
@@ -0,0 +1,270 @@
+"""Two-tier cache of the User row loaded by get_current_user.
+
+Tier one is a small LRU in every worker, tier two a Redis hash
+user_cache:{user_id} with one field per column. A hit is rebuilt into a
+detached User and merged into the request's session without a SELECT, so
+handlers can still modify and flush it as usual.
+
+Every flush that changes or deletes a User records its id in the session
+(before_flush listener); after the commit (after_commit listener) those
+entries are dropped from Redis and, through the user_cache:invalidate
+channel, from the LRU of every worker. The listeners are registered on the
+Session class, so sessions opened by workers and scripts invalidate too;
+get_db waits for the invalidation before the response goes out.
+USER_CACHE_LOCAL_TTL_SECONDS bounds how long a worker can serve a stale row
+if it misses an invalidation message.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, SessionTransaction, make_transient_to_detached
+
+from app.constants import (
+    USER_CACHE_GUARD_SECONDS,
+    USER_CACHE_LOCAL_SIZE,
+    USER_CACHE_LOCAL_TTL_SECONDS,
+    USER_CACHE_TTL_SECONDS,
+)
+from app.core.pubsub import broker, publish
+from app.core.redis import get_redis
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+INVALIDATE_CHANNEL = "user_cache:invalidate"
+_STALE_KEY = "user_cache_stale"
+_TASKS_KEY = "user_cache_invalidations"
+
+# Column key -> Python type, in mapper order
+_COLUMNS: dict[str, type] = {
+    attr.key: attr.columns[0].type.python_type for attr in inspect(User).column_attrs
+}
+
+# KEYS: snapshot, guard; ARGV: ttl, field, value, field, value...
+# Refuses to cache a row read before a recent invalidation (guard key set).
+_PUT_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 1 then return 0 end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+_put_script: AsyncScript | None = None
+_local: OrderedDict[uuid.UUID, tuple[float, dict[str, Any]]] = OrderedDict()
+_listener: asyncio.Task[None] | None = None
+_pending: set[asyncio.Task[None]] = set()
+
+
+def _key(user_id: uuid.UUID) -> str:
+    """Return the Redis key of a user's snapshot."""
+    return f"user_cache:{user_id}"
+
+
+def _guard_key(user_id: uuid.UUID) -> str:
+    """Return the key that blocks re-caching a user just invalidated."""
+    return f"user_cache:{user_id}:guard"
+
+
+def encode(user: User) -> dict[str, str]:
+    """Serialize the columns of a user into hash fields; NULL columns are left out."""
+    fields = {}
+    for key in _COLUMNS:
+        value = getattr(user, key)
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            fields[key] = "1" if value else "0"
+        elif isinstance(value, datetime):
+            fields[key] = value.isoformat()
+        else:
+            fields[key] = str(value)
+    return fields
+
+
+def decode(fields: dict[str, str]) -> dict[str, Any]:
+    """Turn hash fields back into column values."""
+    values: dict[str, Any] = {}
+    for key, python_type in _COLUMNS.items():
+        raw = fields.get(key)
+        if raw is None:
+            values[key] = None
+        elif python_type is bool:
+            values[key] = raw == "1"
+        elif python_type is datetime:
+            values[key] = datetime.fromisoformat(raw)
+        else:
+            values[key] = python_type(raw)
+    return values
+
+
+def _restore(values: dict[str, Any]) -> User:
+    """Build a detached User, with every column loaded, from cached values."""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+def _remember(user_id: uuid.UUID, values: dict[str, Any]) -> None:
+    """Put a user in the local LRU."""
+    _local[user_id] = (time.monotonic() + USER_CACHE_LOCAL_TTL_SECONDS, values)
+    _local.move_to_end(user_id)
+    while len(_local) > USER_CACHE_LOCAL_SIZE:
+        _local.popitem(last=False)
+
+
+def _evict(user_ids: list[str]) -> None:
+    """Drop users from the local LRU."""
+    for user_id in user_ids:
+        _local.pop(uuid.UUID(user_id), None)
+
+
+async def get(user_id: uuid.UUID) -> User | None:
+    """Return a detached copy of a cached user, or None on a miss.
+
+    Redis errors count as a miss, so authentication falls back to the database.
+    """
+    entry = _local.get(user_id)
+    if entry is not None:
+        expires, values = entry
+        if expires > time.monotonic():
+            _local.move_to_end(user_id)
+            return _restore(values)
+        del _local[user_id]
+    try:
+        r = await get_redis()
+        fields = await r.hgetall(_key(user_id))
+    except RedisError:
+        logger.warning("User cache unavailable, loading user %s from the database", user_id)
+        return None
+    if not fields:
+        return None
+    values = decode(fields)
+    _remember(user_id, values)
+    return _restore(values)
+
+
+async def put(user: User) -> None:
+    """Cache a user freshly loaded from the database.
+
+    A user invalidated in the last USER_CACHE_GUARD_SECONDS is not cached:
+    the row may have been read before the commit that changed it.
+    """
+    global _put_script  # noqa: PLW0603
+    fields = encode(user)
+    try:
+        if _put_script is None:
+            r = await get_redis()
+            _put_script = r.register_script(_PUT_LUA)
+        args = [USER_CACHE_TTL_SECONDS, *(item for pair in fields.items() for item in pair)]
+        cached = await _put_script(keys=[_key(user.id), _guard_key(user.id)], args=args)
+    except RedisError:
+        logger.warning("User cache unavailable, user %s not cached", user.id)
+        return
+    if cached:
+        _remember(user.id, decode(fields))
+
+
+async def invalidate(*user_ids: uuid.UUID) -> None:
+    """Drop users from Redis and from the LRU of every worker.
+
+    Redis errors are logged and not raised: the commit already happened, and
+    stale entries expire after USER_CACHE_TTL_SECONDS (USER_CACHE_LOCAL_TTL_SECONDS
+    in the LRU of other workers).
+    """
+    if not user_ids:
+        return
+    _evict([str(user_id) for user_id in user_ids])
+    try:
+        r = await get_redis()
+        pipe = r.pipeline(transaction=True)
+        for user_id in user_ids:
+            pipe.delete(_key(user_id))
+            pipe.set(_guard_key(user_id), 1, ex=USER_CACHE_GUARD_SECONDS)
+        await pipe.execute()
+        await publish(INVALIDATE_CHANNEL, data={"user_ids": [str(u) for u in user_ids]})
+    except RedisError:
+        logger.warning("User cache unavailable, users %s expire by TTL", user_ids)
+
+
+def stale_users(session: Session) -> list[uuid.UUID]:
+    """Take the ids of the users changed by a session's flushes."""
+    return list(session.info.pop(_STALE_KEY, ()))
+
+
+@event.listens_for(Session, "before_flush")
+def _track_user_changes(session: Session, flush_context: Any, instances: Any) -> None:
+    """Record users about to be updated or deleted, to invalidate after commit."""
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            session.info.setdefault(_STALE_KEY, set()).add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj):
+            session.info.setdefault(_STALE_KEY, set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    """Schedule the invalidation of the users a commit changed."""
+    user_ids = stale_users(session)
+    if not user_ids:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.warning("No event loop to invalidate users %s, they expire by TTL", user_ids)
+        return
+    task = loop.create_task(invalidate(*user_ids))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+    session.info.setdefault(_TASKS_KEY, []).append(task)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back(session: Session, previous_transaction: SessionTransaction) -> None:
+    """Drop the users recorded by flushes that were rolled back."""
+    if previous_transaction.parent is None:
+        session.info.pop(_STALE_KEY, None)
+
+
+async def wait_invalidated(session: Session) -> None:
+    """Wait for the invalidations scheduled by a session's commits."""
+    tasks = session.info.pop(_TASKS_KEY, [])
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def _listen() -> None:
+    """Evict users invalidated by any worker from the local LRU."""
+    async with broker.subscribe(INVALIDATE_CHANNEL) as queue:
+        while True:
+            message = await queue.get()
+            _evict(message.get("user_ids", []))
+
+
+def start() -> None:
+    """Start following invalidations (after the broker is started)."""
+    global _listener  # noqa: PLW0603
+    _listener = asyncio.create_task(_listen(), name="user-cache-invalidation")
+
+
+async def stop() -> None:
+    """Stop following invalidations."""
+    global _listener  # noqa: PLW0603
+    if _listener is not None:
+        _listener.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _listener
+        _listener = None
+    if _pending:
+        await asyncio.gather(*_pending)
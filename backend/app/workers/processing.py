@@ -0,0 +1,450 @@
+"""Post-upload processing worker: verify, restore, size, compress.
+
+Runs as its own process (python -m app.workers.processing), never in the
+API's BackgroundTasks: verifying re-reads the whole file. /complete
+enqueues the first stage through app.services.job_queue; every stage
+hands the job to the next one when it succeeds:
+
+- verify: size, .dt / .bak header and chunk digests of the stored file
+  against the upload row; the upload moves to "processing".
+- restore: creates the Database record in "preparing". Restoring into the
+  1C cluster is still done by an admin; this stage is its stub.
+- size: Database.size_gb from the stored file.
+- compress: stores the file zstd-compressed (seekable format, frames
+  compressed in a process pool) if a sample of it compresses well; .bak
+  files usually do, .dt files do not. Uploads record the stored size.
+  Compressing removes the file the admin restores from, so the job is
+  postponed by PROCESSING_COMPRESS_WAIT_SECONDS while the Database is
+  still "preparing".
+
+After size the upload moves to "processed"; compress runs on processed
+uploads only.
+
+/complete enqueues the first stage right after its commit; uploads left
+"uploaded" without a verify job for PROCESSING_REQUEUE_SECONDS (Redis
+failed in between) are queued again by requeue_lost().
+
+Each stage has its own concurrency limit (per worker process) and
+visibility timeout. Failed jobs are retried with exponential backoff up
+to PROCESSING_MAX_ATTEMPTS times; ProcessingError fails the upload at once.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import socket
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import PurePath
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.constants import (
+    COMPRESSION_SAMPLE_BYTES,
+    CONFIG_CODES,
+    DB_STATUS_PREPARING,
+    PROCESSING_COMPRESS_CONCURRENCY,
+    PROCESSING_COMPRESS_WAIT_SECONDS,
+    PROCESSING_DEFAULT_CONCURRENCY,
+    PROCESSING_MAX_ATTEMPTS,
+    PROCESSING_POLL_SECONDS,
+    PROCESSING_REQUEUE_INTERVAL_SECONDS,
+    PROCESSING_REQUEUE_SECONDS,
+    PROCESSING_RESTORE_CONCURRENCY,
+    PROCESSING_RETRY_BASE_SECONDS,
+    PROCESSING_STAGE_COMPRESS,
+    PROCESSING_STAGE_RESTORE,
+    PROCESSING_STAGE_SIZE,
+    PROCESSING_STAGE_VERIFY,
+    PROCESSING_VERIFY_CONCURRENCY,
+    PROCESSING_VISIBILITY_SECONDS,
+    UPLOAD_COMPRESSION_ZSTD,
+    UPLOAD_STATUS_ERROR,
+    UPLOAD_STATUS_PROCESSED,
+    UPLOAD_STATUS_PROCESSING,
+    UPLOAD_STATUS_UPLOADED,
+)
+from app.database import async_session_factory
+from app.models import Database, Upload
+from app.services import compression, file_format, job_queue, upload_events, upload_progress
+from app.services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+_GIB = Decimal(1024**3)
+_SIZE_GB_STEP = Decimal("0.01")
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _workers() -> int:
+    """Return the number of compression processes."""
+    return settings.COMPRESSION_WORKERS or os.cpu_count() or 1
+
+
+def _executor() -> ProcessPoolExecutor:
+    """Return the process pool for CPU-bound work (created on first use)."""
+    global _pool  # noqa: PLW0603
+    if _pool is None:
+        _pool = ProcessPoolExecutor(_workers())
+    return _pool
+
+
+class ProcessingError(Exception):
+    """A stage failure that retrying cannot fix (the upload fails at once)."""
+
+
+class NotReadyError(Exception):
+    """A stage must wait for something outside the pipeline; the job is postponed."""
+
+    def __init__(self, reason: str, delay_seconds: float) -> None:
+        """Initialize with what the stage waits for and when to check again."""
+        super().__init__(reason)
+        self.delay_seconds = delay_seconds
+
+
+Handler = Callable[[Upload, dict[str, str]], Awaitable[dict[str, str]]]
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of the pipeline.
+
+    Jobs of uploads not in one of `statuses` are dropped; `done_status`, if
+    set, is the upload's status once the stage succeeds.
+    """
+
+    name: str
+    handler: Handler
+    concurrency: int = PROCESSING_DEFAULT_CONCURRENCY
+    visibility_seconds: int = PROCESSING_VISIBILITY_SECONDS
+    statuses: tuple[str, ...] = (UPLOAD_STATUS_UPLOADED, UPLOAD_STATUS_PROCESSING)
+    done_status: str | None = None
+
+
+async def _set_status(upload: Upload, status: str) -> None:
+    """Move an uploaded / processing upload to `status` and announce it.
+
+    Uploads in any other status are left alone and nothing is announced.
+    """
+    async with async_session_factory() as db:
+        result = await db.execute(
+            update(Upload)
+            .where(
+                Upload.id == upload.id,
+                Upload.status.in_([UPLOAD_STATUS_UPLOADED, UPLOAD_STATUS_PROCESSING]),
+            )
+            .values(status=status)
+        )
+        await db.commit()
+    if not result.rowcount:
+        return
+    await upload_events.emit(
+        upload_events.make_event(
+            upload.id,
+            upload.organization_id,
+            status,
+            upload.chunks_expected,
+            upload.chunks_expected,
+            upload.size_bytes,
+            upload.chunk_size,
+        )
+    )
+
+
+async def verify(upload: Upload, data: dict[str, str]) -> dict[str, str]:
+    """Re-read the stored file and check it against the upload row.
+
+    Raises:
+        ProcessingError: If the file is missing, truncated, not a .dt / .bak
+            or its chunk digests do not give checksum_sha256.
+    """
+    location = data["location"]
+    backend = get_storage()
+    if not await backend.exists(location):
+        raise ProcessingError(f"{location} does not exist")
+    await _set_status(upload, UPLOAD_STATUS_PROCESSING)
+
+    header = b""
+    digests: list[str] = []
+    chunk = hashlib.sha256()
+    in_chunk = 0
+    total = 0
+    async for piece in backend.read(location):
+        if len(header) < file_format.SNIFF_BYTES:
+            header += piece[: file_format.SNIFF_BYTES - len(header)]
+        view = memoryview(piece)
+        while view:
+            take = min(len(view), upload.chunk_size - in_chunk)
+            await asyncio.to_thread(chunk.update, view[:take])
+            view = view[take:]
+            in_chunk += take
+            total += take
+            if in_chunk == upload.chunk_size:
+                digests.append(chunk.hexdigest())
+                chunk, in_chunk = hashlib.sha256(), 0
+    if in_chunk:
+        digests.append(chunk.hexdigest())
+
+    if total != upload.size_bytes:
+        raise ProcessingError(f"Stored {total} bytes, expected {upload.size_bytes}")
+    if file_format.detect(header) is None:
+        raise ProcessingError("Stored file is not a .dt or .bak")
+    checksum = upload_progress.composite_digest(digests)
+    if upload.checksum_sha256 is not None and checksum != upload.checksum_sha256:
+        raise ProcessingError("Stored file does not match checksum_sha256")
+    return data | {"size_bytes": str(total)}
+
+
+async def restore(upload: Upload, data: dict[str, str]) -> dict[str, str]:
+    """Create the Database record the admin deploys (once per upload)."""
+    async with async_session_factory() as db:
+        database = (
+            await db.execute(select(Database).where(Database.upload_id == upload.id))
+        ).scalar_one_or_none()
+        if database is None:
+            config_name = CONFIG_CODES.get(upload.config_code, upload.config_code)
+            database = Database(
+                organization_id=upload.organization_id,
+                upload_id=upload.id,
+                name=PurePath(upload.filename).stem or config_name,
+                db_name=upload.db_name or f"upload_{upload.id.hex}",
+                config_code=upload.config_code,
+                config_name=config_name,
+                status=DB_STATUS_PREPARING,
+            )
+            db.add(database)
+            await db.commit()
+    logger.info(
+        "Database %s prepared from upload %s, waiting for restore from %s",
+        database.db_name,
+        upload.id,
+        data["location"],
+    )
+    return data
+
+
+async def size(upload: Upload, data: dict[str, str]) -> dict[str, str]:
+    """Record the database size (the stored file size) in Database.size_gb."""
+    size_gb = (Decimal(data["size_bytes"]) / _GIB).quantize(_SIZE_GB_STEP)
+    async with async_session_factory() as db:
+        await db.execute(
+            update(Database).where(Database.upload_id == upload.id).values(size_gb=size_gb)
+        )
+        await db.commit()
+    return data
+
+
+async def compress(upload: Upload, data: dict[str, str]) -> dict[str, str]:
+    """Store the file compressed if its first COMPRESSION_SAMPLE_BYTES compress well.
+
+    Raises:
+        NotReadyError: While the Database awaits its restore from the stored file.
+    """
+    backend = get_storage()
+    location = data["location"]
+    if location.endswith(compression.ZSTD_SUFFIX):
+        return data
+    async with async_session_factory() as db:
+        db_status = (
+            await db.execute(select(Database.status).where(Database.upload_id == upload.id))
+        ).scalar_one_or_none()
+    if db_status == DB_STATUS_PREPARING:
+        raise NotReadyError(f"{location} not restored yet", PROCESSING_COMPRESS_WAIT_SECONDS)
+    sample = bytearray()
+    async for piece in backend.read(location):
+        sample += piece
+        if len(sample) >= COMPRESSION_SAMPLE_BYTES:
+            break
+    loop = asyncio.get_running_loop()
+    worth = await loop.run_in_executor(
+        _executor(), compression.is_worth_compressing, bytes(sample[:COMPRESSION_SAMPLE_BYTES])
+    )
+    if not worth:
+        return data
+    compressed = await backend.compress(location, _executor(), _workers())
+    if compressed is None:
+        return data
+    location, stored_bytes = compressed
+    async with async_session_factory() as db:
+        await db.execute(
+            update(Upload)
+            .where(Upload.id == upload.id)
+            .values(stored_bytes=stored_bytes, compression=UPLOAD_COMPRESSION_ZSTD)
+        )
+        await db.commit()
+    logger.info("Upload %s compressed: %d -> %d bytes", upload.id, upload.size_bytes, stored_bytes)
+    return data | {"location": location}
+
+
+STAGES: tuple[Stage, ...] = (
+    Stage(PROCESSING_STAGE_VERIFY, verify, concurrency=PROCESSING_VERIFY_CONCURRENCY),
+    Stage(PROCESSING_STAGE_RESTORE, restore, concurrency=PROCESSING_RESTORE_CONCURRENCY),
+    Stage(PROCESSING_STAGE_SIZE, size, done_status=UPLOAD_STATUS_PROCESSED),
+    Stage(
+        PROCESSING_STAGE_COMPRESS,
+        compress,
+        concurrency=PROCESSING_COMPRESS_CONCURRENCY,
+        statuses=(UPLOAD_STATUS_PROCESSED,),
+    ),
+)
+
+
+def _next_stage(stage: Stage) -> str | None:
+    """Return the name of the stage after `stage`, if any."""
+    names = [s.name for s in STAGES]
+    index = names.index(stage.name) + 1
+    return names[index] if index < len(names) else None
+
+
+async def _heartbeat(job: job_queue.Job, consumer: str, interval: float) -> None:
+    """Keep a running job from being reclaimed by another worker."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job_queue.heartbeat(job, consumer)
+        except Exception:
+            logger.exception("Heartbeat of %s job %s failed", job.stage, job.entry_id)
+
+
+async def _fail(upload: Upload, job: job_queue.Job, error: str) -> None:
+    """Give up on a job and mark its upload as failed."""
+    logger.error("Upload %s failed at %s: %s", upload.id, job.stage, error)
+    await job_queue.bury(job, error)
+    await _set_status(upload, UPLOAD_STATUS_ERROR)
+
+
+async def run_job(stage: Stage, job: job_queue.Job, consumer: str) -> None:
+    """Run one job and acknowledge, retry or bury it."""
+    async with async_session_factory() as db:
+        upload = await db.get(Upload, job.upload_id)
+    if upload is None or upload.status not in stage.statuses:
+        # Deleted, failed or collected meanwhile
+        await job_queue.complete(job)
+        return
+    if job.attempt >= PROCESSING_MAX_ATTEMPTS:
+        await _fail(upload, job, "out of attempts (worker lost while running)")
+        return
+
+    beat = asyncio.create_task(_heartbeat(job, consumer, stage.visibility_seconds / 3))
+    try:
+        data = await stage.handler(upload, job.data)
+    except ProcessingError as exc:
+        await _fail(upload, job, str(exc))
+        return
+    except NotReadyError as exc:
+        logger.info("Upload %s: %s postponed, %s", upload.id, job.stage, exc)
+        await job_queue.postpone(job, exc.delay_seconds)
+        return
+    except Exception as exc:
+        if job.attempt + 1 >= PROCESSING_MAX_ATTEMPTS:
+            await _fail(upload, job, repr(exc))
+        else:
+            delay = PROCESSING_RETRY_BASE_SECONDS * 2**job.attempt
+            logger.exception("Upload %s: %s failed, retry in %d s", upload.id, job.stage, delay)
+            await job_queue.retry(job, delay)
+        return
+    finally:
+        beat.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await beat
+    if stage.done_status is not None:
+        # Before the ack: if the ack is lost, the redelivered job sees the new status
+        await _set_status(upload, stage.done_status)
+    await job_queue.complete(job, _next_stage(stage), data)
+
+
+async def consume(stage: Stage, consumer: str) -> None:
+    """Run up to stage.concurrency jobs of a stage at a time, forever.
+
+    A job whose acknowledgement fails stays pending and is reclaimed after
+    the visibility timeout.
+    """
+    running: set[asyncio.Task[None]] = set()
+
+    def done(task: asyncio.Task[None]) -> None:
+        running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("%s job failed", stage.name, exc_info=task.exception())
+
+    while True:
+        if len(running) >= stage.concurrency:
+            await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            continue
+        try:
+            await job_queue.promote_due(stage.name)
+            jobs = await job_queue.fetch(
+                stage.name,
+                consumer,
+                stage.concurrency - len(running),
+                stage.visibility_seconds,
+                PROCESSING_POLL_SECONDS,
+            )
+        except Exception:
+            logger.exception("Cannot fetch %s jobs", stage.name)
+            await asyncio.sleep(PROCESSING_POLL_SECONDS)
+            continue
+        for job in jobs:
+            task = asyncio.create_task(run_job(stage, job, consumer))
+            running.add(task)
+            task.add_done_callback(done)
+
+
+async def requeue_lost() -> int:
+    """Queue verify again for uploads left "uploaded" without a job.
+
+    The rows stay locked (FOR UPDATE SKIP LOCKED) while the queue is checked
+    and the jobs are added, so concurrent workers never queue an upload twice.
+
+    Returns:
+        Number of uploads queued again.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=PROCESSING_REQUEUE_SECONDS)
+    backend = get_storage()
+    async with async_session_factory() as db:
+        rows = (
+            await db.execute(
+                select(Upload.id, Upload.storage_path, Upload.filename)
+                .where(Upload.status == UPLOAD_STATUS_UPLOADED, Upload.completed_at < cutoff)
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+        if not rows:
+            return 0
+        queued = await job_queue.queued_uploads(PROCESSING_STAGE_VERIFY)
+        lost = [row for row in rows if row.id not in queued]
+        for row in lost:
+            logger.warning("Upload %s has no processing job, queued again", row.id)
+            location = backend.location(row.storage_path, row.filename)
+            await job_queue.enqueue(PROCESSING_STAGE_VERIFY, row.id, {"location": location})
+        await db.commit()
+    return len(lost)
+
+
+async def requeue_loop() -> None:
+    """Run requeue_lost() every PROCESSING_REQUEUE_INTERVAL_SECONDS, forever."""
+    while True:
+        try:
+            await requeue_lost()
+        except Exception:
+            logger.exception("Cannot requeue lost uploads")
+        await asyncio.sleep(PROCESSING_REQUEUE_INTERVAL_SECONDS)
+
+
+async def run() -> None:
+    """Consume all stages and requeue lost uploads in this process."""
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    await job_queue.ensure_groups([stage.name for stage in STAGES])
+    logger.info("Processing worker %s started", consumer)
+    await asyncio.gather(*(consume(stage, consumer) for stage in STAGES), requeue_loop())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    asyncio.run(run())
@@ -0,0 +1,282 @@
+"""Garbage collector for abandoned and expired uploads.
+
+Runs as its own process (python -m app.workers.upload_gc), so deleting
+tens of gigabytes never competes with the API workers for the event loop.
+Each sweep collects:
+
+- stale uploads: pending/uploading with no chunk received for
+  UPLOAD_STALE_SECONDS (their chunk bitmap has expired, they can no longer
+  be resumed); an upload still receiving chunks is kept however old it is;
+- expired uploads: uploaded/processing/error and finished more than
+  STORAGE_DAYS ago.
+
+Rows are found through ix_uploads_status_created and claimed in batches
+of UPLOAD_GC_BATCH_SIZE: locked with FOR UPDATE SKIP LOCKED (a concurrent
+/complete or a second collector simply skips them), marked "expired" with
+one UPDATE and committed. For unfinished uploads the time of the last chunk
+is read from the bitmap TTL in Redis. Files are then deleted with throttled
+truncation (storage.delete_upload) outside the transaction, so a batch
+holds neither row locks nor a connection while it is deleted. An upload
+whose files cannot be deleted gets its status back for the next sweep.
+Claimed paths are journaled in the sorted set upload_gc:deleting until
+deleted; entries older than UPLOAD_GC_RESUME_SECONDS were left by a
+collector killed mid-batch and are deleted by the next sweep. Every
+expired upload is announced to SSE subscribers (upload_events).
+
+Counters are kept in the Redis hash metrics:upload_gc (runs,
+uploads_expired, bytes_reclaimed, errors, last_run_at).
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import ColumnElement, Row, and_, func, select, tuple_, update
+
+from app.constants import (
+    STORAGE_DAYS,
+    UPLOAD_GC_BATCH_SIZE,
+    UPLOAD_GC_INTERVAL_SECONDS,
+    UPLOAD_GC_RESUME_SECONDS,
+    UPLOAD_STALE_SECONDS,
+    UPLOAD_STATUS_ERROR,
+    UPLOAD_STATUS_EXPIRED,
+    UPLOAD_STATUS_PENDING,
+    UPLOAD_STATUS_PROCESSED,
+    UPLOAD_STATUS_PROCESSING,
+    UPLOAD_STATUS_UPLOADED,
+    UPLOAD_STATUS_UPLOADING,
+)
+from app.core.redis import get_redis
+from app.database import async_session_factory
+from app.models import Upload
+from app.services import dedup, upload_admission, upload_events, upload_progress
+from app.services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "metrics:upload_gc"
+DELETING_KEY = "upload_gc:deleting"
+
+
+@dataclass
+class SweepStats:
+    """Totals of one collector sweep."""
+
+    uploads_expired: int = 0
+    bytes_reclaimed: int = 0
+    errors: int = 0
+
+
+def _stale_filter(now: datetime) -> ColumnElement[bool]:
+    """Unfinished uploads old enough to be stale.
+
+    A chunk cannot arrive before the upload is created, so this bounds the
+    candidates; _idle() then drops those that received a chunk recently.
+    """
+    return and_(
+        Upload.status.in_([UPLOAD_STATUS_PENDING, UPLOAD_STATUS_UPLOADING]),
+        Upload.created_at < now - timedelta(seconds=UPLOAD_STALE_SECONDS),
+    )
+
+
+def _retention_filter(now: datetime) -> ColumnElement[bool]:
+    """Finished uploads past the STORAGE_DAYS retention.
+
+    completed_at >= created_at, so the created_at bound is implied; it is
+    repeated so that the (status, created_at) index narrows the scan.
+    """
+    cutoff = now - timedelta(days=STORAGE_DAYS)
+    return and_(
+        Upload.status.in_(
+            [
+                UPLOAD_STATUS_UPLOADED,
+                UPLOAD_STATUS_PROCESSING,
+                UPLOAD_STATUS_PROCESSED,
+                UPLOAD_STATUS_ERROR,
+            ]
+        ),
+        Upload.created_at < cutoff,
+        func.coalesce(Upload.completed_at, Upload.created_at) < cutoff,
+    )
+
+
+async def _idle(rows: list[Row[Any]]) -> list[Row[Any]]:
+    """Drop unfinished uploads that received a chunk in the last UPLOAD_STALE_SECONDS."""
+    unfinished = [
+        row.id for row in rows if row.status in (UPLOAD_STATUS_PENDING, UPLOAD_STATUS_UPLOADING)
+    ]
+    idle = dict(zip(unfinished, await upload_progress.idle_seconds(unfinished), strict=True))
+    return [
+        row
+        for row in rows
+        if row.id not in idle or idle[row.id] is None or idle[row.id] >= UPLOAD_STALE_SECONDS
+    ]
+
+
+async def _forget(organization_id: uuid.UUID, upload_id: uuid.UUID) -> None:
+    """Drop the Redis state an unfinished upload may still hold."""
+    await upload_progress.clear(upload_id)
+    await dedup.clear_plan(upload_id)
+    await upload_admission.release(organization_id, upload_id)
+
+
+async def _delete(path: str, stats: SweepStats) -> bool:
+    """Delete the files of one upload; a failure is logged and counted."""
+    try:
+        stats.bytes_reclaimed += await get_storage().delete(path)
+    except Exception:
+        logger.exception("Cannot delete %s", path)
+        stats.errors += 1
+        return False
+    return True
+
+
+async def _unclaim(row: Row[Any]) -> None:
+    """Give an upload whose files could not be deleted back to the next sweep."""
+    async with async_session_factory() as db:
+        await db.execute(
+            update(Upload)
+            .where(Upload.id == row.id, Upload.status == UPLOAD_STATUS_EXPIRED)
+            .values(status=row.status)
+        )
+        await db.commit()
+
+
+async def _resume(stats: SweepStats) -> None:
+    """Delete the files journaled by a collector killed before deleting them."""
+    r = await get_redis()
+    cutoff = time.time() - UPLOAD_GC_RESUME_SECONDS
+    for path in await r.zrangebyscore(DELETING_KEY, "-inf", cutoff):
+        # ZREM picks the one collector that resumes the path
+        if not await r.zrem(DELETING_KEY, path):
+            continue
+        if not await _delete(path, stats):
+            await r.zadd(DELETING_KEY, {path: time.time()})
+
+
+async def _sweep_batch(
+    where: ColumnElement[bool], after: tuple[datetime, uuid.UUID] | None, stats: SweepStats
+) -> tuple[datetime, uuid.UUID] | None:
+    """Delete one batch of uploads matching `where`.
+
+    Args:
+        where: Row filter (stale or retention).
+        after: (created_at, id) of the last row of the previous batch.
+        stats: Sweep totals to update.
+
+    Returns:
+        Keyset position for the next batch, or None when nothing is left.
+    """
+    query = select(
+        Upload.id,
+        Upload.organization_id,
+        Upload.storage_path,
+        Upload.status,
+        Upload.created_at,
+        Upload.chunks_expected,
+        Upload.size_bytes,
+        Upload.chunk_size,
+    ).where(where)
+    if after is not None:
+        query = query.where(tuple_(Upload.created_at, Upload.id) > after)
+    query = (
+        query.order_by(Upload.created_at, Upload.id)
+        .limit(UPLOAD_GC_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+
+    r = await get_redis()
+    async with async_session_factory() as db:
+        rows = (await db.execute(query)).all()
+        if not rows:
+            return None
+        claimed = await _idle(rows)
+        if claimed:
+            # Journal before the commit: a collector killed after it leaves
+            # the paths to _resume() instead of orphaning the files
+            now = time.time()
+            await r.zadd(DELETING_KEY, {row.storage_path: now for row in claimed})
+            await db.execute(
+                update(Upload)
+                .where(Upload.id.in_([row.id for row in claimed]))
+                .values(status=UPLOAD_STATUS_EXPIRED)
+            )
+        await db.commit()
+
+    for row in claimed:
+        deleted = await _delete(row.storage_path, stats)
+        if not deleted:
+            await _unclaim(row)
+        await r.zrem(DELETING_KEY, row.storage_path)
+        if not deleted:
+            continue
+        stats.uploads_expired += 1
+        if row.status in (UPLOAD_STATUS_PENDING, UPLOAD_STATUS_UPLOADING):
+            await _forget(row.organization_id, row.id)
+        await upload_events.emit(
+            upload_events.make_event(
+                row.id,
+                row.organization_id,
+                UPLOAD_STATUS_EXPIRED,
+                0,
+                row.chunks_expected,
+                row.size_bytes,
+                row.chunk_size,
+            )
+        )
+    if len(rows) < UPLOAD_GC_BATCH_SIZE:
+        return None
+    return rows[-1].created_at, rows[-1].id
+
+
+async def sweep() -> SweepStats:
+    """Run one full pass over stale and expired uploads."""
+    stats = SweepStats()
+    await _resume(stats)
+    now = datetime.now(timezone.utc)
+    for where in (_stale_filter(now), _retention_filter(now)):
+        after = await _sweep_batch(where, None, stats)
+        while after is not None:
+            after = await _sweep_batch(where, after, stats)
+
+    r = await get_redis()
+    pipe = r.pipeline()
+    pipe.hincrby(METRICS_KEY, "runs", 1)
+    pipe.hincrby(METRICS_KEY, "uploads_expired", stats.uploads_expired)
+    pipe.hincrby(METRICS_KEY, "bytes_reclaimed", stats.bytes_reclaimed)
+    pipe.hincrby(METRICS_KEY, "errors", stats.errors)
+    pipe.hset(METRICS_KEY, "last_run_at", int(time.time()))
+    await pipe.execute()
+    logger.info(
+        "Upload GC: %d uploads expired, %d bytes reclaimed, %d errors",
+        stats.uploads_expired,
+        stats.bytes_reclaimed,
+        stats.errors,
+    )
+    return stats
+
+
+async def run(once: bool = False) -> None:
+    """Sweep every UPLOAD_GC_INTERVAL_SECONDS (or once)."""
+    while True:
+        try:
+            await sweep()
+        except Exception:
+            logger.exception("Upload GC sweep failed")
+        if once:
+            return
+        await asyncio.sleep(UPLOAD_GC_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete stale and expired upload files")
+    parser.add_argument("--once", action="store_true", help="run a single sweep and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    asyncio.run(run(once=args.once))
@@ -0,0 +1 @@
+"""Performance benchmarks (run against the dev Postgres + Redis, not part of pytest)."""
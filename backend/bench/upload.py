@@ -0,0 +1,334 @@
+"""Upload throughput benchmark.
+
+Drives /uploads/init, /chunk and /complete in-process through
+httpx.ASGITransport (like tests/conftest.py) with synthetic streams, for
+every combination of chunk size, client parallelism and worker count.
+Each worker is a separate process with its own app instance, engine and
+Redis pool, i.e. one gunicorn worker; all of them share Postgres, Redis
+and UPLOAD_DIR as in production.
+
+Reported per combination: MB/s over all workers, p50 / p99 chunk PUT
+latency, peak RSS and CPU of the busiest worker. Needs the dev
+infrastructure (make dev-infra) and a migrated database:
+
+    cd backend && python -m bench.upload --size 4G --chunk-sizes 5M,16M,64M \\
+        --parallel 1,4,8 --workers 1,2 --json bench.json --baseline last.json
+
+With --baseline the run fails (exit 1) if MB/s of any combination drops
+more than --tolerance below the baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import secrets
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3}
+_PIECE_BYTES = 64 * 1024  # body piece size, as a socket read would deliver
+_RSS_SAMPLE_SECONDS = 0.02
+
+
+def parse_size(text: str) -> int:
+    """Parse "512K", "5M", "4G" or a plain byte count."""
+    text = text.strip().upper()
+    if text[-1:] in _UNITS:
+        return int(float(text[:-1]) * _UNITS[text[-1]])
+    return int(text)
+
+
+@dataclass
+class WorkerResult:
+    """Measurements of one worker process."""
+
+    bytes_sent: int
+    seconds: float
+    cpu_seconds: float
+    peak_rss_bytes: int
+    latencies: list[float] = field(default_factory=list)
+
+
+@dataclass
+class RunResult:
+    """One row of the report."""
+
+    chunk_size: int
+    parallel: int
+    workers: int
+    mb_per_s: float
+    p50_ms: float
+    p99_ms: float
+    peak_rss_mb: float
+    cpu_percent: float
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+async def _sample_rss(peak: list[int], stop: asyncio.Event) -> None:
+    """Track the peak RSS until stopped."""
+    while not stop.is_set():
+        peak[0] = max(peak[0], _rss_bytes())
+        await asyncio.sleep(_RSS_SAMPLE_SECONDS)
+
+
+def _bak_header() -> bytes:
+    """A minimal MTF TAPE block, so chunk 0 passes header sniffing."""
+    block = bytearray(1024)
+    block[0:4] = b"TAPE"
+    block[93] = 1
+    return bytes(block)
+
+
+async def _body(pattern: bytes, length: int, header: bytes = b"") -> AsyncIterator[bytes]:
+    """Yield `length` bytes in socket-sized pieces without materializing them."""
+    if header:
+        yield header
+        length -= len(header)
+    offset = 0
+    while length > 0:
+        piece = pattern[offset : offset + min(_PIECE_BYTES, length)]
+        yield piece
+        length -= len(piece)
+        offset = (offset + len(piece)) % len(pattern)
+
+
+async def _create_user() -> Any:
+    """Create a throwaway organization and owner for one worker."""
+    from app.database import async_session_factory
+    from app.models import Organization, User
+
+    suffix = secrets.token_hex(4)
+    async with async_session_factory() as db:
+        org = Organization(
+            inn=str(secrets.randbelow(10**12)).zfill(12),
+            name_short=f"Bench {suffix}",
+            slug=f"bench-{suffix}",
+        )
+        db.add(org)
+        await db.flush()
+        user = User(
+            organization_id=org.id,
+            phone=f"bench-{suffix}",
+            is_owner=True,
+            role="owner",
+            referral_code=f"bench{suffix}",
+        )
+        db.add(user)
+        await db.commit()
+        return user
+
+
+async def _delete_user(user: Any) -> None:
+    """Remove the worker's uploads, user, organization and chunk index."""
+    from sqlalchemy import delete
+
+    from app.core.redis import get_redis
+    from app.database import async_session_factory
+    from app.models import Organization, Upload, User
+    from app.services.dedup import _index_key
+
+    await (await get_redis()).delete(_index_key(user.organization_id))
+
+    async with async_session_factory() as db:
+        await db.execute(delete(Upload).where(Upload.organization_id == user.organization_id))
+        await db.execute(delete(User).where(User.id == user.id))
+        await db.execute(delete(Organization).where(Organization.id == user.organization_id))
+        await db.commit()
+
+
+async def _run_worker(size: int, chunk_size: int, parallel: int, upload_dir: str) -> WorkerResult:
+    """Upload one synthetic file of `size` bytes and measure this process."""
+    from unittest.mock import patch
+
+    from httpx import ASGITransport, AsyncClient
+
+    from app.config import settings
+
+    # Read when app.main is imported: the GCRA limits (e.g. 1200 chunks/min per
+    # organization) would otherwise cap the benchmark instead of the upload path
+    settings.RATE_LIMIT_ENABLED = False
+
+    from app.auth import create_access_token
+    from app.main import app
+    from app.services import sms, upload_progress
+
+    async def _no_sms(*_: Any, **__: Any) -> dict[str, Any]:
+        return {"success": True, "error": None}
+
+    settings.UPLOAD_DIR = upload_dir
+    # Bench files are removed after every run; do not hold back the dev disk
+    settings.UPLOAD_DISK_RESERVE_BYTES = 0
+    # Measure the upload path itself, not the trial plan's bandwidth limit
+    settings.UPLOAD_RATE_TRIAL = 0
+    prefix = f"{settings.API_V1_PREFIX}/uploads"
+    pattern = os.urandom(1024 * 1024)
+    user = await _create_user()
+    token = create_access_token(user.id, user.phone, user.role)
+    latencies: list[float] = []
+    peak = [_rss_bytes()]
+    stop = asyncio.Event()
+    try:
+        with (
+            patch.object(upload_progress, "choose_chunk_size", lambda *_: chunk_size),
+            patch.object(sms, "send_sms", _no_sms),
+        ):
+            transport = ASGITransport(app=app)
+            async with AsyncClient(
+                transport=transport,
+                base_url="http://bench",
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=None,
+            ) as client:
+                sampler = asyncio.create_task(_sample_rss(peak, stop))
+                cpu0, t0 = time.process_time(), time.perf_counter()
+                init = await client.post(
+                    f"{prefix}/init",
+                    json={"filename": "bench.bak", "size_bytes": size, "config_code": "bp30"},
+                )
+                init.raise_for_status()
+                upload_id = init.json()["upload_id"]
+                chunk_auth = {"Authorization": f"Bearer {init.json()['upload_token']}"}
+                semaphore = asyncio.Semaphore(parallel)
+
+                async def put(n: int) -> None:
+                    length = min(chunk_size, size - n * chunk_size)
+                    header = _bak_header() if n == 0 else b""
+                    async with semaphore:
+                        started = time.perf_counter()
+                        r = await client.put(
+                            f"{prefix}/{upload_id}/chunk/{n}",
+                            content=_body(pattern, length, header),
+                            headers=chunk_auth,
+                        )
+                        latencies.append(time.perf_counter() - started)
+                    r.raise_for_status()
+
+                await asyncio.gather(*(put(n) for n in range(init.json()["chunks_expected"])))
+                (await client.post(f"{prefix}/{upload_id}/complete")).raise_for_status()
+                seconds = time.perf_counter() - t0
+                cpu_seconds = time.process_time() - cpu0
+                stop.set()
+                await sampler
+    finally:
+        stop.set()
+        await _delete_user(user)
+        shutil.rmtree(Path(upload_dir) / str(user.organization_id), ignore_errors=True)
+    return WorkerResult(size, seconds, cpu_seconds, peak[0], latencies)
+
+
+def _worker_main(size: int, chunk_size: int, parallel: int, upload_dir: str) -> WorkerResult:
+    """Process entry point: one event loop, one app instance."""
+    return asyncio.run(_run_worker(size, chunk_size, parallel, upload_dir))
+
+
+def run_combination(
+    size: int, chunk_size: int, parallel: int, workers: int, upload_dir: str
+) -> RunResult:
+    """Run `workers` processes at once, each uploading `size` bytes."""
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers) as pool:
+        started = time.perf_counter()
+        results = pool.starmap(_worker_main, [(size, chunk_size, parallel, upload_dir)] * workers)
+        wall = time.perf_counter() - started
+    latencies = sorted(lat for r in results for lat in r.latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return RunResult(
+        chunk_size=chunk_size,
+        parallel=parallel,
+        workers=workers,
+        mb_per_s=sum(r.bytes_sent for r in results) / wall / 1024**2,
+        p50_ms=quantiles[49] * 1000,
+        p99_ms=quantiles[98] * 1000,
+        peak_rss_mb=max(r.peak_rss_bytes for r in results) / 1024**2,
+        cpu_percent=max(r.cpu_seconds / r.seconds for r in results) * 100,
+    )
+
+
+def find_regressions(
+    results: list[RunResult], baseline: list[dict[str, Any]], tolerance: float
+) -> list[str]:
+    """Compare MB/s with a previous --json report.
+
+    Returns:
+        Human-readable lines, one per combination that got slower.
+    """
+    previous = {(b["chunk_size"], b["parallel"], b["workers"]): b["mb_per_s"] for b in baseline}
+    regressions = []
+    for r in results:
+        before = previous.get((r.chunk_size, r.parallel, r.workers))
+        if before and r.mb_per_s < before * (1 - tolerance):
+            regressions.append(
+                f"chunk={r.chunk_size} parallel={r.parallel} workers={r.workers}: "
+                f"{r.mb_per_s:.1f} MB/s vs {before:.1f} MB/s"
+            )
+    return regressions
+
+
+def _print_row(r: RunResult) -> None:
+    """Print one report line."""
+    print(
+        f"{r.chunk_size // 1024**2:>6}M {r.parallel:>8} {r.workers:>7} {r.mb_per_s:>9.1f} "
+        f"{r.p50_ms:>8.1f} {r.p99_ms:>8.1f} {r.peak_rss_mb:>9.1f} {r.cpu_percent:>6.0f}%",
+        flush=True,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmark matrix and print the report."""
+    parser = argparse.ArgumentParser(description="Upload throughput benchmark")
+    parser.add_argument("--size", default="1G", help="bytes uploaded per worker (e.g. 4G)")
+    parser.add_argument("--chunk-sizes", default="5M,16M,64M")
+    parser.add_argument("--parallel", default="1,4,8", help="concurrent chunk PUTs per client")
+    parser.add_argument("--workers", default="1,2", help="concurrent worker processes")
+    parser.add_argument("--upload-dir", help="storage directory (default: a temp dir)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="previous --json report to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed MB/s drop")
+    args = parser.parse_args(argv)
+
+    upload_dir = args.upload_dir or tempfile.mkdtemp(prefix="1c24-bench-")
+    size = parse_size(args.size)
+    print(
+        f"{'chunk':>7} {'parallel':>8} {'workers':>7} {'MB/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'RSS MB':>9} {'CPU':>7}"
+    )
+    results = []
+    try:
+        for chunk_size in map(parse_size, args.chunk_sizes.split(",")):
+            for parallel in map(int, args.parallel.split(",")):
+                for workers in map(int, args.workers.split(",")):
+                    result = run_combination(size, chunk_size, parallel, workers, upload_dir)
+                    results.append(result)
+                    _print_row(result)
+    finally:
+        if not args.upload_dir:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps([asdict(r) for r in results], indent=2))
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,13 @@
 """Pytest fixtures for async test client, mock services."""
 
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
 from unittest.mock import AsyncMock, patch
 
+import fakeredis
 import pytest
 from httpx import ASGITransport, AsyncClient
 
+from app.core import redis
 from app.main import app
 
 
@@ -28,13 +30,44 @@ def mock_redis() -> AsyncGenerator[AsyncMock, None]:
     Yields:
         AsyncMock that replaces Redis operations.
     """
-    with patch("app.services.otp.store_otp", new_callable=AsyncMock) as mock_store:
-        mock_store.return_value = True
+    with patch("app.services.otp.issue_otp", new_callable=AsyncMock) as mock_store:
+        mock_store.return_value = None
         with patch("app.services.otp.verify_otp", new_callable=AsyncMock) as mock_verify:
             mock_verify.return_value = True
             yield mock_store
 
 
+async def _stream(*pieces: bytes) -> AsyncIterator[bytes]:
+    """Yield body pieces like Request.stream() does."""
+    for piece in pieces:
+        yield piece
+
+
+@pytest.fixture
+def body_stream() -> Callable[..., AsyncIterator[bytes]]:
+    """Build a request body stream from pieces, for storage and bandwidth tests.
+
+    Returns:
+        Function taking the body pieces and returning an async iterator over them.
+    """
+    return _stream
+
+
+@pytest.fixture
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> fakeredis.FakeAsyncRedis:
+    """In-memory Redis with Lua scripting behind app.core.redis.get_redis().
+
+    Modules that cache registered scripts must have those caches reset by
+    the test, as scripts are bound to the client they were registered on.
+
+    Returns:
+        The fake client, for seeding and inspecting keys.
+    """
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis, "_redis", client)
+    return client
+
+
 @pytest.fixture
 def mock_dadata() -> AsyncGenerator[AsyncMock, None]:
     """Mock DaData API responses.
@@ -0,0 +1,54 @@
+"""Tests for zstd seekable-format compression of stored uploads."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+import zstandard
+
+from app.constants import COMPRESSION_FRAME_BYTES
+from app.services import compression
+
+
+def _backup_like(size: int) -> bytes:
+    """Repetitive data with some noise, compressible like a .bak."""
+    block = b"INSERT INTO t VALUES (42, 'row');" * 31 + os.urandom(33)
+    return (block * (size // len(block) + 1))[:size]
+
+
+@pytest.mark.asyncio
+async def test_compressed_file_reads_back_and_seeks(tmp_path: Path) -> None:
+    """Whole-file reads and ranges across frame boundaries return the original bytes."""
+    data = _backup_like(2 * COMPRESSION_FRAME_BYTES + 12345)
+    src, dst = tmp_path / "buh.bak", tmp_path / "buh.bak.zst"
+    src.write_bytes(data)
+
+    with ThreadPoolExecutor(2) as pool:
+        stored = await compression.compress_file(src, dst, pool, workers=2)
+
+    assert stored == dst.stat().st_size < len(data) // 3
+    assert b"".join([p async for p in compression.read_file(dst)]) == data
+    offset = COMPRESSION_FRAME_BYTES - 100
+    assert compression.read_range(dst, offset, 200) == data[offset : offset + 200]
+    assert compression.read_range(dst, len(data) - 5, 5) == data[-5:]
+
+
+@pytest.mark.asyncio
+async def test_compressed_file_is_plain_zstd(tmp_path: Path) -> None:
+    """Tools without seekable support still decompress the file (skippable seek table)."""
+    data = _backup_like(COMPRESSION_FRAME_BYTES + 1)
+    src, dst = tmp_path / "buh.bak", tmp_path / "buh.bak.zst"
+    src.write_bytes(data)
+    with ThreadPoolExecutor(1) as pool:
+        await compression.compress_file(src, dst, pool)
+
+    reader = zstandard.ZstdDecompressor().decompressobj(read_across_frames=True)
+
+    assert reader.decompress(dst.read_bytes()) == data
+
+
+def test_only_compressible_samples_are_worth_compressing() -> None:
+    """Random (already compressed) data is left as it is."""
+    assert compression.is_worth_compressing(_backup_like(1024 * 1024))
+    assert not compression.is_worth_compressing(os.urandom(1024 * 1024))
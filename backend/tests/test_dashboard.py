@@ -0,0 +1,108 @@
+"""Tests for the dashboard bootstrap endpoint."""
+
+import uuid
+from collections.abc import AsyncGenerator
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.dependencies import get_current_user, get_db
+from app.main import app
+from app.models import Database, Organization, Upload, User
+
+
+def _at(day: int) -> datetime:
+    return datetime(2026, 1, day, tzinfo=timezone.utc)
+
+
+def _organization() -> Organization:
+    """An organization with two members, two databases and two uploads."""
+    org = Organization(
+        id=uuid.uuid4(),
+        inn="7707083893",
+        name_short='ООО "Тест"',
+        type="LEGAL",
+        director_name="Иванов Иван Иванович",
+        status="ACTIVE",
+    )
+    owner = User(
+        id=uuid.uuid4(),
+        phone="+79990000001",
+        role="owner",
+        status="active",
+        referral_code="OWNER123",
+        is_owner=True,
+        created_at=_at(2),
+    )
+    member = User(
+        id=uuid.uuid4(),
+        phone="+79990000002",
+        first_name="Пётр",
+        role="user",
+        status="active",
+        referral_code="MEMBER12",
+        is_owner=False,
+        created_at=_at(1),
+    )
+    org.users = [member, owner]
+    org.databases = [
+        Database(
+            id=uuid.uuid4(),
+            name=f"База {day}",
+            db_name=f"db_{day}",
+            config_code="bp30",
+            config_name="Бухгалтерия",
+            status="active",
+            created_at=_at(day),
+        )
+        for day in (1, 3)
+    ]
+    org.uploads = [
+        Upload(
+            id=uuid.uuid4(),
+            filename=f"{day}.bak",
+            config_code="bp30",
+            size_bytes=10,
+            chunks_expected=1,
+            chunks_received=1,
+            status="ready",
+            created_at=_at(day),
+        )
+        for day in (3, 1)
+    ]
+    return org
+
+
+@pytest.mark.asyncio
+async def test_bootstrap_returns_dashboard_in_one_query() -> None:
+    """Profile, databases, uploads, subscription and members come from one statement."""
+    org = _organization()
+    owner = next(u for u in org.users if u.is_owner)
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = org
+    session = AsyncMock()
+    session.execute.return_value = result
+
+    async def _db() -> AsyncGenerator[AsyncMock, None]:
+        yield session
+
+    app.dependency_overrides[get_db] = _db
+    app.dependency_overrides[get_current_user] = lambda: owner
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/api/v1/me/bootstrap")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    data = response.json()
+    assert session.execute.await_count == 1
+    assert data["profile"]["display_name"] == "Иван Иванович"
+    assert data["profile"]["organization"]["inn"] == "7707083893"
+    assert [d["db_name"] for d in data["databases"]] == ["db_3", "db_1"]
+    assert [u["filename"] for u in data["uploads"]] == ["3.bak", "1.bak"]
+    assert [m["phone"] for m in data["members"]] == ["+79990000001", "+79990000002"]
+    assert data["subscription"]["status"] == "trial"
@@ -0,0 +1,27 @@
+"""Tests for the per-organization chunk deduplication index."""
+
+import uuid
+
+import fakeredis
+import pytest
+
+from app.constants import CHUNK_SIZE_BYTES
+from app.services import dedup
+
+
+@pytest.mark.asyncio
+async def test_index_upload_skips_negotiated_chunk_sizes(
+    fake_redis: fakeredis.FakeAsyncRedis,
+) -> None:
+    """Only CHUNK_SIZE_BYTES chunks can match announced hashes, so only they are indexed."""
+    org = uuid.uuid4()
+    size = 2 * CHUNK_SIZE_BYTES
+
+    await dedup.index_upload(org, "/a/big.bak", 2 * CHUNK_SIZE_BYTES, size, ["a" * 64])
+    assert not await fake_redis.exists(f"dedup:{org}")
+
+    await dedup.index_upload(org, "/a/buh.bak", CHUNK_SIZE_BYTES, size, ["b" * 64, "c" * 64])
+    assert await fake_redis.hgetall(f"dedup:{org}") == {
+        "b" * 64: dedup.encode_location("/a/buh.bak", 0, CHUNK_SIZE_BYTES),
+        "c" * 64: dedup.encode_location("/a/buh.bak", CHUNK_SIZE_BYTES, CHUNK_SIZE_BYTES),
+    }
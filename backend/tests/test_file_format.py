@@ -0,0 +1,68 @@
+"""Tests for .dt / .bak header sniffing."""
+
+import struct
+from collections.abc import AsyncIterator, Callable
+
+import pytest
+
+from app.services.file_format import (
+    MIME_BAK,
+    MIME_DT,
+    HeaderSniffer,
+    UnsupportedFormatError,
+    detect,
+)
+
+DT_HEADER = (
+    b"\xff\xff\xff\x7f" + struct.pack("<III", 512, 0, 0) + b"\r\n00000104 00000200 7fffffff \r\n"
+)
+
+
+def _mtf_header(major_version: int = 1) -> bytes:
+    """A TAPE descriptor block with the MTF major version at offset 93."""
+    block = bytearray(1024)
+    block[0:4] = b"TAPE"
+    block[93] = major_version
+    return bytes(block)
+
+
+def test_detect_recognizes_dt_and_bak_headers() -> None:
+    """Format parameters come from the container page size and the MTF version."""
+    assert detect(DT_HEADER) == f"{MIME_DT}; container=32; page=512"
+    assert detect(_mtf_header()) == f"{MIME_BAK}; mtf=1"
+
+
+def test_detect_rejects_other_files() -> None:
+    """Archives, truncated headers and broken block headers are not accepted."""
+    assert detect(b"PK\x03\x04" + b"\0" * 100) is None
+    assert detect(DT_HEADER[:20]) is None
+    assert detect(DT_HEADER.replace(b"\r\n0", b"\r\nX")) is None
+    assert detect(_mtf_header(0)) is None
+
+
+@pytest.mark.asyncio
+async def test_sniffer_passes_recognized_body_through_unchanged(
+    body_stream: Callable[..., AsyncIterator[bytes]],
+) -> None:
+    """The body is re-assembled byte for byte after the header check."""
+    body = _mtf_header() + b"payload"
+    sniffer = HeaderSniffer()
+
+    out = b"".join(
+        [p async for p in sniffer.wrap(body_stream(body[:10], body[10:600], body[600:]))]
+    )
+
+    assert out == body
+    assert sniffer.mime_type == f"{MIME_BAK}; mtf=1"
+
+
+@pytest.mark.asyncio
+async def test_sniffer_rejects_before_yielding_anything(
+    body_stream: Callable[..., AsyncIterator[bytes]],
+) -> None:
+    """A wrong file is refused before any byte reaches storage."""
+    received: list[bytes] = []
+    with pytest.raises(UnsupportedFormatError):
+        async for piece in HeaderSniffer().wrap(body_stream(b"not a backup" * 100)):
+            received.append(piece)
+    assert received == []
@@ -0,0 +1,94 @@
+"""Tests for the Redis Streams job queue (run against fakeredis)."""
+
+import uuid
+
+import fakeredis
+import pytest
+import pytest_asyncio
+
+from app.services import job_queue
+
+STAGES = ["first", "second"]
+
+
+@pytest_asyncio.fixture
+async def queue(
+    fake_redis: fakeredis.FakeAsyncRedis, monkeypatch: pytest.MonkeyPatch
+) -> fakeredis.FakeAsyncRedis:
+    """fakeredis with the stage streams and their consumer group."""
+    monkeypatch.setattr(job_queue, "_promote_script", None)
+    await job_queue.ensure_groups(STAGES)
+    return fake_redis
+
+
+async def _pending(r: fakeredis.FakeAsyncRedis, stage: str) -> int:
+    return (await r.xpending(f"jobs:{stage}", job_queue.GROUP))["pending"]
+
+
+@pytest.mark.asyncio
+async def test_complete_acks_and_hands_job_to_next_stage(queue: fakeredis.FakeAsyncRedis) -> None:
+    """A finished job leaves its stream and arrives in the next one with the new data."""
+    upload_id = uuid.uuid4()
+    await job_queue.enqueue("first", upload_id, {"location": "/a"})
+
+    [job] = await job_queue.fetch("first", "w1", 10, 60, 0)
+    assert (job.upload_id, job.attempt, job.data) == (upload_id, 0, {"location": "/a"})
+    assert await _pending(queue, "first") == 1
+
+    await job_queue.complete(job, "second", {"location": "/b"})
+
+    assert await _pending(queue, "first") == 0
+    assert await queue.xlen("jobs:first") == 0
+    [handed] = await job_queue.fetch("second", "w1", 10, 60, 0)
+    assert (handed.upload_id, handed.attempt, handed.data) == (upload_id, 0, {"location": "/b"})
+
+
+@pytest.mark.asyncio
+async def test_unacknowledged_job_is_redelivered_as_a_new_attempt(
+    queue: fakeredis.FakeAsyncRedis,
+) -> None:
+    """A job whose worker died is claimed by another one after the visibility timeout."""
+    await job_queue.enqueue("first", uuid.uuid4())
+    [lost] = await job_queue.fetch("first", "w1", 10, 60, 0)
+
+    assert await job_queue.fetch("first", "w2", 10, 60, 0) == []
+    [claimed] = await job_queue.fetch("first", "w2", 10, 0, 0)
+
+    assert claimed.entry_id == lost.entry_id
+    assert claimed.attempt == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_waits_until_promoted_and_bury_keeps_dead_job(
+    queue: fakeredis.FakeAsyncRedis,
+) -> None:
+    """Retried jobs come back with the next attempt number; buried ones go to jobs:dead."""
+    await job_queue.enqueue("first", uuid.uuid4())
+    [job] = await job_queue.fetch("first", "w1", 10, 60, 0)
+
+    await job_queue.retry(job, 0)
+    assert await _pending(queue, "first") == 0
+    assert await job_queue.promote_due("first") == 1
+    [again] = await job_queue.fetch("first", "w1", 10, 60, 0)
+    assert again.attempt == 1
+
+    await job_queue.bury(again, "broken")
+    assert await _pending(queue, "first") == 0
+    [(_, dead)] = await queue.xrange(job_queue.DEAD_KEY)
+    assert dead["stage"] == "first" and dead["error"] == "broken"
+
+
+@pytest.mark.asyncio
+async def test_queued_uploads_sees_waiting_running_and_delayed_jobs(
+    queue: fakeredis.FakeAsyncRedis,
+) -> None:
+    """Every job not yet finished counts; acknowledged ones do not."""
+    waiting, running, delayed, done = (uuid.uuid4() for _ in range(4))
+    for upload_id in (running, delayed, done):
+        await job_queue.enqueue("first", upload_id)
+    jobs = {job.upload_id: job for job in await job_queue.fetch("first", "w1", 10, 60, 0)}
+    await job_queue.enqueue("first", waiting)
+    await job_queue.retry(jobs[delayed], 60)
+    await job_queue.complete(jobs[done])
+
+    assert await job_queue.queued_uploads("first") == {waiting, running, delayed}
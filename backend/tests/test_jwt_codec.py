@@ -0,0 +1,66 @@
+"""Tests for the JWT codecs and the verified-token cache."""
+
+import base64
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from jose import JWTError
+from jose.exceptions import ExpiredSignatureError
+
+from app import auth
+from app.core.jwt_codec import HmacCodec, JoseCodec
+
+_SECRET = "test-secret"
+
+
+def _claims(minutes: int = 5) -> dict[str, object]:
+    now = datetime.now(timezone.utc)
+    return {
+        "sub": str(uuid.uuid4()),
+        "type": "access",
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + timedelta(minutes=minutes),
+    }
+
+
+def test_native_tokens_match_jose() -> None:
+    """The native codec signs byte-identical tokens and accepts jose's."""
+    claims = _claims()
+    native, jose = HmacCodec(_SECRET, "HS256"), JoseCodec(_SECRET, "HS256")
+
+    assert native.encode(claims) == jose.encode(claims)
+    assert native.decode(jose.encode(claims)) == jose.decode(native.encode(claims))
+
+
+def test_native_rejects_forged_expired_and_unsigned_tokens() -> None:
+    """Wrong key, past exp and alg=none all fail with jose's errors."""
+    native = HmacCodec(_SECRET, "HS256")
+    header, payload, _ = native.encode(_claims()).split(".")
+    unsigned_header = base64.urlsafe_b64encode(json.dumps({"alg": "none"}).encode()).rstrip(b"=")
+
+    with pytest.raises(JWTError):
+        native.decode(HmacCodec("other", "HS256").encode(_claims()))
+    with pytest.raises(ExpiredSignatureError):
+        native.decode(native.encode(_claims(minutes=-1)))
+    with pytest.raises(JWTError):
+        native.decode(f"{unsigned_header.decode()}.{payload}.")
+    with pytest.raises(JWTError):
+        native.decode("not-a-token")
+
+
+def test_decode_cache_returns_copies_and_rechecks_expiry() -> None:
+    """A cached token cannot be altered by callers and still expires."""
+    token = auth.create_access_token(uuid.uuid4(), "+79990000000", "user")
+
+    first = auth.decode_token(token)
+    first["role"] = "admin"
+    assert auth.decode_token(token)["role"] == "user"
+
+    auth._verified[token]["exp"] = int(time.time()) - 1
+    with pytest.raises(ExpiredSignatureError):
+        auth.decode_token(token)
+    assert token not in auth._verified
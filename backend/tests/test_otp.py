@@ -1,9 +1,28 @@
 """Tests for OTP service and verification."""
 
+from unittest.mock import AsyncMock, patch
+
+import fakeredis
 import pytest
+from httpx import ASGITransport, AsyncClient
 
+from app.exceptions import RateLimitError
+from app.main import app
+from app.services import otp
 from app.services.otp import generate_otp, hash_otp
 
+PHONE = "+79991234567"
+
+
+@pytest.fixture
+def otp_redis(
+    fake_redis: fakeredis.FakeAsyncRedis, monkeypatch: pytest.MonkeyPatch
+) -> fakeredis.FakeAsyncRedis:
+    """fakeredis with the OTP scripts registered on it."""
+    monkeypatch.setattr(otp, "_verify_script", None)
+    monkeypatch.setattr(otp, "_issue_script", None)
+    return fake_redis
+
 
 @pytest.mark.asyncio
 async def test_generate_otp_returns_six_digits() -> None:
@@ -22,3 +41,73 @@ def test_hash_otp_is_deterministic() -> None:
 def test_hash_otp_different_for_different_codes() -> None:
     """Different codes should produce different hashes."""
     assert hash_otp("123456") != hash_otp("654321")
+
+
+@pytest.mark.asyncio
+async def test_verify_code_returns_429_when_attempts_are_used_up() -> None:
+    """The atomic verification's lockout surfaces as 429 before any DB access."""
+    transport = ASGITransport(app=app)
+    locked = AsyncMock(side_effect=RateLimitError("Слишком много попыток. Запросите новый код."))
+    with patch("app.services.otp.verify_otp", locked):
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                "/api/v1/auth/verify-code", json={"phone": "+79991234567", "code": "123456"}
+            )
+
+    assert response.status_code == 429
+    locked.assert_awaited_once_with("+79991234567", "123456")
+
+
+@pytest.mark.asyncio
+async def test_verify_script_counts_attempts_and_is_single_use(
+    otp_redis: fakeredis.FakeAsyncRedis,
+) -> None:
+    """A wrong code costs an attempt; the right one is accepted once and removed."""
+    await otp_redis.set(f"otp:{PHONE}", hash_otp("123456"), ex=300)
+
+    assert await otp.verify_otp(PHONE, "000000") is False
+    assert await otp_redis.get(f"otp_attempts:{PHONE}") == "1"
+    assert 0 < await otp_redis.ttl(f"otp_attempts:{PHONE}") <= 300
+
+    assert await otp.verify_otp(PHONE, "123456") is True
+    assert not await otp_redis.exists(f"otp:{PHONE}", f"otp_attempts:{PHONE}")
+    assert await otp.verify_otp(PHONE, "123456") is False
+
+
+@pytest.mark.asyncio
+async def test_verify_script_locks_out_after_max_attempts(
+    otp_redis: fakeredis.FakeAsyncRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Once the attempts are used up even the right code is refused and the OTP is gone."""
+    monkeypatch.setattr(otp.settings, "OTP_MAX_ATTEMPTS", 3)
+    await otp_redis.set(f"otp:{PHONE}", hash_otp("123456"), ex=300)
+    for _ in range(3):
+        assert await otp.verify_otp(PHONE, "000000") is False
+
+    with pytest.raises(RateLimitError):
+        await otp.verify_otp(PHONE, "123456")
+    assert not await otp_redis.exists(f"otp:{PHONE}", f"otp_attempts:{PHONE}")
+
+
+@pytest.mark.asyncio
+async def test_issue_script_enforces_cooldown_and_send_cap(
+    otp_redis: fakeredis.FakeAsyncRedis,
+) -> None:
+    """Sends inside the cooldown or past the cap are refused without touching the stored code."""
+    await otp.issue_otp(PHONE, "111111", max_daily=2)
+    assert await otp_redis.get(f"otp:{PHONE}") == hash_otp("111111")
+    assert await otp_redis.get(f"otp_attempts:{PHONE}") == "0"
+    assert await otp_redis.get(f"sms_daily:{PHONE}") == "1"
+    assert 0 < await otp_redis.ttl(f"sms_daily:{PHONE}") <= 86400
+
+    with pytest.raises(RateLimitError, match="Подождите"):
+        await otp.issue_otp(PHONE, "222222", max_daily=2)
+    assert await otp_redis.get(f"otp:{PHONE}") == hash_otp("111111")
+
+    await otp_redis.delete(f"otp_cooldown:{PHONE}")
+    await otp.issue_otp(PHONE, "333333", max_daily=2)
+    await otp_redis.delete(f"otp_cooldown:{PHONE}")
+    with pytest.raises(RateLimitError, match="лимит"):
+        await otp.issue_otp(PHONE, "444444", max_daily=2)
+    assert await otp_redis.get(f"otp:{PHONE}") == hash_otp("333333")
+    assert await otp_redis.get(f"sms_daily:{PHONE}") == "2"
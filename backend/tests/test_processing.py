@@ -0,0 +1,175 @@
+"""Tests for the post-upload processing worker's job handling."""
+
+import dataclasses
+import json
+import uuid
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock
+
+import fakeredis
+import pytest
+import pytest_asyncio
+
+from app.constants import (
+    DB_STATUS_PREPARING,
+    PROCESSING_STAGE_COMPRESS,
+    PROCESSING_STAGE_RESTORE,
+    PROCESSING_STAGE_SIZE,
+    PROCESSING_STAGE_VERIFY,
+    UPLOAD_STATUS_ERROR,
+    UPLOAD_STATUS_PROCESSED,
+    UPLOAD_STATUS_PROCESSING,
+)
+from app.models import Upload
+from app.services import job_queue, storage
+from app.workers import processing
+
+
+class _Session:
+    """Stands in for a DB session that loads the upload and its Database status."""
+
+    def __init__(self, upload: Upload, db_status: str | None = None) -> None:
+        self.upload = upload
+        self.db_status = db_status
+
+    async def __aenter__(self) -> "_Session":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+    async def get(self, model: type, key: uuid.UUID) -> Upload:
+        return self.upload
+
+    async def execute(self, query: Any) -> SimpleNamespace:
+        return SimpleNamespace(scalar_one_or_none=lambda: self.db_status)
+
+
+@pytest_asyncio.fixture
+async def worker(
+    fake_redis: fakeredis.FakeAsyncRedis, monkeypatch: pytest.MonkeyPatch
+) -> tuple[Upload, AsyncMock]:
+    """An upload in processing, the stage streams, and a recorded _set_status."""
+    upload = Upload(id=uuid.uuid4(), organization_id=uuid.uuid4(), status=UPLOAD_STATUS_PROCESSING)
+    set_status = AsyncMock()
+    monkeypatch.setattr(processing, "async_session_factory", lambda: _Session(upload))
+    monkeypatch.setattr(processing, "_set_status", set_status)
+    monkeypatch.setattr(job_queue, "_promote_script", None)
+    await job_queue.ensure_groups([stage.name for stage in processing.STAGES])
+    return upload, set_status
+
+
+async def _run(stage_name: str, handler: Any, upload: Upload) -> job_queue.Job:
+    """Deliver one job of `stage_name` for the upload and run it with `handler`."""
+    [stage] = [stage for stage in processing.STAGES if stage.name == stage_name]
+    await job_queue.enqueue(stage_name, upload.id, {"location": "/a"})
+    [job] = await job_queue.fetch(stage_name, "w1", 1, 60, 0)
+    await processing.run_job(dataclasses.replace(stage, handler=handler), job, "w1")
+    return job
+
+
+@pytest.mark.asyncio
+async def test_stage_success_hands_job_to_next_stage(
+    worker: tuple[Upload, AsyncMock],
+) -> None:
+    """A successful stage queues the next one with the data it returned."""
+    upload, set_status = worker
+
+    await _run(PROCESSING_STAGE_VERIFY, AsyncMock(return_value={"location": "/b"}), upload)
+
+    [job] = await job_queue.fetch(PROCESSING_STAGE_RESTORE, "w1", 1, 60, 0)
+    assert job.data == {"location": "/b"}
+    set_status.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_size_stage_marks_upload_processed(
+    worker: tuple[Upload, AsyncMock], fake_redis: fakeredis.FakeAsyncRedis
+) -> None:
+    """After size the upload gets its terminal status and compress is queued."""
+    upload, set_status = worker
+
+    await _run(PROCESSING_STAGE_SIZE, AsyncMock(return_value={"location": "/a"}), upload)
+
+    set_status.assert_awaited_once_with(upload, UPLOAD_STATUS_PROCESSED)
+    assert await fake_redis.xlen(f"jobs:{PROCESSING_STAGE_SIZE}") == 0
+    assert await fake_redis.xlen(f"jobs:{PROCESSING_STAGE_COMPRESS}") == 1
+
+
+@pytest.mark.asyncio
+async def test_compress_waits_until_database_is_restored(
+    worker: tuple[Upload, AsyncMock],
+    fake_redis: fakeredis.FakeAsyncRedis,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """The file to restore from is kept: compress is postponed, no attempt used."""
+    upload, _ = worker
+    upload.status = UPLOAD_STATUS_PROCESSED
+    monkeypatch.setattr(
+        processing, "async_session_factory", lambda: _Session(upload, DB_STATUS_PREPARING)
+    )
+    backend = SimpleNamespace(compress=AsyncMock())
+    monkeypatch.setattr(processing, "get_storage", lambda: backend)
+
+    await _run(PROCESSING_STAGE_COMPRESS, processing.compress, upload)
+
+    backend.compress.assert_not_awaited()
+    [member] = await fake_redis.zrange(f"jobs:{PROCESSING_STAGE_COMPRESS}:delayed", 0, -1)
+    assert json.loads(member)["attempt"] == "0"
+    assert await fake_redis.xlen(f"jobs:{PROCESSING_STAGE_COMPRESS}") == 0
+
+
+@pytest.mark.asyncio
+async def test_processing_error_fails_upload_and_buries_job(
+    worker: tuple[Upload, AsyncMock], fake_redis: fakeredis.FakeAsyncRedis
+) -> None:
+    """ProcessingError is not retried: the upload goes to error, the job to jobs:dead."""
+    upload, set_status = worker
+    handler = AsyncMock(side_effect=processing.ProcessingError("truncated"))
+
+    await _run(PROCESSING_STAGE_VERIFY, handler, upload)
+
+    set_status.assert_awaited_once_with(upload, UPLOAD_STATUS_ERROR)
+    [(_, dead)] = await fake_redis.xrange(job_queue.DEAD_KEY)
+    assert dead["error"] == "truncated"
+
+
+@pytest.mark.asyncio
+async def test_unexpected_error_is_retried_later(
+    worker: tuple[Upload, AsyncMock], fake_redis: fakeredis.FakeAsyncRedis
+) -> None:
+    """Other failures schedule a retry and leave the upload status alone."""
+    upload, set_status = worker
+
+    await _run(PROCESSING_STAGE_VERIFY, AsyncMock(side_effect=OSError("disk")), upload)
+
+    set_status.assert_not_awaited()
+    assert await fake_redis.zcard(f"jobs:{PROCESSING_STAGE_VERIFY}:delayed") == 1
+    assert await fake_redis.xlen(f"jobs:{PROCESSING_STAGE_VERIFY}") == 0
+
+
+@pytest.mark.asyncio
+async def test_requeue_lost_queues_uploads_without_a_verify_job(
+    worker: tuple[Upload, AsyncMock], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """An upload committed as "uploaded" whose enqueue was lost gets its job back."""
+    queued, lost = (
+        SimpleNamespace(id=uuid.uuid4(), storage_path=f"/uploads/{n}", filename="buh.bak")
+        for n in ("queued", "lost")
+    )
+    await job_queue.enqueue(PROCESSING_STAGE_VERIFY, queued.id, {"location": "/a"})
+    session = AsyncMock()
+    session.__aenter__.return_value = session
+    session.execute.return_value.all = lambda: [queued, lost]
+    monkeypatch.setattr(processing, "async_session_factory", lambda: session)
+    monkeypatch.setattr(processing, "get_storage", storage.LocalStorage)
+
+    assert await processing.requeue_lost() == 1
+
+    jobs = await job_queue.fetch(PROCESSING_STAGE_VERIFY, "w1", 10, 60, 0)
+    assert [(job.upload_id, job.data) for job in jobs] == [
+        (queued.id, {"location": "/a"}),
+        (lost.id, {"location": "/uploads/lost/buh.bak"}),
+    ]
+    session.commit.assert_awaited_once()
@@ -0,0 +1,103 @@
+"""Tests for the per-route rate-limiting middleware."""
+
+import uuid
+from collections.abc import AsyncIterator
+from unittest.mock import AsyncMock, patch
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import create_access_token
+from app.core import rate_limit
+from app.core.rate_limit import Limit, RateLimitMiddleware, RouteLimit
+
+_CHUNK = RouteLimit("PUT", "/uploads/{upload_id}/chunk/{n}", (Limit("org", 60, 60),))
+_LOOKUP = RouteLimit("POST", "/lookup", (Limit("ip", 10, 60, burst=5),))
+
+
+@pytest_asyncio.fixture
+async def limited_client() -> AsyncIterator[AsyncClient]:
+    """A tiny app behind the middleware."""
+    app = FastAPI()
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT"])
+    async def ok() -> dict[str, bool]:
+        return {"ok": True}
+
+    wrapped = RateLimitMiddleware(app, [_CHUNK, _LOOKUP], client_ip_header="X-Real-IP")
+    async with AsyncClient(transport=ASGITransport(app=wrapped), base_url="http://test") as ac:
+        yield ac
+
+
+def test_path_templates_match_one_segment_per_parameter() -> None:
+    """{name} stands for exactly one path segment."""
+    pattern = _CHUNK.pattern()
+
+    assert pattern.match(f"/uploads/{uuid.uuid4()}/chunk/3")
+    assert not pattern.match("/uploads/a/b/chunk/3")
+    assert not pattern.match("/uploads/a/chunk/3/extra")
+
+
+@pytest.mark.asyncio
+async def test_refusal_has_rate_limit_error_shape(limited_client: AsyncClient) -> None:
+    """Over the limit: 429 with detail and Retry-After rounded up to seconds."""
+    script = AsyncMock(return_value=1500)
+    with patch.object(rate_limit, "_script", script):
+        response = await limited_client.post("/lookup", headers={"X-Real-IP": "203.0.113.7"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    assert "detail" in response.json()
+    assert script.await_args.kwargs["keys"] == ["rate_limit:POST:/lookup:0:203.0.113.7"]
+    assert script.await_args.kwargs["args"] == [6000, 30000]
+
+
+@pytest.mark.asyncio
+async def test_org_limits_use_the_token_org_and_skip_anonymous(limited_client: AsyncClient) -> None:
+    """The org key comes from the bearer token; without one nothing is charged."""
+    org_id = uuid.uuid4()
+    token = create_access_token(uuid.uuid4(), "+79990000000", "user", org_id)
+    script = AsyncMock(return_value=0)
+    with patch.object(rate_limit, "_script", script):
+        anonymous = await limited_client.put("/uploads/u/chunk/0")
+        script.assert_not_awaited()
+        response = await limited_client.put(
+            "/uploads/u/chunk/0", headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert anonymous.status_code == response.status_code == 200
+    (key,) = script.await_args.kwargs["keys"]
+    assert key.endswith(f":{org_id}")
+
+
+@pytest.mark.asyncio
+async def test_requests_pass_when_redis_is_unavailable(limited_client: AsyncClient) -> None:
+    """The limiter fails open (no Redis in the test environment)."""
+    response = await limited_client.post("/lookup")
+
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_gcra_script_allows_the_burst_then_refuses(
+    limited_client: AsyncClient,
+    fake_redis: fakeredis.FakeAsyncRedis,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """The burst of 5 passes at once; the next request waits one interval (6 s)."""
+    monkeypatch.setattr(rate_limit, "_script", None)
+    headers = {"X-Real-IP": "203.0.113.7"}
+
+    statuses = [
+        (await limited_client.post("/lookup", headers=headers)).status_code for _ in range(5)
+    ]
+    refused = await limited_client.post("/lookup", headers=headers)
+    other_ip = await limited_client.post("/lookup", headers={"X-Real-IP": "203.0.113.8"})
+
+    assert statuses == [200] * 5
+    assert refused.status_code == 429
+    assert refused.headers["Retry-After"] == "6"
+    assert other_ip.status_code == 200
@@ -0,0 +1,32 @@
+"""Tests for the shared Redis client's latency metrics."""
+
+from app.core import redis
+from app.core.redis import LATENCY_BUCKETS_MS, CommandStats
+
+
+def test_command_stats_buckets() -> None:
+    """Calls are counted in the first bucket whose bound they do not exceed."""
+    stats = CommandStats()
+    stats.observe(0.0004, failed=False)
+    stats.observe(0.003, failed=True)
+    stats.observe(5.0, failed=False)
+
+    assert stats.count == 3
+    assert stats.errors == 1
+    assert stats.max_seconds == 5.0
+    assert stats.buckets[0] == 1
+    assert stats.buckets[LATENCY_BUCKETS_MS.index(5)] == 1
+    assert stats.buckets[-1] == 1
+    assert sum(stats.buckets) == 3
+
+
+def test_metrics_report() -> None:
+    """metrics() reports the pool and every observed command."""
+    redis._observe("GET", 0.0, failed=False)
+
+    report = redis.metrics()
+
+    assert report["buckets_ms"] == list(LATENCY_BUCKETS_MS)
+    assert set(report["pool"]) == {"max_connections", "in_use", "idle"}
+    assert report["commands"]["GET"]["count"] >= 1
+    assert len(report["commands"]["GET"]["buckets"]) == len(LATENCY_BUCKETS_MS) + 1
@@ -1,8 +1,11 @@
 """Tests for registration flow endpoints."""
 
+from unittest.mock import AsyncMock, patch
+
 import pytest
 from httpx import ASGITransport, AsyncClient
 
+from app.exceptions import RateLimitError
 from app.main import app
 
 
@@ -32,3 +35,16 @@ async def test_send_code_invalid_phone_returns_422() -> None:
         )
 
     assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_send_code_rate_limited_returns_429() -> None:
+    """A refusal of the OTP issue script (cooldown / daily limit) is a 429."""
+    transport = ASGITransport(app=app)
+    refused = AsyncMock(side_effect=RateLimitError("Подождите 60 секунд перед повторной отправкой"))
+    with patch("app.services.otp.issue_otp", refused):
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/v1/auth/send-code", json={"phone": "+79991234567"})
+
+    assert response.status_code == 429
+    refused.assert_awaited_once()
@@ -0,0 +1,96 @@
+"""Tests for the S3 multipart upload storage backend."""
+
+import hashlib
+import uuid
+from collections.abc import AsyncIterator, Callable, Iterator
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from app.services.s3_storage import S3Storage
+from app.services.storage import ChunkTooLargeError
+
+BUCKET = "uploads-test"
+# S3 requires every part except the last to be at least 5 MiB
+PART = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3() -> Iterator[S3Storage]:
+    """An S3Storage backed by moto's in-memory S3."""
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield S3Storage(client=client, bucket=BUCKET)
+
+
+@pytest.mark.asyncio
+async def test_s3_parts_sent_out_of_order_assemble_in_chunk_order(
+    s3: S3Storage, body_stream: Callable[..., AsyncIterator[bytes]]
+) -> None:
+    """Each chunk is one multipart part; completion orders them by chunk number."""
+    size = 2 * PART + 3
+    path = await s3.create(uuid.uuid4(), uuid.uuid4(), "../buh.bak", size)
+    assert path.startswith(f"s3://{BUCKET}/") and "uploadId=" in path
+
+    assert await s3.write_chunk(path, 2, PART, body_stream(b"xyz"), 3) == 3
+    assert await s3.write_chunk(path, 1, PART, body_stream(b"b" * PART), PART) == PART
+    assert await s3.write_chunk(path, 0, PART, body_stream(b"a" * PART), PART) == PART
+
+    final = await s3.finalize(path, "buh.bak")
+
+    assert final.endswith("/buh.bak") and "?" not in final
+    assert s3.location(path, "buh.bak") == final
+    assert await s3.exists(final)
+    body = s3._client.get_object(Bucket=BUCKET, Key=final.split("/", 3)[3])["Body"].read()
+    assert body == b"a" * PART + b"b" * PART + b"xyz"
+
+
+@pytest.mark.asyncio
+async def test_s3_copy_chunks_reuses_stored_object(
+    s3: S3Storage, body_stream: Callable[..., AsyncIterator[bytes]]
+) -> None:
+    """Deduplicated chunks are copied server-side; missing sources are reported."""
+    org = uuid.uuid4()
+    old = await s3.create(org, uuid.uuid4(), "old.bak", PART)
+    await s3.write_chunk(old, 0, PART, body_stream(b"a" * PART), PART)
+    old = await s3.finalize(old, "old.bak")
+
+    new = await s3.create(org, uuid.uuid4(), "new.bak", PART + 2)
+    await s3.write_chunk(new, 1, PART, body_stream(b"zz"), 2)
+    failed = await s3.copy_chunks(new, {0: (old, 0, PART), 1: (f"s3://{BUCKET}/gone", 0, 2)}, PART)
+    final = await s3.finalize(new, "new.bak")
+
+    assert failed == [1]
+    assert not await s3.exists(f"s3://{BUCKET}/gone")
+    body = s3._client.get_object(Bucket=BUCKET, Key=final.split("/", 3)[3])["Body"].read()
+    assert body == b"a" * PART + b"zz"
+
+
+@pytest.mark.asyncio
+async def test_s3_read_streams_finished_object(
+    s3: S3Storage, body_stream: Callable[..., AsyncIterator[bytes]]
+) -> None:
+    """A finished object is read back through GetObject."""
+    path = await s3.create(uuid.uuid4(), uuid.uuid4(), "buh.dt", 3)
+    await s3.write_chunk(path, 0, PART, body_stream(b"abc"), 3)
+    final = await s3.finalize(path, "buh.dt")
+
+    assert b"".join([p async for p in s3.read(final)]) == b"abc"
+
+
+@pytest.mark.asyncio
+async def test_s3_write_chunk_hashes_every_byte_and_enforces_size(
+    s3: S3Storage, body_stream: Callable[..., AsyncIterator[bytes]]
+) -> None:
+    """Buffered pieces reach the hashers in order; an oversized chunk is refused."""
+    path = await s3.create(uuid.uuid4(), uuid.uuid4(), "buh.bak", PART)
+    pieces = [b"a" * (PART // 2), b"b" * (PART // 2)]
+    sha256 = hashlib.sha256()
+
+    assert await s3.write_chunk(path, 0, PART, body_stream(*pieces), PART, [sha256]) == PART
+    assert sha256.hexdigest() == hashlib.sha256(b"".join(pieces)).hexdigest()
+
+    with pytest.raises(ChunkTooLargeError):
+        await s3.write_chunk(path, 0, PART, body_stream(b"x" * PART, b"x"), PART)
@@ -0,0 +1,38 @@
+"""Tests for request schema validation."""
+
+import pytest
+from pydantic import ValidationError
+
+from app.constants import UPLOAD_MAX_CHUNKS
+from app.schemas import UploadInitRequest
+
+
+def _init(**values: object) -> UploadInitRequest:
+    return UploadInitRequest(
+        **{"filename": "buh.bak", "size_bytes": 10, "config_code": "bp30", **values}
+    )
+
+
+@pytest.mark.parametrize("filename", ["", ".", "..", "a/..", "../buh.bak", "dir\\buh.bak"])
+def test_upload_init_rejects_paths_as_filename(filename: str) -> None:
+    """The file name becomes the stored file's name, so it cannot point elsewhere."""
+    with pytest.raises(ValidationError):
+        _init(filename=filename)
+
+
+def test_upload_init_accepts_plain_filename() -> None:
+    """Ordinary names, dots included, are kept as sent."""
+    assert _init(filename="buh 2024.v2.bak").filename == "buh 2024.v2.bak"
+
+
+@pytest.mark.parametrize("digest", ["a" * 63, "A" * 64, "g" * 64, "a" * 64 + "\n"])
+def test_upload_init_rejects_malformed_chunk_hashes(digest: str) -> None:
+    """Chunk hashes are lowercase hex SHA-256, as stored in the dedup index."""
+    with pytest.raises(ValidationError):
+        _init(chunk_hashes=["0" * 64, digest])
+
+
+def test_upload_init_caps_chunk_hash_count() -> None:
+    """No more hashes than UPLOAD_MAX_CHUNKS parts are accepted."""
+    with pytest.raises(ValidationError):
+        _init(chunk_hashes=["0" * 64] * (UPLOAD_MAX_CHUNKS + 1))
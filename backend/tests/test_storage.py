@@ -0,0 +1,137 @@
+"""Tests for upload chunk storage."""
+
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from app.services import storage
+
+
+@pytest.mark.asyncio
+async def test_chunks_written_out_of_order_at_their_offsets(
+    tmp_path: Path, body_stream: Callable[..., AsyncIterator[bytes]]
+) -> None:
+    """Chunks sent in any order should land at chunk_number * chunk_size."""
+    await storage.create_upload_file(tmp_path, 10)
+    assert storage.data_path(str(tmp_path)).stat().st_size == 10
+
+    assert await storage.write_chunk(str(tmp_path), 8, body_stream(b"ij"), 4) == 2
+    assert await storage.write_chunk(str(tmp_path), 4, body_stream(b"ef", b"gh"), 4) == 4
+    assert await storage.write_chunk(str(tmp_path), 0, body_stream(b"abcd"), 4) == 4
+
+    assert storage.data_path(str(tmp_path)).read_bytes() == b"abcdefghij"
+
+
+@pytest.mark.asyncio
+async def test_write_chunk_rejects_oversized_chunk(
+    tmp_path: Path, body_stream: Callable[..., AsyncIterator[bytes]]
+) -> None:
+    """A chunk longer than max_bytes should be rejected before it is written."""
+    await storage.create_upload_file(tmp_path, 8)
+
+    with pytest.raises(storage.ChunkTooLargeError):
+        await storage.write_chunk(str(tmp_path), 0, body_stream(b"x" * 3, b"x" * 3), 4)
+
+    assert storage.data_path(str(tmp_path)).read_bytes() == b"\0" * 8
+
+
+@pytest.mark.asyncio
+async def test_finalize_renames_data_file(
+    tmp_path: Path, body_stream: Callable[..., AsyncIterator[bytes]]
+) -> None:
+    """The finished file takes the client's file name inside the upload directory."""
+    await storage.create_upload_file(tmp_path, 4)
+    await storage.write_chunk(str(tmp_path), 0, body_stream(b"abcd"), 4)
+
+    final = await storage.finalize(str(tmp_path), "buh.bak")
+
+    assert final == tmp_path / "buh.bak"
+    assert storage.LocalStorage().location(str(tmp_path), "buh.bak") == str(final)
+    assert final.read_bytes() == b"abcd"
+    assert not storage.data_path(str(tmp_path)).exists()
+
+
+@pytest.mark.asyncio
+async def test_copy_chunks_fills_deduplicated_chunks(
+    tmp_path: Path, body_stream: Callable[..., AsyncIterator[bytes]]
+) -> None:
+    """Known chunks are copied from an older file; missing sources are reported."""
+    old = tmp_path / "old.bak"
+    old.write_bytes(b"abcdefghij")
+    new_dir = tmp_path / "new"
+    await storage.create_upload_file(new_dir, 10)
+    await storage.write_chunk(str(new_dir), 4, body_stream(b"EFGH"), 4)
+
+    copies = {0: (str(old), 0, 4), 2: (str(old), 8, 2), 1: (str(tmp_path / "gone"), 4, 4)}
+    failed = await storage.copy_chunks(str(new_dir), copies, 4)
+
+    assert failed == [1]
+    assert storage.data_path(str(new_dir)).read_bytes() == b"abcdEFGHij"
+
+
+@pytest.mark.asyncio
+async def test_local_free_bytes_reads_upload_volume(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Free space comes from the UPLOAD_DIR volume; a missing dir means unknown."""
+    monkeypatch.setattr(storage.settings, "UPLOAD_DIR", str(tmp_path))
+    free = await storage.LocalStorage().free_bytes()
+    assert free is not None and free > 0
+
+    monkeypatch.setattr(storage.settings, "UPLOAD_DIR", str(tmp_path / "missing"))
+    assert await storage.LocalStorage().free_bytes() is None
+
+
+@pytest.mark.asyncio
+async def test_delete_upload_truncates_and_removes_directory(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    body_stream: Callable[..., AsyncIterator[bytes]],
+) -> None:
+    """Files are shrunk step by step, then the whole upload directory goes away."""
+    monkeypatch.setattr(storage, "UPLOAD_GC_TRUNCATE_STEP_BYTES", 4096)
+    monkeypatch.setattr(storage, "UPLOAD_GC_THROTTLE_SECONDS", 0)
+    upload = tmp_path / "upload"
+    await storage.create_upload_file(upload, 3 * 4096)
+    await storage.write_chunk(str(upload), 0, body_stream(b"x" * 3 * 4096), 3 * 4096)
+    (upload / "sub").mkdir()
+    (upload / "sub" / "extra").write_bytes(b"abcd")
+
+    reclaimed = await storage.delete_upload(str(upload))
+
+    assert reclaimed >= 3 * 4096
+    assert not upload.exists()
+    assert await storage.delete_upload(str(upload)) == 0
+
+
+@pytest.mark.asyncio
+async def test_local_read_streams_finished_file(tmp_path: Path) -> None:
+    """The processing worker reads the finished file back in buffer-sized pieces."""
+    path = tmp_path / "buh.dt"
+    data = b"x" * (2 * storage.UPLOAD_WRITE_BUFFER_BYTES + 5)
+    path.write_bytes(data)
+
+    pieces = [p async for p in storage.LocalStorage().read(str(path))]
+
+    assert b"".join(pieces) == data
+    assert max(map(len, pieces)) == storage.UPLOAD_WRITE_BUFFER_BYTES
+
+
+@pytest.mark.asyncio
+async def test_copy_chunks_reads_compressed_sources(tmp_path: Path) -> None:
+    """A source compressed after it was indexed is read through its seek table."""
+    old = tmp_path / "old.bak"
+    old.write_bytes(b"abcd" * 1000)
+    with ThreadPoolExecutor(1) as pool:
+        location, _ = await storage.LocalStorage().compress(str(old), pool, 1)
+    assert location == f"{old}.zst" and not old.exists()
+
+    new = tmp_path / "new"
+    await storage.create_upload_file(new, 8)
+    failed = await storage.copy_chunks(str(new), {0: (str(old), 4, 4), 1: (str(old), 8, 4)}, 4)
+
+    assert failed == []
+    assert storage.data_path(str(new)).read_bytes() == b"abcdabcd"
+    assert await storage.LocalStorage().exists(str(old))
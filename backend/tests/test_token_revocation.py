@@ -0,0 +1,65 @@
+"""Tests for token revocation and its per-worker Bloom filter."""
+
+import uuid
+from collections.abc import Iterator
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import create_access_token, decode_token
+from app.core.bloom import BloomFilter
+from app.main import app
+from app.services import token_revocation
+
+
+@pytest.fixture
+def loaded_filter() -> Iterator[BloomFilter]:
+    """Install an (empty) filter as if loaded from Redis at startup."""
+    bloom = BloomFilter(1000, 0.001)
+    token_revocation._filter = bloom
+    yield bloom
+    token_revocation._filter = None
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    """Added items are always found; unknown items rarely are."""
+    bloom = BloomFilter(1000, 0.01)
+    added = [f"jti:{uuid.uuid4().hex}" for _ in range(1000)]
+    for item in added:
+        bloom.add(item)
+
+    assert all(item in bloom for item in added)
+    false_positives = sum(f"jti:{uuid.uuid4().hex}" in bloom for _ in range(10000))
+    assert false_positives < 300
+
+
+def test_access_tokens_carry_unique_jti() -> None:
+    """Every access token can be revoked on its own."""
+    user_id = uuid.uuid4()
+
+    first = decode_token(create_access_token(user_id, "+79990000000", "user"))
+    second = decode_token(create_access_token(user_id, "+79990000000", "user"))
+
+    assert first["jti"] and first["jti"] != second["jti"]
+
+
+@pytest.mark.asyncio
+async def test_unrevoked_token_is_checked_without_redis(loaded_filter: BloomFilter) -> None:
+    """A token missing from the filter is accepted in memory (Redis is not reachable here)."""
+    payload = decode_token(create_access_token(uuid.uuid4(), "+79990000000", "user"))
+
+    assert await token_revocation.is_revoked(payload) is False
+
+
+@pytest.mark.asyncio
+async def test_logout_ignores_invalid_tokens() -> None:
+    """Logging out with tokens that no longer verify succeeds without revoking anything."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/auth/logout",
+            json={"refresh_token": "garbage"},
+            headers={"Authorization": "Bearer garbage"},
+        )
+
+    assert response.status_code == 200
@@ -0,0 +1,82 @@
+"""Tests for upload admission control (Lua scripts run against fakeredis)."""
+
+import uuid
+
+import fakeredis
+import pytest
+
+from app.exceptions import RateLimitError
+from app.services import upload_admission
+
+
+class _Volume:
+    """Storage backend stub with a fixed amount of free space."""
+
+    def __init__(self, free: int | None) -> None:
+        self.free = free
+
+    async def free_bytes(self) -> int | None:
+        return self.free
+
+
+@pytest.fixture
+def volume(fake_redis: fakeredis.FakeAsyncRedis, monkeypatch: pytest.MonkeyPatch) -> _Volume:
+    """A 1000-byte volume with a 100-byte reserve, at most 2 uploads per org and 3 in total."""
+    monkeypatch.setattr(upload_admission, "_admit_script", None)
+    monkeypatch.setattr(upload_admission, "_touch_script", None)
+    monkeypatch.setattr(upload_admission.settings, "UPLOAD_DISK_RESERVE_BYTES", 100)
+    monkeypatch.setattr(upload_admission.settings, "UPLOAD_MAX_ACTIVE_PER_ORG", 2)
+    monkeypatch.setattr(upload_admission.settings, "UPLOAD_MAX_ACTIVE_TOTAL", 3)
+    volume = _Volume(1000)
+    monkeypatch.setattr(upload_admission, "get_storage", lambda: volume)
+    return volume
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("volume")
+async def test_admit_enforces_org_and_global_caps() -> None:
+    """An organization gets at most its cap; all organizations together the global cap."""
+    org_a, org_b = uuid.uuid4(), uuid.uuid4()
+    await upload_admission.admit(org_a, uuid.uuid4(), 1)
+    await upload_admission.admit(org_a, uuid.uuid4(), 1)
+    with pytest.raises(RateLimitError, match="организации"):
+        await upload_admission.admit(org_a, uuid.uuid4(), 1)
+
+    await upload_admission.admit(org_b, uuid.uuid4(), 1)
+    with pytest.raises(RateLimitError, match="Сервис загружен") as exc_info:
+        await upload_admission.admit(org_b, uuid.uuid4(), 1)
+    assert exc_info.value.headers["Retry-After"]
+
+
+@pytest.mark.asyncio
+async def test_admit_keeps_disk_reserve(
+    volume: _Volume, fake_redis: fakeredis.FakeAsyncRedis
+) -> None:
+    """Reservations must fit in free space minus the reserve; refused uploads reserve nothing."""
+    org = uuid.uuid4()
+    await upload_admission.admit(org, uuid.uuid4(), 600)
+    with pytest.raises(RateLimitError, match="места"):
+        await upload_admission.admit(org, uuid.uuid4(), 301)
+    await upload_admission.admit(org, uuid.uuid4(), 300)
+
+    assert sorted(map(int, await fake_redis.hvals("upload_admission:bytes"))) == [300, 600]
+
+
+@pytest.mark.asyncio
+async def test_touch_shrinks_reservation_and_release_frees_slot(
+    volume: _Volume, fake_redis: fakeredis.FakeAsyncRedis
+) -> None:
+    """touch() without a size only keeps the slot; a released upload stays released."""
+    org, upload_id = uuid.uuid4(), uuid.uuid4()
+    await upload_admission.admit(org, upload_id, 900)
+
+    await upload_admission.touch(org, upload_id, 400)
+    assert await fake_redis.hget("upload_admission:bytes", str(upload_id)) == "400"
+    await upload_admission.touch(org, upload_id)
+    assert await fake_redis.hget("upload_admission:bytes", str(upload_id)) == "400"
+
+    await upload_admission.release(org, upload_id)
+    await upload_admission.touch(org, upload_id, 100)
+    assert await fake_redis.hget("upload_admission:bytes", str(upload_id)) is None
+    assert await fake_redis.zcard("upload_admission:active") == 0
+    await upload_admission.admit(org, uuid.uuid4(), 900)
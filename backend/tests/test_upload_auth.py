@@ -0,0 +1,56 @@
+"""Tests for upload-scoped chunk tokens."""
+
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import create_upload_token, decode_token
+from app.main import app
+
+
+def _upload_token(upload_id: uuid.UUID) -> str:
+    """An upload token for a 12 MB upload in 5 MB chunks."""
+    return create_upload_token(
+        uuid.uuid4(), uuid.uuid4(), upload_id, 12 * 1024 * 1024, 5 * 1024 * 1024
+    )
+
+
+def test_upload_token_carries_upload_claims() -> None:
+    """The chunk endpoint needs no DB lookup; the storage path is not exposed."""
+    upload_id = uuid.uuid4()
+    payload = decode_token(_upload_token(upload_id))
+
+    assert payload["type"] == "upload"
+    assert payload["upload_id"] == str(upload_id)
+    assert payload["size"] == 12 * 1024 * 1024
+    assert payload["chunk_size"] == 5 * 1024 * 1024
+    assert "path" not in payload
+
+
+@pytest.mark.asyncio
+async def test_chunk_rejects_token_of_another_upload() -> None:
+    """A token is only valid for the upload it was issued for."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.put(
+            f"/api/v1/uploads/{uuid.uuid4()}/chunk/0",
+            content=b"x",
+            headers={"Authorization": f"Bearer {_upload_token(uuid.uuid4())}"},
+        )
+
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_chunk_rejects_invalid_token() -> None:
+    """An invalid token is refused before any database or storage access."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.put(
+            f"/api/v1/uploads/{uuid.uuid4()}/chunk/0",
+            content=b"x",
+            headers={"Authorization": "Bearer not-a-jwt"},
+        )
+
+    assert response.status_code == 401
@@ -0,0 +1,79 @@
+"""Tests for per-organization upload bandwidth shaping."""
+
+import math
+import uuid
+from collections.abc import AsyncIterator, Callable
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import fakeredis
+import pytest
+
+from app.config import settings
+from app.constants import (
+    PLAN_BUSINESS,
+    PLAN_TRIAL,
+    UPLOAD_BANDWIDTH_BURST_SECONDS,
+    UPLOAD_WRITE_BUFFER_BYTES,
+)
+from app.services import upload_bandwidth
+from app.services.upload_bandwidth import plan_rate, take, throttle
+
+
+def test_plan_rate_falls_back_to_trial() -> None:
+    """Paid plans have their own rate; unknown plans get the trial rate."""
+    assert plan_rate(PLAN_BUSINESS) == settings.UPLOAD_RATE_BUSINESS
+    assert plan_rate(PLAN_TRIAL) == settings.UPLOAD_RATE_TRIAL
+    assert plan_rate("legacy") == settings.UPLOAD_RATE_TRIAL
+
+
+@pytest.mark.asyncio
+async def test_unlimited_plan_is_not_throttled(
+    monkeypatch: pytest.MonkeyPatch, body_stream: Callable[..., AsyncIterator[bytes]]
+) -> None:
+    """A zero rate passes the body through without touching Redis."""
+    monkeypatch.setattr(settings, "UPLOAD_RATE_BUSINESS", 0)
+
+    body = [p async for p in throttle(body_stream(b"ab", b"cd"), uuid.uuid4(), PLAN_BUSINESS)]
+
+    assert body == [b"ab", b"cd"]
+
+
+@pytest.mark.asyncio
+async def test_take_returns_time_to_pay_back_the_debt(
+    fake_redis: fakeredis.FakeAsyncRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A full bucket covers the burst; bytes beyond it cost bytes / rate seconds."""
+    monkeypatch.setattr(upload_bandwidth, "_take_script", None)
+    org = uuid.uuid4()
+    rate = 1000
+
+    assert await take(org, rate * UPLOAD_BANDWIDTH_BURST_SECONDS, rate) == 0
+    wait = await take(org, rate // 2, rate)
+
+    assert 0.4 < wait <= 0.5
+    # The bucket expires once it would be full again: debt plus burst at `rate`
+    refill = math.ceil(UPLOAD_BANDWIDTH_BURST_SECONDS + 0.5) + 1
+    assert await fake_redis.ttl(f"upload_bandwidth:{org}") == refill
+
+
+@pytest.mark.asyncio
+async def test_throttle_sleeps_while_bucket_is_in_debt(
+    fake_redis: fakeredis.FakeAsyncRedis,
+    monkeypatch: pytest.MonkeyPatch,
+    body_stream: Callable[..., AsyncIterator[bytes]],
+) -> None:
+    """Reading pauses once a write buffer overdraws the bucket, then resumes."""
+    monkeypatch.setattr(upload_bandwidth, "_take_script", None)
+    # The burst is half a write buffer: one buffer leaves the bucket half a buffer in debt
+    rate = UPLOAD_WRITE_BUFFER_BYTES // (2 * UPLOAD_BANDWIDTH_BURST_SECONDS)
+    monkeypatch.setattr(settings, "UPLOAD_RATE_TRIAL", rate)
+    sleep = AsyncMock()
+    monkeypatch.setattr(upload_bandwidth, "asyncio", SimpleNamespace(sleep=sleep))
+    piece = b"x" * UPLOAD_WRITE_BUFFER_BYTES
+
+    body = [p async for p in throttle(body_stream(piece, b"tail"), uuid.uuid4(), PLAN_TRIAL)]
+
+    assert body == [piece, b"tail"]
+    [(wait,), _] = sleep.await_args
+    assert UPLOAD_BANDWIDTH_BURST_SECONDS * 0.9 < wait <= UPLOAD_BANDWIDTH_BURST_SECONDS
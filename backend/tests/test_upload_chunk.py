@@ -0,0 +1,69 @@
+"""Tests for the chunk endpoint: upload lookup and rejected uploads."""
+
+import uuid
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import fakeredis
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import create_upload_token
+from app.core import rate_limit
+from app.main import app
+from app.routes import upload as upload_routes
+from app.services import storage, upload_progress
+
+
+@pytest.mark.asyncio
+async def test_unrecognized_chunk_zero_fails_upload_and_deletes_its_file(
+    tmp_path: Path, fake_redis: fakeredis.FakeAsyncRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A file that is not a .dt / .bak is marked failed and its data file removed at once."""
+    monkeypatch.setattr(rate_limit, "_script", None)
+    monkeypatch.setattr(storage, "_backend", storage.LocalStorage())
+    monkeypatch.setattr(storage, "UPLOAD_GC_THROTTLE_SECONDS", 0)
+    monkeypatch.setattr(upload_routes.settings, "UPLOAD_RATE_TRIAL", 0)
+    update_upload = AsyncMock()
+    monkeypatch.setattr(upload_routes, "_update_upload", update_upload)
+    upload_id = uuid.uuid4()
+    path = tmp_path / str(upload_id)
+    await storage.create_upload_file(path, 4096)
+    await upload_progress.set_storage_path(upload_id, str(path))
+    token = create_upload_token(uuid.uuid4(), uuid.uuid4(), upload_id, 4096, 4096)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.put(
+            f"/api/v1/uploads/{upload_id}/chunk/0",
+            content=b"not a backup" * 300,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    assert response.status_code == 422
+    update_upload.assert_awaited_once_with(upload_id, status="error")
+    assert not path.exists()
+    assert await upload_progress.get_storage_path(upload_id) == (None, True)
+
+
+@pytest.mark.asyncio
+async def test_upload_token_reads_storage_path_server_side(
+    fake_redis: fakeredis.FakeAsyncRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The path comes from the Redis cache, or from the upload row once it expired."""
+    upload_id = uuid.uuid4()
+    token = create_upload_token(uuid.uuid4(), uuid.uuid4(), upload_id, 4096, 4096)
+    session = AsyncMock()
+    session.__aenter__.return_value = session
+    session.execute.return_value.scalar_one_or_none = lambda: "/uploads/from-row"
+    monkeypatch.setattr(upload_routes, "async_session_factory", lambda: session)
+
+    await upload_progress.set_storage_path(upload_id, "/uploads/cached")
+    cached = await upload_routes._chunk_target(upload_id, f"Bearer {token}")
+    await fake_redis.delete(f"upload_path:{upload_id}")
+    loaded = await upload_routes._chunk_target(upload_id, f"Bearer {token}")
+
+    assert cached.storage_path == "/uploads/cached"
+    assert loaded.storage_path == "/uploads/from-row"
+    assert await upload_progress.get_storage_path(upload_id) == ("/uploads/from-row", False)
+    session.execute.assert_awaited_once()
@@ -0,0 +1,35 @@
+"""Tests for upload progress events and their SSE encoding."""
+
+import json
+import uuid
+
+from app.core.pubsub import format_sse
+from app.services.upload_events import channel, is_final, make_event
+
+
+def test_event_reports_bytes_capped_at_file_size() -> None:
+    """The last, shorter chunk does not push bytes_received past the file size."""
+    upload_id, org_id = uuid.uuid4(), uuid.uuid4()
+
+    event = make_event(upload_id, org_id, "uploading", 3, 3, 250, 100)
+
+    assert event["bytes_received"] == 250
+    assert event["upload_id"] == str(upload_id)
+    assert channel(upload_id) == f"upload_events:{upload_id}"
+
+
+def test_stream_ends_on_final_statuses_only() -> None:
+    """Uploaded, error and expired end a stream; progress does not."""
+    upload_id, org_id = uuid.uuid4(), uuid.uuid4()
+
+    assert not is_final(make_event(upload_id, org_id, "uploading", 1, 3, 250, 100))
+    for status in ("uploaded", "error", "expired"):
+        assert is_final(make_event(upload_id, org_id, status, 3, 3, 250, 100))
+
+
+def test_format_sse_frames_one_json_event() -> None:
+    """Each event is a single data line followed by a blank line."""
+    frame = format_sse({"status": "uploading", "chunks_received": 1})
+
+    assert frame.startswith("data: ") and frame.endswith("\n\n")
+    assert json.loads(frame.removeprefix("data: ")) == {"status": "uploading", "chunks_received": 1}
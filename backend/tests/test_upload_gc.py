@@ -0,0 +1,130 @@
+"""Tests for the upload garbage collector."""
+
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock
+
+import fakeredis
+import pytest
+
+from app.constants import UPLOAD_STATUS_UPLOADING
+from app.services import upload_events, upload_progress
+from app.workers import upload_gc
+
+
+class _Session:
+    """Stands in for a DB session: the first query returns the candidate rows."""
+
+    def __init__(self, rows: list[Any], log: list[str] | None = None) -> None:
+        self.rows = rows
+        self.log = [] if log is None else log
+
+    async def __aenter__(self) -> "_Session":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+    async def execute(self, query: Any) -> SimpleNamespace:
+        self.log.append("execute")
+        rows, self.rows = self.rows, []
+        return SimpleNamespace(all=lambda: rows)
+
+    async def commit(self) -> None:
+        self.log.append("commit")
+
+
+def _row(organization_id: uuid.UUID) -> SimpleNamespace:
+    upload_id = uuid.uuid4()
+    return SimpleNamespace(
+        id=upload_id,
+        organization_id=organization_id,
+        storage_path=f"/uploads/{upload_id}",
+        status=UPLOAD_STATUS_UPLOADING,
+        created_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        chunks_expected=4,
+        size_bytes=4096,
+        chunk_size=1024,
+    )
+
+
+@pytest.mark.asyncio
+async def test_old_upload_still_receiving_chunks_is_kept(
+    fake_redis: fakeredis.FakeAsyncRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Both uploads are older than UPLOAD_STALE_SECONDS; only the idle one is collected."""
+    org = uuid.uuid4()
+    stale, active = _row(org), _row(org)
+    await upload_progress.mark_chunk(stale.id, 0, "a" * 64, org, 1024, 0.1)
+    # Its bitmap expired: no chunk for UPLOAD_BITMAP_TTL_SECONDS
+    await fake_redis.delete(f"upload_chunks:{stale.id}")
+    await upload_progress.mark_chunk(active.id, 0, "b" * 64, org, 1024, 0.1)
+    log: list[str] = []
+    backend = SimpleNamespace(
+        delete=AsyncMock(side_effect=lambda path: log.append("delete") or 1024)
+    )
+    monkeypatch.setattr(upload_gc, "get_storage", lambda: backend)
+    monkeypatch.setattr(upload_gc, "async_session_factory", lambda: _Session([stale, active], log))
+    monkeypatch.setattr(upload_events, "emit", AsyncMock())
+    stats = upload_gc.SweepStats()
+
+    await upload_gc._sweep_batch(upload_gc._stale_filter(datetime.now(timezone.utc)), None, stats)
+
+    backend.delete.assert_awaited_once_with(stale.storage_path)
+    assert stats.uploads_expired == 1
+    assert await upload_progress.idle_seconds([stale.id, active.id]) == [None, 0]
+    # Claimed (select, update) and committed before the files are deleted
+    assert log == ["execute", "execute", "commit", "delete"]
+    assert await fake_redis.zcard(upload_gc.DELETING_KEY) == 0
+
+
+@pytest.mark.asyncio
+async def test_upload_whose_files_cannot_be_deleted_is_unclaimed(
+    fake_redis: fakeredis.FakeAsyncRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    row = _row(uuid.uuid4())
+    sessions: list[_Session] = []
+
+    def session_factory() -> _Session:
+        sessions.append(_Session([row] if not sessions else []))
+        return sessions[-1]
+
+    backend = SimpleNamespace(delete=AsyncMock(side_effect=OSError("disk")))
+    monkeypatch.setattr(upload_gc, "get_storage", lambda: backend)
+    monkeypatch.setattr(upload_gc, "async_session_factory", session_factory)
+    monkeypatch.setattr(upload_events, "emit", AsyncMock())
+    stats = upload_gc.SweepStats()
+
+    await upload_gc._sweep_batch(upload_gc._stale_filter(datetime.now(timezone.utc)), None, stats)
+
+    assert (stats.uploads_expired, stats.errors) == (0, 1)
+    # The second session puts the status back
+    assert sessions[1].log == ["execute", "commit"]
+    upload_events.emit.assert_not_awaited()
+    assert await fake_redis.zcard(upload_gc.DELETING_KEY) == 0
+
+
+@pytest.mark.asyncio
+async def test_resume_deletes_only_abandoned_journal_entries(
+    fake_redis: fakeredis.FakeAsyncRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    now = time.time()
+    await fake_redis.zadd(
+        upload_gc.DELETING_KEY,
+        {
+            "/uploads/abandoned": now - upload_gc.UPLOAD_GC_RESUME_SECONDS - 1,
+            "/uploads/in-flight": now,
+        },
+    )
+    backend = SimpleNamespace(delete=AsyncMock(return_value=2048))
+    monkeypatch.setattr(upload_gc, "get_storage", lambda: backend)
+    stats = upload_gc.SweepStats()
+
+    await upload_gc._resume(stats)
+
+    backend.delete.assert_awaited_once_with("/uploads/abandoned")
+    assert stats.bytes_reclaimed == 2048
+    assert await fake_redis.zrange(upload_gc.DELETING_KEY, 0, -1) == ["/uploads/in-flight"]
@@ -0,0 +1,34 @@
+"""Tests for upload session initialization."""
+
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import BackgroundTasks
+
+from app.constants import CHUNK_SIZE_BYTES, UPLOAD_MAX_CHUNKS
+from app.exceptions import ValidationError
+from app.routes import upload as upload_routes
+from app.schemas import UploadInitRequest
+
+
+@pytest.mark.asyncio
+async def test_init_with_chunk_hashes_refuses_more_than_max_chunks(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Hashes fix the chunk size, so a file needing too many parts is refused up front."""
+    admit = AsyncMock()
+    monkeypatch.setattr(upload_routes.upload_admission, "admit", admit)
+    body = UploadInitRequest(
+        filename="buh.bak",
+        size_bytes=UPLOAD_MAX_CHUNKS * CHUNK_SIZE_BYTES + 1,
+        config_code="bp30",
+        chunk_hashes=["0" * 64] * UPLOAD_MAX_CHUNKS,
+    )
+    user = SimpleNamespace(id=uuid.uuid4(), organization_id=uuid.uuid4())
+
+    with pytest.raises(ValidationError):
+        await upload_routes.init_upload(body, BackgroundTasks(), user, None)
+
+    admit.assert_not_awaited()
@@ -0,0 +1,53 @@
+"""Tests for the resumable upload chunk bitmap."""
+
+import hashlib
+
+from app.constants import (
+    CHUNK_SIZE_BYTES,
+    MAX_UPLOAD_SIZE_BYTES,
+    UPLOAD_MAX_CHUNK_BYTES,
+    UPLOAD_MAX_CHUNKS,
+)
+from app.services.upload_progress import choose_chunk_size, composite_digest, ranges_from_words
+
+
+def test_ranges_from_empty_bitmap_is_whole_upload() -> None:
+    """A missing bitmap (all zeros) means every chunk must be sent."""
+    assert ranges_from_words([], 5) == [(0, 4)]
+
+
+def test_ranges_from_words_finds_gaps() -> None:
+    """Unset bits should be grouped into inclusive ranges, MSB first."""
+    # Chunks 0, 1 and 4 received out of 6; second word covers chunks 32..
+    word = 0b1100_1000 << 24
+    assert ranges_from_words([word], 6) == [(2, 3), (5, 5)]
+    assert ranges_from_words([0xFFFFFFFF, 0], 34) == [(32, 33)]
+    assert ranges_from_words([0xFFFFFFFF], 32) == []
+
+
+def test_composite_digest_hashes_chunk_digests_in_order() -> None:
+    """The file digest is SHA-256 over the binary chunk digests, in chunk order."""
+    chunks = [b"abcd", b"efgh", b"ij"]
+    digests = [hashlib.sha256(c).hexdigest() for c in chunks]
+    expected = hashlib.sha256(b"".join(hashlib.sha256(c).digest() for c in chunks)).hexdigest()
+
+    assert composite_digest(digests) == expected
+    assert composite_digest(digests[::-1]) != expected
+
+
+def test_choose_chunk_size_scales_with_file_size() -> None:
+    """Small files keep the minimum chunk; big ones get fewer, bigger chunks."""
+    mb = 1024 * 1024
+    assert choose_chunk_size(100 * mb, None) == CHUNK_SIZE_BYTES
+    assert choose_chunk_size(10 * 1024 * mb, None) == 21 * mb
+    assert choose_chunk_size(MAX_UPLOAD_SIZE_BYTES, None) == UPLOAD_MAX_CHUNK_BYTES
+
+
+def test_choose_chunk_size_respects_throughput_and_part_limit() -> None:
+    """Slow clients get smaller chunks, but never more than UPLOAD_MAX_CHUNKS."""
+    mb = 1024 * 1024
+    slow = 256 * 1024  # 256 KB/s -> 7.5 MB in 30 s
+    assert choose_chunk_size(10 * 1024 * mb, slow) == 8 * mb
+    chunk = choose_chunk_size(MAX_UPLOAD_SIZE_BYTES, 1.0)
+    assert chunk % mb == 0
+    assert MAX_UPLOAD_SIZE_BYTES / chunk <= UPLOAD_MAX_CHUNKS
@@ -0,0 +1,105 @@
+"""Tests for the two-tier cache of authenticated users."""
+
+import uuid
+from datetime import datetime, timezone
+
+import fakeredis
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlalchemy.orm import Session
+
+from app.models import User
+from app.services import user_cache
+
+
+def _user() -> User:
+    return User(
+        id=uuid.uuid4(),
+        organization_id=uuid.uuid4(),
+        phone="+79990000000",
+        email=None,
+        phone_verified=True,
+        role="owner",
+        status="active",
+        referral_code="REF123",
+        created_at=datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        is_deleted=False,
+    )
+
+
+def test_snapshot_roundtrip_keeps_types_and_nulls() -> None:
+    """Every column comes back with its Python type; NULLs are not stored."""
+    user = _user()
+
+    fields = user_cache.encode(user)
+    values = user_cache.decode(fields)
+
+    assert "email" not in fields
+    assert values["id"] == user.id
+    assert values["created_at"] == user.created_at
+    assert values["phone_verified"] is True and values["is_deleted"] is False
+    assert values["email"] is None
+
+
+@pytest.mark.asyncio
+async def test_local_hit_is_merged_without_select_and_tracked_on_change() -> None:
+    """A cached user joins the session as persistent; changing it marks it stale."""
+    user = _user()
+    user_cache._remember(user.id, user_cache.decode(user_cache.encode(user)))
+
+    cached = await user_cache.get(user.id)
+    assert cached is not None
+    session = Session()
+    merged = session.merge(cached, load=False)
+    user_cache._track_user_changes(session, None, None)
+    assert user_cache.stale_users(session) == []
+
+    merged.status = "disabled"
+    user_cache._track_user_changes(session, None, None)
+
+    assert merged.role == "owner"
+    assert user_cache.stale_users(session) == [user.id]
+    user_cache._evict([str(user.id)])
+
+
+@pytest.mark.asyncio
+async def test_invalidate_survives_redis_outage(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A Redis error after the commit is logged; the local entry is still dropped."""
+
+    async def _down() -> None:
+        raise RedisConnectionError("down")
+
+    user = _user()
+    user_cache._remember(user.id, user_cache.decode(user_cache.encode(user)))
+    monkeypatch.setattr(user_cache, "get_redis", _down)
+
+    await user_cache.invalidate(user.id)
+
+    assert user.id not in user_cache._local
+
+
+@pytest.mark.asyncio
+async def test_commit_of_any_session_invalidates_changed_users(
+    fake_redis: fakeredis.FakeAsyncRedis,
+) -> None:
+    """Sessions not opened by get_db (workers, scripts) invalidate on commit too."""
+    user = _user()
+    user_cache._remember(user.id, user_cache.decode(user_cache.encode(user)))
+    session = Session()
+    session.info[user_cache._STALE_KEY] = {user.id}
+
+    session.commit()
+    await user_cache.wait_invalidated(session)
+
+    assert user.id not in user_cache._local
+    assert await fake_redis.exists(f"user_cache:{user.id}:guard")
+
+
+def test_rollback_forgets_changed_users() -> None:
+    session = Session()
+    session.begin()
+    session.info[user_cache._STALE_KEY] = {uuid.uuid4()}
+
+    session.rollback()
+
+    assert user_cache.stale_users(session) == []
@@ -14,6 +14,7 @@ import type {
   AcceptInviteRequest,
   RefreshTokenRequest,
   RefreshTokenResponse,
+  LogoutRequest,
 } from "@/types/api";
 
 /**
@@ -86,10 +87,11 @@ export async function refreshTokens(refreshToken: string): Promise<RefreshTokenR
 }
 
 /**
- * Logout — invalidate the current refresh token.
+ * Logout — revoke the current access and refresh tokens.
  */
 export async function logout(): Promise<void> {
-  await apiClient.post("/auth/logout");
+  const payload: LogoutRequest = { refresh_token: localStorage.getItem("refresh_token") };
+  await apiClient.post("/auth/logout", payload);
   localStorage.removeItem("access_token");
   localStorage.removeItem("refresh_token");
 }
@@ -7,7 +7,7 @@
 import axios from "axios";
 import type { AxiosError, InternalAxiosRequestConfig } from "axios";
 
-const API_BASE = import.meta.env.VITE_API_URL || "";
+export const API_BASE = import.meta.env.VITE_API_URL || "";
 
 /** Configured axios instance for 1C24.PRO API */
 export const apiClient = axios.create({
@@ -21,7 +21,8 @@ export const apiClient = axios.create({
  */
 apiClient.interceptors.request.use((config: InternalAxiosRequestConfig) => {
   const token = localStorage.getItem("access_token");
-  if (token) {
+  // Chunk PUTs bring their own upload-scoped token
+  if (token && !config.headers.Authorization) {
     config.headers.Authorization = `Bearer ${token}`;
   }
   return config;
@@ -41,8 +42,10 @@ apiClient.interceptors.response.use(
     const isUnauthorized = error.response?.status === 401;
     const isRetry = (originalRequest as InternalAxiosRequestConfig & { _retry?: boolean })._retry;
     const isRefreshEndpoint = originalRequest.url?.includes("/auth/refresh");
+    // An expired upload token is renewed via getUploadStatus, not /auth/refresh
+    const isChunkUpload = originalRequest.url?.includes("/chunk/");
 
-    if (isUnauthorized && !isRetry && !isRefreshEndpoint) {
+    if (isUnauthorized && !isRetry && !isRefreshEndpoint && !isChunkUpload) {
       (originalRequest as InternalAxiosRequestConfig & { _retry?: boolean })._retry = true;
 
       const refreshToken = localStorage.getItem("refresh_token");
@@ -0,0 +1,111 @@
+/**
+ * Upload API — chunked, resumable upload of .dt / .bak files.
+ * @see TZ section 2.5 — Chunked upload technical scheme
+ */
+
+import { isAxiosError } from "axios";
+
+import { apiClient } from "@/api/client";
+import type {
+  ChunkRange,
+  UploadInitRequest,
+  UploadInitResponse,
+  UploadStatusResponse,
+} from "@/types/api";
+
+/**
+ * Create an upload session.
+ * @param payload - File name, size and configuration code
+ * @returns Upload id, chunk size and number of chunks
+ */
+export async function initUpload(payload: UploadInitRequest): Promise<UploadInitResponse> {
+  const { data } = await apiClient.post<UploadInitResponse>("/uploads/init", payload);
+  return data;
+}
+
+/**
+ * Send one chunk as a raw binary body.
+ * @param uploadId - Upload session id
+ * @param chunkNumber - Zero-based chunk index
+ * @param chunk - Slice of the file
+ * @param uploadToken - upload_token from initUpload / getUploadStatus
+ */
+export async function uploadChunk(
+  uploadId: string,
+  chunkNumber: number,
+  chunk: Blob,
+  uploadToken: string,
+): Promise<void> {
+  await apiClient.put(`/uploads/${uploadId}/chunk/${chunkNumber.toString()}`, chunk, {
+    headers: {
+      "Content-Type": "application/octet-stream",
+      Authorization: `Bearer ${uploadToken}`,
+    },
+    timeout: 0,
+  });
+}
+
+/**
+ * Send chunks over several parallel streams; order does not matter to the server.
+ * An expired upload token is renewed once via getUploadStatus and the chunk is retried.
+ * @param uploadId - Upload session id
+ * @param file - The file being uploaded
+ * @param chunkSize - Chunk size from initUpload
+ * @param chunks - Chunk numbers to send (all, or chunksToResume() after a drop)
+ * @param parallel - Number of concurrent requests (parallel_chunks from initUpload)
+ * @param uploadToken - upload_token from initUpload / getUploadStatus
+ * @param onChunkDone - Called after each chunk is accepted
+ */
+export async function uploadChunksParallel(
+  uploadId: string,
+  file: File,
+  chunkSize: number,
+  chunks: number[],
+  parallel: number,
+  uploadToken: string,
+  onChunkDone?: (chunkNumber: number) => void,
+): Promise<void> {
+  const queue = [...chunks];
+  let token = uploadToken;
+  const send = async (n: number): Promise<void> => {
+    const chunk = file.slice(n * chunkSize, (n + 1) * chunkSize);
+    try {
+      await uploadChunk(uploadId, n, chunk, token);
+    } catch (error) {
+      if (!isAxiosError(error) || error.response?.status !== 401) throw error;
+      const status = await getUploadStatus(uploadId);
+      if (!status.upload_token) throw error;
+      token = status.upload_token;
+      await uploadChunk(uploadId, n, chunk, token);
+    }
+  };
+  const worker = async (): Promise<void> => {
+    for (let n = queue.shift(); n !== undefined; n = queue.shift()) {
+      await send(n);
+      onChunkDone?.(n);
+    }
+  };
+  await Promise.all(Array.from({ length: Math.max(1, parallel) }, worker));
+}
+
+/**
+ * Get upload progress, including chunk ranges the server has not received.
+ * @param uploadId - Upload session id
+ */
+export async function getUploadStatus(uploadId: string): Promise<UploadStatusResponse> {
+  const { data } = await apiClient.get<UploadStatusResponse>(`/uploads/${uploadId}/status`);
+  return data;
+}
+
+/**
+ * Expand missing ranges into the chunk numbers that still have to be sent.
+ * @param ranges - Inclusive [first, last] ranges from getUploadStatus
+ * @returns Chunk numbers to (re)send, in order
+ */
+export function chunksToResume(ranges: ChunkRange[]): number[] {
+  const chunks: number[] = [];
+  for (const [first, last] of ranges) {
+    for (let n = first; n <= last; n++) chunks.push(n);
+  }
+  return chunks;
+}
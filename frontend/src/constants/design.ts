@@ -89,5 +89,7 @@ export const UPLOAD_STATUS_CONFIG = {
   uploading: { label: "Загрузка", color: "blue" },
   uploaded: { label: "Загружено", color: "green" },
   processing: { label: "Обработка", color: "yellow" },
+  processed: { label: "Готово", color: "green" },
   error: { label: "Ошибка", color: "red" },
+  expired: { label: "Удалено", color: "gray" },
 } as const;
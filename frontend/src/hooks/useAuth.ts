@@ -4,6 +4,7 @@
  */
 
 import { useState, useEffect } from "react";
+import { logout as revokeSession } from "@/api/auth";
 import { apiClient } from "@/api/client";
 
 export interface UserStatus {
@@ -50,7 +51,9 @@ export function useAuth() {
 
   const isAuthenticated = !!user;
 
-  const logout = () => {
+  const logout = async () => {
+    // Revoke the tokens server-side; local sign-out proceeds even if that fails
+    await revokeSession().catch(() => undefined);
     localStorage.removeItem("access_token");
     localStorage.removeItem("refresh_token");
     setUser(null);
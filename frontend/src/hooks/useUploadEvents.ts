@@ -0,0 +1,62 @@
+/**
+ * Hooks for live upload progress pushed by the server (Server-Sent Events).
+ * Replace polling GET /uploads/{id}/status in UploadProgress and UploadQueue.
+ */
+
+import { useEffect, useState } from "react";
+import { API_BASE } from "@/api/client";
+import type { UploadProgressEvent } from "@/types/api";
+
+const FINAL_STATUSES = new Set(["uploaded", "processed", "error", "expired"]);
+
+/**
+ * Open an EventSource on an API path, authorized with the stored access token.
+ * EventSource cannot send headers, so the token goes in the query string.
+ */
+function openStream(path: string): EventSource {
+  const token = localStorage.getItem("access_token") ?? "";
+  return new EventSource(`${API_BASE}/api/v1${path}?access_token=${encodeURIComponent(token)}`);
+}
+
+/**
+ * Follow the progress of one upload.
+ * @param uploadId - Upload to follow, or null to stay idle
+ * @returns The latest event (the current state first), or null before it arrives
+ */
+export function useUploadEvents(uploadId: string | null): UploadProgressEvent | null {
+  const [event, setEvent] = useState<UploadProgressEvent | null>(null);
+
+  useEffect(() => {
+    if (!uploadId) return;
+    const source = openStream(`/uploads/${uploadId}/events`);
+    source.onmessage = (message: MessageEvent<string>) => {
+      const data = JSON.parse(message.data) as UploadProgressEvent;
+      setEvent(data);
+      // The server ends the stream; do not let EventSource reconnect
+      if (FINAL_STATUSES.has(data.status)) source.close();
+    };
+
+    return () => {
+      source.close();
+    };
+  }, [uploadId]);
+
+  return event;
+}
+
+/**
+ * Receive progress events of all uploads (admin upload queue).
+ * @param onEvent - Called for every event
+ */
+export function useAdminUploadEvents(onEvent: (event: UploadProgressEvent) => void): void {
+  useEffect(() => {
+    const source = openStream("/admin/uploads/events");
+    source.onmessage = (message: MessageEvent<string>) => {
+      onEvent(JSON.parse(message.data) as UploadProgressEvent);
+    };
+
+    return () => {
+      source.close();
+    };
+  }, [onEvent]);
+}
@@ -1,6 +1,6 @@
 /**
  * DashboardPage — full client dashboard with real API, tabs, beautiful UI.
- * Loads data from GET /api/v1/me and GET /api/v1/me/databases.
+ * Loads profile, databases and members in one request: GET /api/v1/me/bootstrap.
  * @see TZ section 2.3 — Dashboard layout
  */
 
@@ -118,6 +118,11 @@ export const DashboardPage: React.FC = () => {
     status: string;
     created_at: string;
   }
+  interface BootstrapData {
+    profile: MeData;
+    databases: DbRecord[];
+    members: MemberInfo[];
+  }
   const [members, setMembers] = useState<MemberInfo[]>([]);
   const [membersLoading, setMembersLoading] = useState(false);
   const [showInviteForm, setShowInviteForm] = useState(false);
@@ -132,13 +137,11 @@ export const DashboardPage: React.FC = () => {
     setLoading(true);
     setError("");
     try {
-      const [meRes, dbRes] = await Promise.all([
-        apiClient.get<MeData>("/me"),
-        apiClient.get<DbRecord[]>("/me/databases"),
-      ]);
-      setMe(meRes.data);
-      setDatabases(dbRes.data);
-      if (meRes.data.email) setEditEmail(meRes.data.email);
+      const res = await apiClient.get<BootstrapData>("/me/bootstrap");
+      setMe(res.data.profile);
+      setDatabases(res.data.databases);
+      setMembers(res.data.members);
+      if (res.data.profile.email) setEditEmail(res.data.profile.email);
     } catch {
       setError("Не удалось загрузить данные. Попробуйте обновить страницу.");
     } finally {
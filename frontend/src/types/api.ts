@@ -61,6 +61,10 @@ export interface RefreshTokenRequest {
   refresh_token: string;
 }
 
+export interface LogoutRequest {
+  refresh_token: string | null;
+}
+
 /** Response from POST /auth/refresh */
 export interface RefreshTokenResponse {
   access_token: string;
@@ -96,14 +100,25 @@ export interface UploadInitRequest {
   filename: string;
   size_bytes: number;
   config_code: string;
+  /** Hex SHA-256 of every CHUNK_SIZE_BYTES block — chunks the server already has are skipped */
+  chunk_hashes?: string[];
 }
 
 /** Response from POST /uploads/init */
 export interface UploadInitResponse {
   upload_id: string;
   db_name: string;
+  /** Bearer token for chunk PUTs of this upload (short-lived, renewed by /status) */
+  upload_token: string;
+  /** Negotiated by the server (5–100 MB) — always slice the file by this value */
   chunk_size: number;
   chunks_expected: number;
+  /** How many chunks the client may send concurrently */
+  parallel_chunks: number;
+  /** Chunks taken from earlier uploads of the organization */
+  chunks_deduplicated: number;
+  /** Chunk ranges the client has to send */
+  missing_ranges: ChunkRange[];
 }
 
 /** Response from PUT /uploads/{id}/chunk/{n} */
@@ -112,14 +127,39 @@ export interface ChunkUploadResponse {
   chunks_received: number;
 }
 
+/** Inclusive [first, last] range of chunk numbers */
+export type ChunkRange = [number, number];
+
 /** Response from GET /uploads/{id}/status */
 export interface UploadStatusResponse {
   upload_id: string;
   chunks_received: number;
   chunks_expected: number;
+  /** Chunk ranges not yet received — resume uploads only these */
+  missing_ranges: ChunkRange[];
+  /** SHA-256 over the chunk SHA-256 digests, set once the upload is complete */
+  checksum_sha256: string | null;
+  /** Fresh chunk token while the upload is in progress */
+  upload_token: string | null;
   status: UploadStatus;
 }
 
+/** Server-Sent Event of GET /uploads/{id}/events and /admin/uploads/events */
+export interface UploadProgressEvent {
+  upload_id: string;
+  organization_id: string;
+  status: UploadStatus;
+  chunks_received: number;
+  chunks_expected: number;
+  bytes_received: number;
+}
+
+/** Optional body of POST /uploads/{id}/complete */
+export interface UploadCompleteRequest {
+  /** SHA-256 over the concatenated binary SHA-256 digests of all chunks */
+  sha256?: string;
+}
+
 /** Response from POST /uploads/{id}/complete */
 export interface UploadCompleteResponse {
   status: string;
@@ -207,6 +247,9 @@ export interface AdminUploadRecord extends UploadRecord {
   user_email: string | null;
   db_name: string;
   storage_path: string;
+  /** Size of the stored file (smaller than size_bytes when compressed) */
+  stored_bytes: number | null;
+  compression: "none" | "zstd";
 }
 
 /** Request body for PATCH /admin/databases/{id} */
@@ -302,6 +345,15 @@ export interface SubscriptionRecord {
   auto_renew: boolean;
 }
 
+/** Response from GET /me/bootstrap: everything the dashboard shows on load */
+export interface DashboardBootstrap {
+  profile: UserProfile;
+  databases: DatabaseRecord[];
+  uploads: UploadRecord[];
+  subscription: SubscriptionRecord;
+  members: MemberRecord[];
+}
+
 // ═══ Health ═══
 
 /** Response from GET /health */
@@ -316,7 +368,14 @@ export interface HealthResponse {
 export type UserRole = "owner" | "admin" | "user";
 export type UserStatus = "active" | "disabled";
 export type DatabaseStatus = "preparing" | "active" | "readonly" | "blocked" | "deleted";
-export type UploadStatus = "pending" | "uploading" | "uploaded" | "processing" | "error";
+export type UploadStatus =
+  | "pending"
+  | "uploading"
+  | "uploaded"
+  | "processing"
+  | "processed"
+  | "error"
+  | "expired";
 export type InviteStatus = "pending" | "accepted" | "expired" | "cancelled";
 export type PlanId = "start" | "business" | "corp";
 export type PaymentPeriod = "monthly" | "quarterly" | "annual";